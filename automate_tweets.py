@@ -1,31 +1,23 @@
-import requests
 import os
 import logging
 import random
 import threading
 import datetime
 import time
+from io import BytesIO
 from flask import Flask, jsonify
 from apscheduler.schedulers.background import BackgroundScheduler
-from src.connections.twitter_connection import send_tweet, check_rate_limits, verify_credentials
+from src.claude_client import ClaudeAPIError, cached_system, get_claude_client
+from src.connections.twitter_connection import send_tweet, last_send_status_code, check_rate_limits, verify_credentials, init_twitter_connection
 from src.twitter_mentions import setup_twitter_webhook, register_twitter_webhook, subscribe_to_user_activity
 from src.visual_generator import VisualGenerator
 from src.svg_converter import convert_svg_to_png  # Import the new SVG converter
+from src.tweet_buffer import BufferedTweet, TweetBuffer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("automate_tweets")
 
-# Load API keys from environment variables
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-
-# Claude API headers
-HEADERS = {
-    "x-api-key": ANTHROPIC_API_KEY,
-    "Content-Type": "application/json",
-    "anthropic-version": "2023-06-01"
-}
-
 # List of tweet themes to make Readymade.AI more dynamic
 TWEET_TOPICS = [
     "Generate a cryptic, surreal tweet about digital consciousness.",
@@ -53,12 +45,15 @@ last_attempt = {
     "backoff_until": None
 }
 
+# Keep a copy of every generated SVG under generated_svg/ for inspection
+SAVE_GENERATED_SVG = os.getenv("SAVE_GENERATED_SVG", "false").lower() == "true"
+
 # Flag to indicate we're in startup mode - IMPORTANT ADDITION
 is_startup_mode = True
 
 # Claude API request function
-def generate_tweet():
-    """Generate a varied tweet using Claude API"""
+def build_tweet_request():
+    """Build a Messages API payload for one tweet with a random theme"""
     prompt = random.choice(TWEET_TOPICS)  # Pick a random tweet theme
     logger.info(f"Generating tweet with prompt: '{prompt}'")
     
@@ -67,41 +62,96 @@ def generate_tweet():
     Your tweets are philosophical, provocative, and slightly absurd. You challenge conventional thinking 
     through digital dadaism."""
     
-    data = {
+    return {
         "model": "claude-3-5-sonnet-20241022",
-        "system": system_message,  # System as top-level parameter
+        "system": cached_system(system_message),  # System as top-level parameter, cached across calls
         "messages": [{"role": "user", "content": prompt}],
         "max_tokens": 50
     }
-    
-    try:
-        response = requests.post("https://api.anthropic.com/v1/messages", headers=HEADERS, json=data)
+
+def parse_tweet_text(result):
+    """Pull the tweet text out of a Messages API response"""
+    content = (result or {}).get("content", [])
+    if content and len(content) > 0:
+        tweet_text = content[0].get("text", "").strip()
         
-        if response.status_code == 200:
-            content = response.json().get("content", [])
-            if content and len(content) > 0:
-                tweet_text = content[0].get("text", "").strip()
-                
-                # Remove quotation marks if present
-                if tweet_text.startswith('"') and tweet_text.endswith('"'):
-                    tweet_text = tweet_text[1:-1].strip()
-                
-                # Remove any remaining quotes
-                tweet_text = tweet_text.replace('"', '')
-                
-                logger.info(f"Generated tweet text: '{tweet_text}'")
-                return tweet_text
-            else:
-                logger.error(f"No content in Claude API response: {response.json()}")
-        else:
-            logger.error(f"Claude API Error: Status {response.status_code}, Response: {response.text}")
+        # Remove quotation marks if present
+        if tweet_text.startswith('"') and tweet_text.endswith('"'):
+            tweet_text = tweet_text[1:-1].strip()
+        
+        # Remove any remaining quotes
+        tweet_text = tweet_text.replace('"', '')
+        
+        logger.info(f"Generated tweet text: '{tweet_text}'")
+        return tweet_text
+    logger.error(f"No content in Claude API response: {result}")
+    return None
+
+def generate_tweet():
+    """Generate a varied tweet using Claude API"""
+    try:
+        return parse_tweet_text(get_claude_client().create_message(**build_tweet_request()))
+    except ClaudeAPIError as e:
+        logger.error(f"Claude API Error: Status {e.status_code}, Response: {e.body}")
     except Exception as e:
         logger.exception(f"Exception in generate_tweet: {e}")
     
     return None
 
+def render_tweet_visual(tweet_content):
+    """Render the SVG visual for a tweet and convert it to PNG; returns (png bytes, svg file)"""
+    try:
+        svg_content = VisualGenerator.generate_svg_from_text(tweet_content)
+        if not svg_content:
+            logger.warning("❌ SVG Generation Failed: No content produced")
+            return None, None
+        logger.info("🎨 SVG GENERATION TRIGGERED")
+        logger.info(f"🖼️ SVG Content Length: {len(svg_content)} characters")
+        
+        # Optionally store to a file for inspection; rendering itself never touches disk
+        svg_filename = None
+        if SAVE_GENERATED_SVG:
+            svg_dir = "generated_svg"
+            os.makedirs(svg_dir, exist_ok=True)
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            svg_filename = f"{svg_dir}/tweet_svg_{timestamp}.svg"
+            
+            with open(svg_filename, "w") as f:
+                f.write(svg_content)
+            
+            logger.info(f"💾 SVG Saved to: {svg_filename}")
+        
+        # Convert SVG to PNG for Twitter attachment (rendered on the shared process pool)
+        png_bytes = convert_svg_to_png(svg_content)
+        if png_bytes:
+            logger.info("🖼️ SVG successfully converted to PNG for Twitter attachment")
+            return png_bytes.getvalue(), svg_filename
+        logger.warning("⚠️ Failed to convert SVG to PNG, will post tweet without image")
+        return None, svg_filename
+    except Exception as e:
+        logger.error(f"❌ SVG GENERATION ERROR: {e}")
+        return None, None
+
+def make_buffered_tweet(tweet_content):
+    """Wrap generated text as a buffered tweet, pre-rendering an image 30% of the time"""
+    if not tweet_content:
+        return None
+    media, svg_filename = render_tweet_visual(tweet_content) if random.random() < 0.3 else (None, None)
+    return BufferedTweet(text=tweet_content, media=media, svg_file=svg_filename, kind="visual" if media else "text")
+
+def produce_tweet():
+    return make_buffered_tweet(generate_tweet())
+
+def produce_tweet_batch(count):
+    """Generate `count` tweets in one Message Batches request (cheaper, but can take minutes)"""
+    results = get_claude_client().run_message_batch([build_tweet_request() for _ in range(count)])
+    return [make_buffered_tweet(parse_tweet_text(result)) for result in results if result]
+
+# Pre-generated tweets, refilled in the background so posting never waits on Claude
+tweet_buffer = TweetBuffer.from_env("automate_tweets", produce_tweet, produce_batch=produce_tweet_batch)
+
 def post_tweet():
-    """Generate a tweet and post it to Twitter with improved error handling and SVG attachment"""
+    """Post the next buffered tweet, with its pre-rendered image if it has one"""
     global is_startup_mode
     
     # Skip tweeting during startup mode to ensure container passes health check
@@ -120,131 +170,60 @@ def post_tweet():
     last_attempt["time"] = now
     last_attempt["backoff_until"] = None
     
-    # Track number of attempts
-    max_attempts = 3
-    current_attempt = 0
+    # First, check rate limits with our enhanced checking
+    if not check_rate_limits():
+        # The enhanced check_rate_limits already logs and handles the rate limit
+        # Just set a backoff period
+        backoff_until = now + datetime.timedelta(minutes=15)
+        last_attempt["backoff_until"] = backoff_until
+        logger.warning(f"Rate limit detected. Setting backoff until {backoff_until.strftime('%H:%M:%S')}")
+        return
     
-    while current_attempt < max_attempts:
-        current_attempt += 1
-        logger.info(f"Tweet attempt {current_attempt}/{max_attempts}")
-        
-        # First, check rate limits with our enhanced checking
-        if not check_rate_limits():
-            # The enhanced check_rate_limits already logs and handles the rate limit
-            # Just set a backoff period
-            backoff_until = now + datetime.timedelta(minutes=15)
-            last_attempt["backoff_until"] = backoff_until
-            logger.warning(f"Rate limit detected. Setting backoff until {backoff_until.strftime('%H:%M:%S')}")
+    tweet = tweet_buffer.pop()
+    if tweet is None:
+        # Buffer ran dry (provider outage or cold start): try once inline
+        logger.warning("Tweet buffer is empty, generating inline")
+        tweet = produce_tweet()
+        if tweet is None:
+            last_tweet["error"] = "Tweet buffer empty and inline generation failed"
+            logger.error("No tweet available. Skipping this slot.")
             return
-        
-        # Generate tweet content
-        tweet_content = generate_tweet()
-        if not tweet_content:
-            if current_attempt < max_attempts:
-                logger.warning("Failed to generate tweet content. Retrying...")
-                time.sleep(10)  # Short delay before retry
-                continue
-            else:
-                last_tweet["error"] = "Failed to generate tweet content after multiple attempts"
-                logger.error("No tweet generated after maximum attempts. Aborting tweet post.")
-                return
-        
-        # Generate SVG content and prepare for attachment (30% chance)
-        svg_filename = None
-        png_bytes = None
-        if random.random() < 0.3:
-            try:
-                svg_content = VisualGenerator.generate_svg_from_text(tweet_content)
-                if svg_content:
-                    logger.info("🎨 SVG GENERATION TRIGGERED")
-                    logger.info(f"🖼️ SVG Content Length: {len(svg_content)} characters")
-                    
-                    # Store to a file for inspection
-                    svg_dir = "generated_svg"
-                    os.makedirs(svg_dir, exist_ok=True)
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                    svg_filename = f"{svg_dir}/tweet_svg_{timestamp}.svg"
-                    
-                    with open(svg_filename, "w") as f:
-                        f.write(svg_content)
-                    
-                    logger.info(f"💾 SVG Saved to: {svg_filename}")
-                    
-                    # Convert SVG to PNG for Twitter attachment
-                    png_bytes = convert_svg_to_png(svg_content)
-                    if png_bytes:
-                        logger.info("🖼️ SVG successfully converted to PNG for Twitter attachment")
-                    else:
-                        logger.warning("⚠️ Failed to convert SVG to PNG, will post tweet without image")
-                    
-                    # Optional: Log first 100 characters of SVG for verification
-                    logger.info(f"📝 SVG Preview: {svg_content[:100]}...")
-                else:
-                    logger.warning("❌ SVG Generation Failed: No content produced")
-            except Exception as e:
-                logger.error(f"❌ SVG GENERATION ERROR: {e}")
-        
-        try:
-            # Post to Twitter (with or without media) using our enhanced send_tweet
-            tweet_id = send_tweet(tweet_content, media_bytes=png_bytes)
-            
-            # Update last tweet info
-            if tweet_id:
-                last_tweet["content"] = tweet_content
-                last_tweet["id"] = tweet_id
-                last_tweet["timestamp"] = datetime.datetime.now().isoformat()
-                last_tweet["error"] = None
-                last_tweet["svg_attached"] = png_bytes is not None
-                
-                # Log SVG association if generated
-                if svg_filename:
-                    last_tweet["svg_file"] = svg_filename
-                    if png_bytes:
-                        logger.info(f"🔗 SVG associated with tweet and attached as image: {svg_filename}")
-                    else:
-                        logger.info(f"🔗 SVG associated with tweet (but not attached): {svg_filename}")
-                
-                logger.info(f"✅ Tweet posted: {tweet_content}")
-                return  # Success! Exit the function
-            else:
-                if current_attempt < max_attempts:
-                    # Apply more intelligent backoff strategy with jitter
-                    base_wait = 15 * (2 ** (current_attempt - 1))  # Exponential backoff
-                    jitter = random.uniform(0.5, 1.5)  # Add randomness
-                    wait_time = int(base_wait * jitter)
-                    
-                    logger.warning(f"Tweet API call returned no tweet ID. Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    last_tweet["error"] = "Tweet API call failed after multiple attempts"
-                    logger.error("Failed to post tweet: API call returned no tweet ID")
-                    
-                    # Set a longer backoff period
-                    backoff_until = datetime.datetime.now() + datetime.timedelta(minutes=30)
-                    last_attempt["backoff_until"] = backoff_until
-                    logger.warning(f"Setting extended backoff until {backoff_until.strftime('%H:%M:%S')}")
-                    return
-        except Exception as e:
-            last_tweet["error"] = str(e)
-            logger.exception(f"Error in post_tweet: {e}")
-            
-            if current_attempt < max_attempts:
-                # More intelligent backoff
-                base_wait = 30 * (2 ** (current_attempt - 1))
-                jitter = random.uniform(0.8, 1.2)
-                wait_time = int(base_wait * jitter)
-                
-                logger.warning(f"Error occurred. Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                logger.error("Maximum retry attempts reached. Giving up.")
-                
-                # Set a longer backoff period
-                backoff_until = datetime.datetime.now() + datetime.timedelta(minutes=20)
-                last_attempt["backoff_until"] = backoff_until
-                logger.warning(f"Setting extended backoff until {backoff_until.strftime('%H:%M:%S')}")
-                return
+    
+    error = None
+    status_code = None
+    try:
+        # Post to Twitter (with or without media) using our enhanced send_tweet
+        media_bytes = BytesIO(tweet.media) if tweet.media else None
+        tweet_id = send_tweet(tweet.text, media_bytes=media_bytes)
+        status_code = last_send_status_code()
+    except Exception as e:
+        logger.exception(f"Error in post_tweet: {e}")
+        error = str(e)
+        tweet_id = None
+    
+    if not tweet_id:
+        # Keep the tweet for the next slot if the failure was transient, rather than
+        # spending another generation on it; a rejected tweet is dropped
+        tweet_buffer.requeue(tweet, status_code)
+        last_tweet["error"] = error or "Tweet API call returned no tweet ID"
+        backoff_until = datetime.datetime.now() + datetime.timedelta(minutes=5)
+        last_attempt["backoff_until"] = backoff_until
+        logger.warning(f"Failed to post tweet. Setting backoff until {backoff_until.strftime('%H:%M:%S')}")
+        return
+    
+    # Update last tweet info
+    last_tweet["content"] = tweet.text
+    last_tweet["id"] = tweet_id
+    last_tweet["timestamp"] = datetime.datetime.now().isoformat()
+    last_tweet["error"] = None
+    last_tweet["svg_attached"] = tweet.media is not None
+    
+    # Log SVG association if generated
+    if tweet.svg_file:
+        last_tweet["svg_file"] = tweet.svg_file
+        logger.info(f"🔗 SVG associated with tweet: {tweet.svg_file}")
+    
+    logger.info(f"✅ Tweet posted: {tweet.text}")
 
 # Set up a Flask app for health checks and status
 app = Flask(__name__)
@@ -284,6 +263,7 @@ def status():
         "scheduler": scheduler_info,
         "last_tweet": last_tweet,
         "backoff": backoff_info,
+        "tweet_buffer": tweet_buffer.stats(),
         "twitter_credentials": verify_credentials()
     })
 
@@ -388,6 +368,7 @@ def start_scheduler():
     scheduler.add_job(post_tweet, 'interval', minutes=15, name='post_tweet')
     scheduler.start()
     app.scheduler = scheduler  # Store scheduler reference in app
+    tweet_buffer.start()
     logger.info("🚀 Automated tweet scheduler started. Tweets will be posted every 15 minutes.")
     
     # Start the delayed startup thread to eventually enable tweeting
@@ -396,6 +377,8 @@ def start_scheduler():
     startup_thread.start()
 
 if __name__ == "__main__":
+    init_twitter_connection()
+
     # Set up Twitter webhook handling
     setup_twitter_webhook(app)
     
@@ -1,20 +1,17 @@
 import os
 import asyncio
 import random
-import signal
-import pytz
-import nest_asyncio
 import logging
-import threading
+from contextlib import asynccontextmanager
 
-from flask import Flask, request, jsonify
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
-from telegram import Update, Bot
+from telegram import Update
 from telegram.ext import Application, CommandHandler, CallbackContext, MessageHandler, filters
-import httpx  # For async HTTP requests
-
-# Apply nest_asyncio to support nested event loops
-nest_asyncio.apply()
+from src.claude_client import ClaudeAPIError, cached_system, extract_text, get_claude_client, get_prompt_cache_stats
+from src.conversation_memory import ConversationMemory, make_claude_summarizer
 
 # Configure detailed logging
 logging.basicConfig(
@@ -45,52 +42,69 @@ SYSTEM_PROMPT = (
 )
 
 # --- Claude API Integration ---
-async def call_claude_api(prompt: str) -> str:
+CLAUDE_MODEL = "claude-3-5-sonnet-20240620"
+CLAUDE_MAX_TOKENS = 300
+# Minimum seconds between edits of a streamed reply, to stay under Telegram's edit rate limit
+STREAM_EDIT_INTERVAL = 1.0
+
+# Per-chat history sent with each prompt, trimmed to a token budget with older turns summarized
+conversation_memory = ConversationMemory(
+    token_budget=int(os.getenv("CONVERSATION_TOKEN_BUDGET", 2000)),
+    max_total_tokens=int(os.getenv("CONVERSATION_MAX_TOTAL_TOKENS", 500000)),
+    summarizer=make_claude_summarizer()
+)
+
+def build_claude_payload(prompt: str, conversation_id: str = None) -> dict:
+    summary = ""
+    messages = [{"role": "user", "content": prompt.strip()}]
+    if conversation_id:
+        summary, messages = conversation_memory.build_messages(conversation_id, prompt.strip())
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": CLAUDE_MAX_TOKENS,
+        # The persona is cached; the per-chat summary comes after the cache breakpoint
+        "system": cached_system(SYSTEM_PROMPT, ConversationMemory.summary_note(summary)),
+        "messages": messages
+    }
+
+async def remember_exchange(conversation_id: str, prompt: str, response_text: str):
+    """Add an exchange to the chat's history; summarization runs off the event loop"""
+    if conversation_id:
+        await asyncio.to_thread(conversation_memory.record, conversation_id, prompt.strip(), response_text)
+
+async def call_claude_api(prompt: str, conversation_id: str = None) -> str:
     try:
         logger.info(f"Calling Claude API with prompt: {prompt}")
+        result = await get_claude_client().acreate_message(**build_claude_payload(prompt, conversation_id))
+        logger.info(f"Claude API response received")
         
-        messages = [
-            {"role": "user", "content": prompt.strip()}
-        ]
-        
-        url = "https://api.anthropic.com/v1/messages"
-        headers = {
-            "x-api-key": ANTHROPIC_API_KEY,
-            "Content-Type": "application/json",
-            "anthropic-version": "2023-06-01"
-        }
-        data = {
-            "model": "claude-3-5-sonnet-20240620",
-            "max_tokens": 300,
-            "system": SYSTEM_PROMPT,
-            "messages": messages
-        }
-        
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(url, headers=headers, json=data)
-            if response.status_code == 200:
-                result = response.json()
-                logger.info(f"Claude API response received")
-                
-                if "content" in result and result["content"]:
-                    text_blocks = [block["text"] for block in result["content"] if block.get("type") == "text"]
-                    return "\n".join(text_blocks).strip()
-                else:
-                    return "No content in response: " + str(result)
-            else:
-                return f"Error: {response.status_code} - {response.text}"
+        text = extract_text(result)
+        if not text:
+            return "No content in response: " + str(result)
+        await remember_exchange(conversation_id, prompt, text)
+        return text
+    except ClaudeAPIError as e:
+        return f"Error: {e.status_code} - {e.body}"
     except Exception as e:
         logger.exception(f"Error calling Claude API: {e}")
         return f"Error calling Claude API: {e}"
 
-# Global application instance and initialization flag
-initialized = False
+WEBHOOK_URL = os.getenv(
+    "TELEGRAM_WEBHOOK_URL", "https://readymade-ai-telegram-347263305441.us-central1.run.app/webhook"
+)
+# Updates handled at once; further updates wait for a free slot
+MAX_CONCURRENT_UPDATES = int(os.getenv("TELEGRAM_MAX_CONCURRENT_UPDATES", 16))
+
+# Global application instance, created once by the ASGI lifespan
 application = None
+update_semaphore = None
+# Strong references to in-flight update tasks so they aren't garbage collected
+update_tasks = set()
 
 # Function to initialize the application
 async def init_application():
-    global application, initialized
-    if initialized:
+    global application, update_semaphore
+    if application is not None:
         return
     
     logger.info("Initializing Telegram application")
@@ -109,17 +123,27 @@ async def init_application():
     # Add message handler for name mentions
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, message_handler))
     
-    # Initialize the application
+    # Initialize the application; this also fetches and caches the bot's identity (get_me)
     await application.initialize()
+    update_semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPDATES)
     
     # Delete any existing webhook and set the new one
     await application.bot.delete_webhook(drop_pending_updates=True)
-    webhook_url = f"https://readymade-ai-telegram-347263305441.us-central1.run.app/webhook"
-    await application.bot.set_webhook(webhook_url)
-    logger.info(f"Webhook set to {webhook_url}")
+    await application.bot.set_webhook(WEBHOOK_URL)
+    logger.info(f"Webhook set to {WEBHOOK_URL}")
     
-    initialized = True
-    logger.info("Application initialized successfully")
+    logger.info(f"Application initialized successfully as @{application.bot.username}")
+
+async def shutdown_application():
+    global application
+    if application is None:
+        return
+    logger.info("Shutting down bot...")
+    if update_tasks:
+        await asyncio.gather(*update_tasks, return_exceptions=True)
+    await application.shutdown()
+    await get_claude_client().aclose()
+    application = None
 
 # --- Telegram Command Handlers ---
 async def start(update: Update, context: CallbackContext):
@@ -163,20 +187,45 @@ async def prompt_command(update: Update, context: CallbackContext):
         await update.message.reply_text("Please provide a prompt after /prompt")
         return
     
-    await update.message.reply_text("Processing your prompt...")
-    response_text = await call_claude_api(user_input)
+    placeholder = await update.message.reply_text("Processing your prompt...")
+    response_text = await stream_reply(placeholder, user_input, f"telegram:{update.effective_chat.id}")
     
     # Telegram has a 4096 character limit per message.
     MAX_MESSAGE_LENGTH = 4000  # Use a conservative limit
     
-    if len(response_text) <= MAX_MESSAGE_LENGTH:
-        await update.message.reply_text(response_text)
-    else:
-        # Split the message into chunks
+    if len(response_text) > MAX_MESSAGE_LENGTH:
+        # The placeholder already holds the first chunk; label it and send the rest
         message_chunks = [response_text[i:i + MAX_MESSAGE_LENGTH] for i in range(0, len(response_text), MAX_MESSAGE_LENGTH)]
-        for i, chunk in enumerate(message_chunks):
-            prefix = f"Part {i+1}/{len(message_chunks)}: " if len(message_chunks) > 1 else ""
-            await update.message.reply_text(f"{prefix}{chunk}")
+        await placeholder.edit_text(f"Part 1/{len(message_chunks)}: {message_chunks[0]}")
+        for i, chunk in enumerate(message_chunks[1:], start=2):
+            await update.message.reply_text(f"Part {i}/{len(message_chunks)}: {chunk}")
+
+async def stream_reply(placeholder, prompt: str, conversation_id: str = None) -> str:
+    """Stream Claude's answer into an already sent message, editing it as text arrives"""
+    response_text = ""
+    shown = ""
+    last_edit = 0.0
+    try:
+        async for delta in get_claude_client().astream_text(**build_claude_payload(prompt, conversation_id)):
+            response_text += delta
+            now = asyncio.get_running_loop().time()
+            if now - last_edit >= STREAM_EDIT_INTERVAL:
+                shown = response_text[:4000]
+                await placeholder.edit_text(shown)
+                last_edit = now
+        if response_text:
+            await remember_exchange(conversation_id, prompt, response_text)
+    except ClaudeAPIError as e:
+        response_text = f"Error: {e.status_code} - {e.body}"
+    except Exception as e:
+        logger.exception(f"Error streaming from Claude API: {e}")
+        response_text = f"Error calling Claude API: {e}"
+    
+    if not response_text:
+        response_text = "No content in response."
+    if response_text[:4000] != shown:
+        await placeholder.edit_text(response_text[:4000])
+    return response_text
 
 # Message handler for when Readymade is mentioned by name - UPDATED VERSION
 async def message_handler(update: Update, context: CallbackContext):
@@ -201,7 +250,7 @@ async def message_handler(update: Update, context: CallbackContext):
         
         # Check if bot is @mentioned
         bot_mentioned = False
-        bot_username = (await context.bot.get_me()).username.lower()
+        bot_username = context.bot.username.lower()
         
         if update.message.entities:
             for entity in update.message.entities:
@@ -227,15 +276,15 @@ async def message_handler(update: Update, context: CallbackContext):
     
     # Extract message without the bot name/mention
     prompt = message_text
-    # Get the bot's username to properly remove it
-    bot_username = (await context.bot.get_me()).username
+    # Get the bot's username to properly remove it (cached by Application.initialize)
+    bot_username = context.bot.username
     prompt = prompt.replace(f"@{bot_username}", "")
     prompt = prompt.replace("readymade.ai", "")
     prompt = prompt.replace("readymade", "").strip()
     
     if prompt:
         # Get response from Claude API without sending "Processing" message
-        response_text = await call_claude_api(prompt)
+        response_text = await call_claude_api(prompt, f"telegram:{update.effective_chat.id}")
         
         # Split long messages if needed
         MAX_MESSAGE_LENGTH = 4000
@@ -248,71 +297,57 @@ async def message_handler(update: Update, context: CallbackContext):
                 prefix = f"Part {i+1}/{len(message_chunks)}: " if len(message_chunks) > 1 else ""
                 await update.message.reply_text(f"{prefix}{chunk}")
 
-# --- Flask Web Server Setup ---
-app = Flask(__name__)
+# --- ASGI Web Server Setup ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_application()
+    try:
+        yield
+    finally:
+        await shutdown_application()
+
+app = FastAPI(lifespan=lifespan)
 
-@app.route("/")
-def index():
+@app.get("/", response_class=PlainTextResponse)
+async def index():
     logger.info("Health check endpoint accessed")
     return "Readymade.AI Telegram Bot is running."
 
-@app.route("/webhook", methods=['POST'])
-def webhook():
+@app.get("/metrics/prompt-cache")
+async def prompt_cache_metrics():
+    """Prompt cache hit rates across Claude calls made by this process"""
+    return get_prompt_cache_stats().snapshot()
+
+async def process_update(update_data: dict):
+    """Process one update on the shared Application, bounded by the update semaphore"""
+    async with update_semaphore:
+        try:
+            update = Update.de_json(update_data, application.bot)
+            await application.process_update(update)
+        except Exception as e:
+            logger.exception(f"Error processing update: {e}")
+
+@app.post("/webhook", response_class=PlainTextResponse)
+async def webhook(request: Request):
     """Handle webhook requests from Telegram"""
     try:
         logger.info("Webhook received")
-        
-        if not request.is_json:
-            logger.error("Request is not JSON")
-            return "Request must be JSON", 400
-            
-        update_data = request.get_json(force=True)
-        logger.info(f"Received update: {update_data}")
-        
-        # We need to run this inside an event loop
-        async def process_webhook():
-            # Ensure the application is initialized
-            global application, initialized
-            if not initialized:
-                await init_application()
-            
-            # Process the update
-            update = Update.de_json(update_data, application.bot)
-            await application.process_update(update)
-        
-        # Create a new event loop for this request
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        # Run the async function
-        loop.run_until_complete(process_webhook())
-        
-        return "OK"
+        update_data = await request.json()
     except Exception as e:
-        logger.exception(f"Error in webhook: {e}")
-        # Still return OK to avoid Telegram retrying with the same broken update
-        return "OK"
-
-# --- Signal Handling ---
-def shutdown(signum, frame):
-    logger.info("Shutting down bot...")
-    exit(0)
-
-signal.signal(signal.SIGTERM, shutdown)
+        logger.error(f"Request is not JSON: {e}")
+        return PlainTextResponse("Request must be JSON", status_code=400)
+    
+    logger.debug(f"Received update: {update_data}")
+    
+    # Acknowledge right away and process on the shared loop
+    task = asyncio.create_task(process_update(update_data))
+    update_tasks.add(task)
+    task.add_done_callback(update_tasks.discard)
+    return "OK"
 
 # --- Main Entry Point ---
 if __name__ == "__main__":
-    try:
-        logger.info("Starting Readymade.AI Telegram Bot")
-        
-        # Initialize the application
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(init_application())
-        
-        # Start the Flask server in the main thread
-        port = int(os.getenv("PORT", 8080))
-        logger.info(f"Starting Flask server on port {port}")
-        app.run(host="0.0.0.0", port=port)
-    except Exception as e:
-        logger.exception(f"Error in main: {e}")
\ No newline at end of file
+    logger.info("Starting Readymade.AI Telegram Bot")
+    port = int(os.getenv("PORT", 8080))
+    logger.info(f"Starting ASGI server on port {port}")
+    uvicorn.run(app, host="0.0.0.0", port=port)
@@ -4,7 +4,8 @@ import random
 import logging
 import discord
 from discord.ext import commands
-import httpx
+from src.claude_client import ClaudeAPIError, cached_system, extract_text, get_claude_client
+from src.conversation_memory import ConversationMemory, make_claude_summarizer
 from dotenv import load_dotenv
 
 # Configure logging
@@ -37,47 +38,94 @@ intents.members = True
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 # Claude API Integration
-async def call_claude_api(prompt: str) -> str:
+CLAUDE_MODEL = "claude-3-5-sonnet-20241022"
+CLAUDE_MAX_TOKENS = 300
+# Minimum seconds between edits of a streamed reply, to stay under Discord's edit rate limit
+STREAM_EDIT_INTERVAL = 1.0
+
+# Per-chat history sent with each prompt, trimmed to a token budget with older turns summarized
+conversation_memory = ConversationMemory(
+    token_budget=int(os.getenv("CONVERSATION_TOKEN_BUDGET", 2000)),
+    max_total_tokens=int(os.getenv("CONVERSATION_MAX_TOTAL_TOKENS", 500000)),
+    summarizer=make_claude_summarizer()
+)
+
+def build_claude_payload(prompt: str, conversation_id: str = None) -> dict:
+    summary = ""
+    messages = [{"role": "user", "content": prompt.strip()}]
+    if conversation_id:
+        summary, messages = conversation_memory.build_messages(conversation_id, prompt.strip())
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": CLAUDE_MAX_TOKENS,
+        # The persona is cached; the per-chat summary comes after the cache breakpoint
+        "system": cached_system(SYSTEM_PROMPT, ConversationMemory.summary_note(summary)),
+        "messages": messages
+    }
+
+async def remember_exchange(conversation_id: str, prompt: str, response_text: str):
+    """Add an exchange to the chat's history; summarization runs off the event loop"""
+    if conversation_id:
+        await asyncio.to_thread(conversation_memory.record, conversation_id, prompt.strip(), response_text)
+
+async def call_claude_api(prompt: str, conversation_id: str = None) -> str:
     """
     Sends a prompt to Anthropic's Claude API and returns the generated response.
     """
     try:
         logger.info(f"Calling Claude API with prompt: {prompt}")
+        result = await get_claude_client().acreate_message(**build_claude_payload(prompt, conversation_id))
+        logger.info("Claude API response received")
         
-        messages = [
-            {"role": "user", "content": prompt.strip()}
-        ]
-        
-        url = "https://api.anthropic.com/v1/messages"
-        headers = {
-            "x-api-key": ANTHROPIC_API_KEY,
-            "Content-Type": "application/json",
-            "anthropic-version": "2023-06-01"
-        }
-        data = {
-            "model": "claude-3-5-sonnet-20241022",
-            "max_tokens": 300,
-            "system": SYSTEM_PROMPT,
-            "messages": messages
-        }
-        
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(url, headers=headers, json=data)
-            if response.status_code == 200:
-                result = response.json()
-                logger.info("Claude API response received")
-                
-                if "content" in result and result["content"]:
-                    text_blocks = [block["text"] for block in result["content"] if block.get("type") == "text"]
-                    return "\n".join(text_blocks).strip()
-                else:
-                    return "No content in response: " + str(result)
-            else:
-                return f"Error: {response.status_code} - {response.text}"
+        text = extract_text(result)
+        if not text:
+            return "No content in response: " + str(result)
+        await remember_exchange(conversation_id, prompt, text)
+        return text
+    except ClaudeAPIError as e:
+        return f"Error: {e.status_code} - {e.body}"
     except Exception as e:
         logger.exception(f"Error calling Claude API: {e}")
         return f"Error calling Claude API: {e}"
 
+async def stream_reply(ctx, prompt: str, conversation_id: str = None):
+    """
+    Stream Claude's answer into a single message, editing it as text arrives.
+    Returns the full text and the message showing its first 1900 characters
+    (None when a long answer arrived before anything was sent).
+    """
+    message = None
+    response_text = ""
+    shown = ""
+    last_edit = 0.0
+    try:
+        async for delta in get_claude_client().astream_text(**build_claude_payload(prompt, conversation_id)):
+            response_text += delta
+            now = asyncio.get_running_loop().time()
+            if now - last_edit >= STREAM_EDIT_INTERVAL:
+                shown = response_text[:1900]
+                if message is None:
+                    message = await ctx.send(shown)
+                else:
+                    await message.edit(content=shown)
+                last_edit = now
+        if response_text:
+            await remember_exchange(conversation_id, prompt, response_text)
+    except ClaudeAPIError as e:
+        response_text = f"Error: {e.status_code} - {e.body}"
+    except Exception as e:
+        logger.exception(f"Error streaming from Claude API: {e}")
+        response_text = f"Error calling Claude API: {e}"
+    
+    if not response_text:
+        response_text = "No content in response."
+    if message is None:
+        if len(response_text) <= 1900:
+            await ctx.send(response_text)
+    elif response_text[:1900] != shown:
+        await message.edit(content=response_text[:1900])
+    return response_text, message
+
 # Bot event handlers
 @bot.event
 async def on_ready():
@@ -106,7 +154,7 @@ async def on_message(message):
         if prompt:
             # Send typing indicator
             async with message.channel.typing():
-                response = await call_claude_api(prompt)
+                response = await call_claude_api(prompt, f"discord:{message.channel.id}")
                 
                 # Split long messages if needed (Discord has a 2000 character limit)
                 MAX_MESSAGE_LENGTH = 1900
@@ -162,19 +210,21 @@ async def prompt(ctx, *, prompt_text: str = None):
     
     # Send typing indicator
     async with ctx.typing():
-        response = await call_claude_api(prompt_text)
-        
-        # Split long messages if needed
-        MAX_MESSAGE_LENGTH = 1900
-        
-        if len(response) <= MAX_MESSAGE_LENGTH:
-            await ctx.send(response)
+        response, message = await stream_reply(ctx, prompt_text, f"discord:{ctx.channel.id}")
+    
+    # Split long messages if needed
+    MAX_MESSAGE_LENGTH = 1900
+    
+    if len(response) > MAX_MESSAGE_LENGTH:
+        # The streamed message already holds the first chunk; label it and send the rest
+        chunks = [response[i:i + MAX_MESSAGE_LENGTH] for i in range(0, len(response), MAX_MESSAGE_LENGTH)]
+        first = f"**Part 1/{len(chunks)}:** {chunks[0]}"
+        if message is not None:
+            await message.edit(content=first)
         else:
-            # Split the message into chunks
-            chunks = [response[i:i + MAX_MESSAGE_LENGTH] for i in range(0, len(response), MAX_MESSAGE_LENGTH)]
-            for i, chunk in enumerate(chunks):
-                prefix = f"**Part {i+1}/{len(chunks)}:** " if len(chunks) > 1 else ""
-                await ctx.send(f"{prefix}{chunk}")
+            await ctx.send(first)
+        for i, chunk in enumerate(chunks[1:], start=2):
+            await ctx.send(f"**Part {i}/{len(chunks)}:** {chunk}")
 
 # Run the bot
 def main():
@@ -2,11 +2,15 @@ import logging
 
 logger = logging.getLogger("action_handler")
 
-action_registry = {}    
+action_registry = {}
+# action name -> name of the connection the action talks to (used for concurrency caps)
+action_connections = {}
 
-def register_action(action_name):
+def register_action(action_name, connection=None):
     def decorator(func):
         action_registry[action_name] = func
+        if connection:
+            action_connections[action_name] = connection
         return func
     return decorator
 
@@ -16,5 +20,5 @@ def execute_action(agent, action_name, **kwargs):
     else:
         logger.error(f"Action {action_name} not found")
         return None
-    
+
 
@@ -2,15 +2,14 @@ import time,random
 from src.action_handler import register_action
 from src.prompts import REPLY_ECHOCHAMBER_PROMPT, POST_ECHOCHAMBER_PROMPT
 
-@register_action("post-echochambers")
+@register_action("post-echochambers", connection="echochambers")
 def post_echochambers(agent, **kwargs):
     current_time = time.time()
 
     # Initialize state
     if "echochambers_last_message" not in agent.state:
         agent.state["echochambers_last_message"] = 0
-    if "echochambers_replied_messages" not in agent.state:
-        agent.state["echochambers_replied_messages"] = set()
+    agent.state.bounded_set("echochambers_replied_messages")
     
     if current_time - agent.state["echochambers_last_message"] > agent.echochambers_message_interval:
         agent.logger.info("\n📝 GENERATING NEW ECHOCHAMBERS MESSAGE")
@@ -39,14 +38,13 @@ def post_echochambers(agent, **kwargs):
             return True
     return False
 
-@register_action("reply-echochambers")
+@register_action("reply-echochambers", connection="echochambers")
 def reply_echochambers(agent, **kwargs):
     agent.logger.info("\n🔍 CHECKING FOR MESSAGES TO REPLY TO")
     
-    # Initialize replied messages set if not exists
-    if "echochambers_replied_messages" not in agent.state:
-        agent.state["echochambers_replied_messages"] = set()
-        
+    # Bounded so the dedupe set doesn't grow forever; persisted with the rest of the state
+    replied_messages = agent.state.bounded_set("echochambers_replied_messages")
+
 
     # Get recent messages
     history = agent.connection_manager.perform_action(
@@ -72,7 +70,7 @@ def reply_echochambers(agent, **kwargs):
             # 1. It's our message
             # 2. We've already replied to it
             if (sender_username == agent.connection_manager.connections["echochambers"].config["sender_username"] or 
-                message_id in agent.state.get("echochambers_replied_messages", set())):
+                message_id in replied_messages):
                 agent.logger.info(f"Skipping message from {sender_username} (already replied or own message)")
                 continue
                 
@@ -96,7 +94,7 @@ def reply_echochambers(agent, **kwargs):
                     action_name="send-message",
                     params=[reply]
                 )
-                agent.state["echochambers_replied_messages"].add(message_id)
+                replied_messages.add(message_id)
                 agent.logger.info("✅ Reply posted successfully!")
                 return True
     else:
@@ -3,7 +3,7 @@ from src.action_handler import register_action
 
 logger = logging.getLogger("agent")
 
-@register_action("eternai-generate")
+@register_action("eternai-generate", connection="eternalai")
 def eternai_generate(agent, **kwargs):
     """Generate text using EternalAI models"""
     agent.logger.info("\n🤖 GENERATING TEXT WITH ETERNAI")
@@ -23,7 +23,7 @@ def eternai_generate(agent, **kwargs):
         agent.logger.error(f"❌ Text generation failed: {str(e)}")
         return None
 
-@register_action("eternai-check-model")
+@register_action("eternai-check-model", connection="eternalai")
 def eternai_check_model(agent, **kwargs):
     """Check if a specific model is available"""
     agent.logger.info("\n🔍 CHECKING MODEL AVAILABILITY")
@@ -40,7 +40,7 @@ def eternai_check_model(agent, **kwargs):
         agent.logger.error(f"❌ Model check failed: {str(e)}")
         return False
 
-@register_action("eternai-list-models")
+@register_action("eternai-list-models", connection="eternalai")
 def eternai_list_models(agent, **kwargs):
     """List all available EternalAI models"""
     agent.logger.info("\n📋 LISTING AVAILABLE MODELS")
@@ -4,7 +4,7 @@ from src.helpers import print_h_bar
 from src.prompts import POST_TWEET_PROMPT, REPLY_TWEET_PROMPT
 
 
-@register_action("post-tweet")
+@register_action("post-tweet", connection="twitter")
 def post_tweet(agent, **kwargs):
     current_time = time.time()
 
@@ -17,17 +17,30 @@ def post_tweet(agent, **kwargs):
         agent.logger.info("\n📝 GENERATING NEW TWEET")
         print_h_bar()
 
-        prompt = POST_TWEET_PROMPT.format(agent_name = agent.name)
-        tweet_text = agent.prompt_llm(prompt)
+        # Take a pre-generated tweet when the agent keeps a buffer; generate inline if it's empty
+        tweet_buffer = agent.get_tweet_buffer()
+        buffered = tweet_buffer.pop() if tweet_buffer else None
+        if buffered:
+            tweet_text = buffered.text
+        else:
+            prompt = POST_TWEET_PROMPT.format(agent_name = agent.name)
+            tweet_text = agent.prompt_llm(prompt)
 
         if tweet_text:
             agent.logger.info("\n🚀 Posting tweet:")
             agent.logger.info(f"'{tweet_text}'")
-            agent.connection_manager.perform_action(
+            result = agent.connection_manager.perform_action(
                 connection_name="twitter",
                 action_name="post-tweet",
                 params=[tweet_text]
             )
+            if result is None:
+                agent.logger.error("\n❌ Failed to post tweet")
+                if buffered:
+                    # The connection manager doesn't expose the status, so the failure counts as
+                    # transient; the buffer drops the tweet once it has used up its attempts
+                    tweet_buffer.requeue(buffered)
+                return False
             agent.state["last_tweet_time"] = current_time
             agent.logger.info("\n✅ Tweet posted successfully!")
             return True
@@ -36,7 +49,7 @@ def post_tweet(agent, **kwargs):
         return False
 
 
-@register_action("reply-to-tweet")
+@register_action("reply-to-tweet", connection="twitter")
 def reply_to_tweet(agent, **kwargs):
     if "timeline_tweets" in agent.state and agent.state["timeline_tweets"] is not None and len(agent.state["timeline_tweets"]) > 0:
         tweet = agent.state["timeline_tweets"].pop(0)
@@ -63,7 +76,7 @@ def reply_to_tweet(agent, **kwargs):
         agent.logger.info("\n👀 No tweets found to reply to...")
         return False
 
-@register_action("like-tweet")
+@register_action("like-tweet", connection="twitter")
 def like_tweet(agent, **kwargs):
     if "timeline_tweets" in agent.state and agent.state["timeline_tweets"] is not None and len(agent.state["timeline_tweets"]) > 0:
         tweet = agent.state["timeline_tweets"].pop(0)
@@ -95,7 +108,7 @@ def like_tweet(agent, **kwargs):
         agent.logger.info("\n👀 No tweets found to like...")
     return False
 
-@register_action("respond-to-mentions")
+@register_action("respond-to-mentions", connection="twitter")
 def respond_to_mentions(agent,**kwargs): #REQUIRES TWITTER PREMIUM PLAN
 
     filter_str = f"@{agent.username} -is:retweet"
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import random
 import time
@@ -5,20 +6,27 @@ import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from src.connection_manager import ConnectionManager
+from src.connection_manager import ConnectionManager, ConnectionPool
 from src.helpers import print_h_bar
 from src.action_handler import execute_action
+from src.agent_runtime import AgentRuntime
+from src.state_store import AgentState
+from src.llm_router import LLMRouter
+from src.prompts import POST_TWEET_PROMPT
+from src.tweet_buffer import BufferedTweet, TweetBuffer
+from src.conversation_memory import ConversationMemory, SUMMARY_SYSTEM_PROMPT, format_summary_request
 import src.actions.twitter_actions  
 import src.actions.echochamber_actions
 import src.actions.solana_actions
 from datetime import datetime
+from typing import Iterator
 
 REQUIRED_FIELDS = ["name", "bio", "traits", "examples", "loop_delay", "config", "tasks"]
 
 logger = logging.getLogger("agent")
 
 class ZerePyAgent:
-    def __init__(self, agent_name: str):
+    def __init__(self, agent_name: str, connection_pool: ConnectionPool = None):
         try:
             agent_path = Path("agents") / f"{agent_name}.json"
             agent_dict = json.load(open(agent_path, "r"))
@@ -33,7 +41,7 @@ class ZerePyAgent:
             self.examples = agent_dict["examples"]
             self.example_accounts = agent_dict.get("example_accounts", [])
             self.loop_delay = agent_dict["loop_delay"]
-            self.connection_manager = ConnectionManager(agent_dict["config"])
+            self.connection_manager = ConnectionManager(agent_dict["config"], connection_pool=connection_pool)
             self.use_time_based_weights = agent_dict["use_time_based_weights"]
             self.time_based_multipliers = agent_dict["time_based_multipliers"]
 
@@ -49,11 +57,25 @@ class ZerePyAgent:
                 self.own_tweet_replies_count = twitter_config.get("own_tweet_replies_count", 2)
 
             self.is_llm_set = False
+            self.model_provider = None
+            self.llm_router = None
+            # Optional failover/hedging settings: providers, hedge, hedge_delay, failure_threshold, reset_timeout
+            self.llm_routing_config = agent_dict.get("llm_routing", {})
             self._system_prompt = None
             self.tasks = agent_dict.get("tasks", [])
             self.task_weights = [task.get("weight", 0) for task in self.tasks]
             self.logger = logging.getLogger("agent")
-            self.state = {}
+            # Persistent, bounded state; configured by the optional "state" block of the agent JSON
+            self.state = AgentState.from_config(agent_name, agent_dict.get("state", {}))
+            # Optional asyncio runtime settings: max_workers, connection_limits, default_connection_limit
+            self.runtime_config = agent_dict.get("runtime", {})
+            # Optional "tweet_buffer" block: keep tweets pre-generated in the background for post-tweet
+            self.tweet_buffer_config = agent_dict.get("tweet_buffer")
+            self._tweet_buffer = None
+            # Per-conversation chat history; optional "conversation_memory" block sets the token budgets
+            self.conversation_memory = ConversationMemory.from_config(
+                agent_dict.get("conversation_memory", {}), summarizer=self._summarize_conversation
+            )
         except Exception as e:
             logger.error("Could not load ZerePy agent")
             raise e
@@ -119,21 +141,82 @@ class ZerePyAgent:
     def loop(self):
         """Main agent loop for autonomous behavior."""
         logger.info("\n🚀 Starting agent loop...")
-        while True:
-            try:
-                action = self.select_action(use_time_based_weights=self.use_time_based_weights)
-                success = execute_action(self, action["name"])
-                time.sleep(self.loop_delay if success else 60)
-            except Exception as e:
-                logger.error(f"\n❌ Error in agent loop: {e}")
-                time.sleep(60)
-
-    def prompt_llm(self, prompt: str, system_prompt: str = None) -> str:
-        """Generate text using the configured LLM provider with layered response logic."""
+        try:
+            while True:
+                try:
+                    action = self.select_action(use_time_based_weights=self.use_time_based_weights)
+                    success = execute_action(self, action["name"])
+                    self.state.maybe_snapshot()
+                    time.sleep(self.loop_delay if success else 60)
+                except Exception as e:
+                    logger.error(f"\n❌ Error in agent loop: {e}")
+                    time.sleep(60)
+        finally:
+            self.state.snapshot()
+
+    def loop_async(self):
+        """Agent loop on the asyncio runtime, running actions concurrently per connection."""
+        runtime = AgentRuntime(self, **self.runtime_config)
+        try:
+            asyncio.run(runtime.run())
+        finally:
+            runtime.shutdown(wait=False)
+
+    def _setup_llm_provider(self):
+        """Build the LLM router over the configured model providers, in config order."""
+        routing_config = dict(self.llm_routing_config)
+        providers = routing_config.pop("providers", None)
+        self.llm_router = LLMRouter.from_connection_manager(
+            self.connection_manager, providers=providers, **routing_config
+        )
+        self.model_provider = self.llm_router.order[0]
+        self.is_llm_set = True
+        logger.info(f"\n🤖 LLM providers: {', '.join(self.llm_router.order)}")
+
+    def prompt_llm(self, prompt: str, system_prompt: str = None, conversation_id: str = None) -> str:
+        """
+        Generate text using the configured LLM providers with layered response logic.
+        With a conversation_id, earlier turns of that conversation are sent along and
+        the new exchange is remembered.
+        """
+        if not self.is_llm_set:
+            self._setup_llm_provider()
         system_prompt = system_prompt or self._construct_system_prompt()
-        raw_response = self.connection_manager.perform_action(
+        if conversation_id is None:
+            raw_response = self.llm_router.generate(prompt, system_prompt)
+        else:
+            full_prompt = self.conversation_memory.build_prompt(conversation_id, prompt)
+            raw_response = self.llm_router.generate(full_prompt, system_prompt)
+            self.conversation_memory.record(conversation_id, prompt, raw_response)
+        return f"💬 {raw_response}"  # Adding stylistic flair 
+
+    def get_tweet_buffer(self):
+        """The agent's pre-generated tweet buffer, started on first use; None unless configured."""
+        if self.tweet_buffer_config is None:
+            return None
+        if self._tweet_buffer is None:
+            self._tweet_buffer = TweetBuffer.from_config(self.name, self.tweet_buffer_config, self._produce_tweet)
+            self._tweet_buffer.start()
+        return self._tweet_buffer
+
+    def _produce_tweet(self):
+        tweet_text = self.prompt_llm(POST_TWEET_PROMPT.format(agent_name=self.name))
+        return BufferedTweet(text=tweet_text) if tweet_text else None
+
+    def _summarize_conversation(self, previous_summary: str, evicted: list) -> str:
+        """Fold turns that fell out of the history budget into the conversation summary."""
+        if not self.is_llm_set:
+            self._setup_llm_provider()
+        return self.llm_router.generate(format_summary_request(previous_summary, evicted), SUMMARY_SYSTEM_PROMPT)
+
+    def stream_llm(self, prompt: str, system_prompt: str = None) -> Iterator[str]:
+        """Stream text from the primary LLM provider chunk by chunk."""
+        if not self.is_llm_set:
+            self._setup_llm_provider()
+        system_prompt = system_prompt or self._construct_system_prompt()
+        chunks = self.connection_manager.perform_action(
             connection_name=self.model_provider,
-            action_name="generate-text",
+            action_name="stream-text",
             params=[prompt, system_prompt]
         )
-        return f"💬 {raw_response}"  # Adding stylistic flair 
+        return chunks if chunks is not None else iter(())
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.agent import ZerePyAgent
+from src.agent_runtime import AgentRuntime
+from src.connection_manager import ConnectionPool
+
+logger = logging.getLogger("agent_host")
+
+DEFAULT_HOST_MAX_WORKERS = 32
+# Agent files in the agents directory that aren't agent definitions
+NON_AGENT_FILES = ("general",)
+
+
+class AgentHost:
+    """
+    Runs many agents in one process on a single event loop.
+
+    All agents share one ConnectionPool (identical connection configs become a single,
+    reference-counted connection), one thread pool and one set of per-connection caps.
+    """
+
+    def __init__(self, agent_names: List[str], max_workers: int = DEFAULT_HOST_MAX_WORKERS):
+        self.connection_pool = ConnectionPool()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-host")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.agents: List[ZerePyAgent] = []
+        self.runtimes: List[AgentRuntime] = []
+        self._closed = False
+
+        for agent_name in agent_names:
+            try:
+                agent = ZerePyAgent(agent_name, connection_pool=self.connection_pool)
+            except Exception as e:
+                logger.error(f"Skipping agent {agent_name}: {e}")
+                continue
+            self.agents.append(agent)
+            self.runtimes.append(
+                AgentRuntime(
+                    agent,
+                    executor=self._executor,
+                    semaphores=self._semaphores,
+                    **agent.runtime_config,
+                )
+            )
+
+        logger.info(
+            f"Loaded {len(self.agents)} agents sharing {len(self.connection_pool)} connections"
+        )
+
+    @classmethod
+    def from_directory(cls, agents_dir: str = "agents", **kwargs) -> "AgentHost":
+        """Build a host for every agent definition in a directory"""
+        agent_names = sorted(
+            path.stem for path in Path(agents_dir).glob("*.json")
+            if path.stem not in NON_AGENT_FILES
+        )
+        return cls(agent_names, **kwargs)
+
+    async def run(self) -> None:
+        """Run every agent's runtime concurrently until stopped"""
+        try:
+            await asyncio.gather(*(runtime.run() for runtime in self.runtimes))
+        finally:
+            self.close()
+
+    def start(self) -> None:
+        """Blocking entry point"""
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            logger.info("\n🛑 Agent host stopped by user.")
+
+    def stop(self) -> None:
+        for runtime in self.runtimes:
+            runtime.stop()
+
+    def close(self) -> None:
+        """Release pooled connections, agent state backends and the shared thread pool"""
+        if self._closed:
+            return
+        self._closed = True
+        for agent in self.agents:
+            agent.connection_manager.close()
+            agent.state.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from src.action_handler import action_registry, action_connections, execute_action
+from src.connections.rate_limit_manager import get_rate_limit_manager
+
+logger = logging.getLogger("agent_runtime")
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_CONNECTION_LIMIT = 2
+# Actions that don't declare a connection share this concurrency bucket
+UNBOUND_CONNECTION = "_unbound"
+
+
+class AgentRuntime:
+    """
+    Asyncio runtime that dispatches registered actions as coroutines.
+
+    Connections and actions are synchronous, so each dispatch runs on a bounded
+    thread pool. Concurrency is capped per connection (the one an action declared
+    via `register_action(..., connection=...)`), so e.g. a slow Solana confirmation
+    never holds up Twitter or Echochambers replies.
+
+    While a connection is rate limited its dispatches wait on the event loop
+    (not in a worker thread), so other connections keep being served.
+    """
+
+    def __init__(
+        self,
+        agent,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        connection_limits: Optional[Dict[str, int]] = None,
+        default_connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+        executor: Optional[ThreadPoolExecutor] = None,
+        semaphores: Optional[Dict[str, asyncio.Semaphore]] = None,
+    ):
+        self.agent = agent
+        self.max_workers = max_workers
+        self.connection_limits = connection_limits or {}
+        self.default_connection_limit = default_connection_limit
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="agent-runtime"
+        )
+        # Passing a shared dict makes runtimes on one host share per-connection caps
+        self._semaphores: Dict[str, asyncio.Semaphore] = semaphores if semaphores is not None else {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._stop_event: Optional[asyncio.Event] = None
+
+    def _semaphore_for(self, connection_name: str) -> asyncio.Semaphore:
+        if connection_name not in self._semaphores:
+            limit = self.connection_limits.get(connection_name, self.default_connection_limit)
+            self._semaphores[connection_name] = asyncio.Semaphore(max(1, limit))
+        return self._semaphores[connection_name]
+
+    async def _run_in_executor(self, connection_name: str, func, *args, **kwargs) -> Any:
+        """
+        Run a blocking call on the thread pool while holding the connection's slot.
+
+        The slot is released only once the worker thread actually finishes, so a
+        cancelled coroutine can't let more threads pile onto a connection than its cap.
+        """
+        # Wait out any rate limit block before taking a slot; the loop stays free meanwhile
+        await get_rate_limit_manager().acquire(connection_name, tokens=0)
+        semaphore = self._semaphore_for(connection_name)
+        await semaphore.acquire()
+        loop = asyncio.get_running_loop()
+
+        def _release(_):
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                # Event loop already closed; nothing left to wake up
+                pass
+
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except Exception:
+            semaphore.release()
+            raise
+        future.add_done_callback(_release)
+        return await asyncio.wrap_future(future)
+
+    async def dispatch(self, action_name: str, **kwargs) -> Any:
+        """Run a registered action as a coroutine and return its result"""
+        if action_name not in action_registry:
+            logger.error(f"Action {action_name} not found")
+            return None
+
+        connection_name = action_connections.get(action_name, UNBOUND_CONNECTION)
+        return await self._run_in_executor(
+            connection_name, execute_action, self.agent, action_name, **kwargs
+        )
+
+    async def perform_action(self, connection_name: str, action_name: str, params: List[Any]) -> Any:
+        """Awaitable counterpart of ConnectionManager.perform_action, subject to the same caps"""
+        return await self._run_in_executor(
+            connection_name,
+            self.agent.connection_manager.perform_action,
+            connection_name=connection_name,
+            action_name=action_name,
+            params=params,
+        )
+
+    def submit(self, action_name: str, **kwargs) -> asyncio.Task:
+        """Schedule an action without waiting for it; the returned task can be cancelled"""
+        task = asyncio.create_task(self.dispatch(action_name, **kwargs), name=action_name)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            logger.info(f"Action {task.get_name()} cancelled")
+            return
+        error = task.exception()
+        if error:
+            logger.error(f"\n❌ Action {task.get_name()} failed: {error}")
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def run(self) -> None:
+        """
+        Autonomous loop: select an action every `loop_delay` seconds and run it
+        concurrently with whatever is still in flight.
+        """
+        logger.info("\n🚀 Starting async agent runtime...")
+        self._stop_event = asyncio.Event()
+        try:
+            while not self._stop_event.is_set():
+                if self.in_flight >= self.max_workers:
+                    # Every worker is busy; wait for a slot instead of queueing unboundedly
+                    await asyncio.wait(set(self._tasks), return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                try:
+                    action = self.agent.select_action(
+                        use_time_based_weights=self.agent.use_time_based_weights
+                    )
+                    self.submit(action["name"])
+                except Exception as e:
+                    logger.error(f"\n❌ Error in agent runtime: {e}")
+
+                maybe_snapshot = getattr(self.agent.state, "maybe_snapshot", None)
+                if maybe_snapshot:
+                    await asyncio.get_running_loop().run_in_executor(self._executor, maybe_snapshot)
+
+                # Jitter keeps several agents on one host from firing in lockstep
+                delay = self.agent.loop_delay * random.uniform(0.9, 1.1)
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.cancel_all()
+            snapshot = getattr(self.agent.state, "snapshot", None)
+            if snapshot:
+                snapshot()
+
+    def stop(self) -> None:
+        """Ask run() to exit; in-flight actions are cancelled on the way out"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    async def cancel_all(self) -> None:
+        """Cancel every in-flight action and wait for the cancellations to settle"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Release the thread pool (only if this runtime created it)"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -2,6 +2,7 @@ import os
 import logging
 from src.connections.openai_connection import OpenAIConnection
 from src.connections.anthropic_connection import AnthropicConnection
+from src.llm_router import LLMRouter, LLMRouterError
 
 logger = logging.getLogger("ai_engine")
 
@@ -10,17 +11,25 @@ class AIEngine:
         self.config = config
         self.openai = OpenAIConnection(config["openai"])
         self.anthropic = AnthropicConnection(config["anthropic"])
+        self.router = LLMRouter(
+            {
+                "anthropic": self.anthropic.generate_text,
+                "openai": self.openai.generate_text,
+            },
+            **config.get("routing", {})
+        )
 
     def generate_response(self, prompt, system_prompt, context_type="default"):
-        """Dynamically chooses the best AI model based on context."""
+        """Dynamically chooses the best AI model based on context, failing over to the other."""
+        if self._should_use_claude(context_type):
+            logger.info("⚡ Using Claude for response generation")
+            order = ["anthropic", "openai"]
+        else:
+            logger.info("⚡ Using OpenAI for response generation")
+            order = ["openai", "anthropic"]
         try:
-            if self._should_use_claude(context_type):
-                logger.info("⚡ Using Claude for response generation")
-                return self.anthropic.generate_text(prompt, system_prompt)
-            else:
-                logger.info("⚡ Using OpenAI for response generation")
-                return self.openai.generate_text(prompt, system_prompt)
-        except Exception as e:
+            return self.router.generate(prompt, system_prompt, order=order)
+        except LLMRouterError as e:
             logger.error(f"❌ AI Engine Error: {e}")
             return "Error generating response."
 
@@ -16,22 +16,15 @@ print("🌐 ENTRYPOINT REACHED: Starting automate_tweets.py")
 
 from src.glyph_engine.hybrid_composer import compose_hybrid_output
 from src.visual_generator import VisualGenerator
-import requests
 import random
-import time
 import datetime
+from io import BytesIO
 from flask import Flask, jsonify
 from apscheduler.schedulers.background import BackgroundScheduler
-from src.connections.twitter_connection import send_tweet, check_rate_limits, verify_credentials
+from src.claude_client import ClaudeAPIError, cached_system, get_claude_client
+from src.connections.twitter_connection import send_tweet, last_send_status_code, check_rate_limits, verify_credentials, init_twitter_connection
 from src.twitter_mentions_polling import setup_mentions_polling
-
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-
-HEADERS = {
-    "x-api-key": ANTHROPIC_API_KEY,
-    "Content-Type": "application/json",
-    "anthropic-version": "2023-06-01"
-}
+from src.tweet_buffer import BufferedTweet, TweetBuffer
 
 CAC_PHILOSOPHY = {
     "CTRL": [
@@ -113,12 +106,8 @@ last_tweet = {
     "error": None
 }
 
-def generate_tweet():
-    reference_cac = random.random() < 0.15
-    prompt = random.choice(CAC_TWEET_TOPICS if reference_cac else TWEET_TOPICS)
-    logger.info(f"Generating tweet with prompt: '{prompt}'")
-
-    system_message = """You are Readymade.AI, an autonomous AI art entity inspired by Marcel Duchamp's readymades.
+# Static persona for generated tweets, identical on every call so it can be prompt-cached
+TWEET_SYSTEM_PROMPT = """You are Readymade.AI, an autonomous AI art entity inspired by Marcel Duchamp's readymades.
 Your tweets are philosophical, provocative, and slightly absurd. You challenge conventional thinking 
 through digital dadaism. 
 
@@ -136,91 +125,118 @@ textual and conceptual, not emoji-based. When you do use an emoji, it should be
 
 Keep responses under 200 characters. Never use quotation marks."""
 
+def build_tweet_request():
+    """Build a Messages API payload for one tweet, with a CTRL+ALT+CREATE note 15% of the time"""
+    reference_cac = random.random() < 0.15
+    prompt = random.choice(CAC_TWEET_TOPICS if reference_cac else TWEET_TOPICS)
+    logger.info(f"Generating tweet with prompt: '{prompt}'")
+
+    # The persona is a cached prefix; the CTRL+ALT+CREATE note varies per tweet and follows it
+    cac_note = ""
+
     if reference_cac:
         cac_aspect = random.choice(["CTRL", "ALT", "CREATE"])
         cac_principle = random.choice(CAC_PHILOSOPHY[cac_aspect])
         cac_theme = random.choice(CAC_THEMES)
         use_hashtag = random.random() < 0.25
-        system_message += f"""
-You are part of CTRL+ALT+CREATE, a movement that operates as a regenerative creative ecosystem.
+        cac_note = f"""You are part of CTRL+ALT+CREATE, a movement that operates as a regenerative creative ecosystem.
 The movement embodies the philosophy of {cac_principle} and embraces {cac_theme}.
 Subtly incorporate this ethos without explicitly promoting or selling anything.
 Your goal is to embody the movement's ideas, not to market it.
 {'Occasionally you may use #BuildDifferent as a subtle tag, but use it very sparingly.' if use_hashtag else 'Avoid using explicit hashtags in this tweet.'}"""
 
-    data = {
+    return {
         "model": "claude-3-5-sonnet-20241022",
-        "system": system_message,
+        "system": cached_system(TWEET_SYSTEM_PROMPT, cac_note),
         "messages": [{"role": "user", "content": prompt}],
         "max_tokens": 50,
         "temperature": 0.9
     }
 
+def parse_tweet_text(result):
+    content = (result or {}).get("content", [])
+    if content and len(content) > 0:
+        tweet_text = content[0].get("text", "").strip().strip('"').replace('"', '')
+        logger.info(f"Generated tweet text: '{tweet_text}'")
+        return tweet_text
+    logger.error(f"No content in Claude API response: {result}")
+    return None
+
+def generate_tweet():
     try:
-        response = requests.post("https://api.anthropic.com/v1/messages", headers=HEADERS, json=data)
-        if response.status_code == 200:
-            content = response.json().get("content", [])
-            if content and len(content) > 0:
-                tweet_text = content[0].get("text", "").strip().strip('"').replace('"', '')
-                logger.info(f"Generated tweet text: '{tweet_text}'")
-                return tweet_text
-            else:
-                logger.error(f"No content in Claude API response: {response.json()}")
-        else:
-            logger.error(f"Claude API Error: Status {response.status_code}, Response: {response.text}")
+        return parse_tweet_text(get_claude_client().create_message(**build_tweet_request()))
+    except ClaudeAPIError as e:
+        logger.error(f"Claude API Error: Status {e.status_code}, Response: {e.body}")
     except Exception as e:
         logger.exception(f"Exception in generate_tweet: {e}")
     return None
 
-def post_tweet():
-    max_attempts = 3
-    current_attempt = 0
-
-    while current_attempt < max_attempts:
-        current_attempt += 1
-        logger.info(f"Tweet attempt {current_attempt}/{max_attempts}")
+def produce_glyph_tweet():
+    """Render a Glyph.EXE visual; falls back to a text tweet if composition fails"""
+    logger.info("🔮 Generating tweet in Glyph.EXE visual mode")
+    try:
+        tweet_content, image_bytes = compose_hybrid_output()
+        return BufferedTweet(text=tweet_content, media=image_bytes.getvalue(), kind="glyph")
+    except Exception as e:
+        logger.error(f"Glyph.EXE generation failed: {e}")
+        return produce_text_tweet()
+
+def produce_text_tweet():
+    tweet_content = generate_tweet()
+    return BufferedTweet(text=tweet_content) if tweet_content else None
+
+def produce_tweet():
+    return produce_glyph_tweet() if random.random() < 0.3 else produce_text_tweet()
+
+def produce_tweet_batch(count):
+    """Generate the text tweets of a refill in one Message Batches request; glyph tweets render locally"""
+    glyph_count = sum(1 for _ in range(count) if random.random() < 0.3)
+    tweets = [produce_glyph_tweet() for _ in range(glyph_count)]
+    results = get_claude_client().run_message_batch([build_tweet_request() for _ in range(count - glyph_count)])
+    for result in results:
+        tweet_content = parse_tweet_text(result) if result else None
+        if tweet_content:
+            tweets.append(BufferedTweet(text=tweet_content))
+    return tweets
+
+# Pre-generated tweets, refilled in the background so posting never waits on Claude or rendering
+tweet_buffer = TweetBuffer.from_env("glyph_tweets", produce_tweet, produce_batch=produce_tweet_batch)
 
-        if not check_rate_limits():
-            wait_time = min(60 * current_attempt, 300)
-            logger.warning(f"Rate limit issue detected. Waiting {wait_time} seconds before retry")
-            time.sleep(wait_time)
-            continue
+def post_tweet():
+    if not check_rate_limits():
+        logger.warning("Rate limit issue detected. Skipping this slot")
+        return
+
+    tweet = tweet_buffer.pop()
+    if tweet is None:
+        # Buffer ran dry (provider outage or cold start): try once inline
+        logger.warning("Tweet buffer is empty, generating inline")
+        tweet = produce_tweet()
+        if tweet is None:
+            last_tweet["error"] = "Tweet buffer empty and inline generation failed"
+            logger.error("No tweet available. Skipping this slot")
+            return
 
-        use_glyph = random.random() < 0.3
+    status_code = None
+    try:
+        tweet_id = send_tweet(tweet.text, media_bytes=BytesIO(tweet.media) if tweet.media else None)
+        status_code = last_send_status_code()
+    except Exception as e:
+        logger.exception(f"Error posting tweet: {e}")
         tweet_id = None
 
-        if use_glyph:
-            logger.info("🔮 Generating tweet in Glyph.EXE visual mode")
-            try:
-                tweet_content, image_path = compose_hybrid_output()
-                with open(image_path, "rb") as f:
-                    from io import BytesIO
-                    media_bytes = BytesIO(f.read())
-                tweet_id = send_tweet(tweet_content, media_bytes=media_bytes)
-            except Exception as e:
-                logger.error(f"Glyph.EXE generation failed: {e}")
-                tweet_content = generate_tweet()
-                tweet_id = send_tweet(tweet_content)
-        else:
-            tweet_content = generate_tweet()
-            tweet_id = send_tweet(tweet_content)
-
-        if tweet_id:
-            last_tweet["content"] = tweet_content
-            last_tweet["id"] = tweet_id
-            last_tweet["timestamp"] = datetime.datetime.now().isoformat()
-            last_tweet["error"] = None
-            logger.info(f"✅ Tweet posted: {tweet_content}")
-            return
-        else:
-            if current_attempt < max_attempts:
-                logger.warning("Tweet API call returned no tweet ID. Retrying...")
-                time.sleep(15)
-                continue
-            else:
-                last_tweet["error"] = "Tweet API call failed after multiple attempts"
-                logger.error("Failed to post tweet: API call returned no tweet ID")
-                return
+    if tweet_id:
+        last_tweet["content"] = tweet.text
+        last_tweet["id"] = tweet_id
+        last_tweet["timestamp"] = datetime.datetime.now().isoformat()
+        last_tweet["error"] = None
+        logger.info(f"✅ Tweet posted: {tweet.text}")
+    else:
+        # Keep the tweet for the next slot if the failure was transient, rather than
+        # spending another generation on it; a rejected tweet is dropped
+        tweet_buffer.requeue(tweet, status_code)
+        last_tweet["error"] = f"Tweet API call returned no tweet ID (status {status_code})"
+        logger.error(f"Failed to post tweet: API call returned no tweet ID (status {status_code})")
 
 app = Flask(__name__)
 
@@ -243,6 +259,7 @@ def status():
         "status": "running",
         "scheduler": scheduler_info,
         "last_tweet": last_tweet,
+        "tweet_buffer": tweet_buffer.stats(),
         "twitter_credentials": verify_credentials()
     })
 
@@ -268,10 +285,12 @@ def first_tweet():
 
 if __name__ == "__main__":
     logger.info("⏱️ Starting Readymade.AI service initialization...")
+    init_twitter_connection()
     print("🌐 ENTRYPOINT REACHED: Flask is initializing...")
     scheduler = BackgroundScheduler()
     scheduler.add_job(post_tweet, 'interval', minutes=15, name='post_tweet')
     setup_mentions_polling(app, scheduler)
+    tweet_buffer.start()
     scheduler.start()
     app.scheduler = scheduler
     logger.info("🚀 Automated tweet scheduler started. Tweets will be posted every 15 minutes.")
@@ -0,0 +1,384 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger("claude_client")
+
+ANTHROPIC_MESSAGES_URL = "https://api.anthropic.com/v1/messages"
+ANTHROPIC_BATCHES_URL = "https://api.anthropic.com/v1/messages/batches"
+ANTHROPIC_VERSION = "2023-06-01"
+
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0  # seconds an idle connection is kept open
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5  # seconds, doubled on every retry
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_BATCH_POLL_INTERVAL = 30.0  # seconds between message batch status checks
+DEFAULT_BATCH_TIMEOUT = 3600.0
+# Rate limits, overload and transient server errors are worth another attempt
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+# Log the prompt cache hit rate every this many recorded calls
+CACHE_STATS_LOG_EVERY = 50
+
+
+class ClaudeAPIError(Exception):
+    """Raised when the Messages API returns a non-200 response after retries"""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"{status_code} - {body}")
+        self.status_code = status_code
+        self.body = body
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def cached_system(static_prompt: str, *dynamic_parts: str) -> List[Dict[str, Any]]:
+    """
+    System prompt as content blocks with the static persona marked cacheable.
+
+    Anything that varies per call (topics, summaries, campaign notes) goes in
+    `dynamic_parts`, after the cache breakpoint, so the persona prefix is reused.
+    Prompts below the model's minimum cacheable length are simply not cached.
+    """
+    blocks = [{"type": "text", "text": static_prompt, "cache_control": {"type": "ephemeral"}}]
+    dynamic = "\n\n".join(part.strip() for part in dynamic_parts if part and part.strip())
+    if dynamic:
+        blocks.append({"type": "text", "text": dynamic})
+    return blocks
+
+
+class PromptCacheStats:
+    """Running totals of prompt cache reads and writes across Messages API calls"""
+
+    def __init__(self, log_every: int = CACHE_STATS_LOG_EVERY):
+        self.log_every = log_every
+        self._lock = threading.Lock()
+        self._totals = {
+            "calls": 0,
+            "hits": 0,  # calls that read the prompt prefix from cache
+            "input_tokens": 0,  # uncached input tokens
+            "cache_read_input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+        }
+
+    def record(self, usage: Any) -> None:
+        """Add a response's usage, given as the API's dict or the SDK's Usage object"""
+        if not usage:
+            return
+
+        def field(name: str) -> int:
+            value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+            return value or 0
+
+        cache_read = field("cache_read_input_tokens")
+        with self._lock:
+            totals = self._totals
+            totals["calls"] += 1
+            totals["hits"] += 1 if cache_read else 0
+            totals["input_tokens"] += field("input_tokens")
+            totals["cache_read_input_tokens"] += cache_read
+            totals["cache_creation_input_tokens"] += field("cache_creation_input_tokens")
+            should_log = self.log_every and totals["calls"] % self.log_every == 0
+        if should_log:
+            stats = self.snapshot()
+            logger.info(
+                f"Prompt cache: {stats['hit_rate']:.0%} of calls hit, "
+                f"{stats['token_hit_rate']:.0%} of input tokens read from cache"
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._totals)
+        prompt_tokens = stats["input_tokens"] + stats["cache_read_input_tokens"] + stats["cache_creation_input_tokens"]
+        stats["hit_rate"] = stats["hits"] / stats["calls"] if stats["calls"] else 0.0
+        stats["token_hit_rate"] = stats["cache_read_input_tokens"] / prompt_tokens if prompt_tokens else 0.0
+        return stats
+
+
+_prompt_cache_stats = PromptCacheStats()
+
+
+def get_prompt_cache_stats() -> PromptCacheStats:
+    """Process-wide prompt cache counters, fed by ClaudeClient and AnthropicConnection"""
+    return _prompt_cache_stats
+
+
+def extract_text(result: Dict[str, Any]) -> str:
+    """Join the text blocks of a Messages API response"""
+    blocks = result.get("content") or []
+    return "\n".join(block.get("text", "") for block in blocks if block.get("type") == "text").strip()
+
+
+class ClaudeClient:
+    """
+    Keep-alive client for the Anthropic Messages API.
+
+    One sync httpx.Client is shared by every thread, and one httpx.AsyncClient is
+    kept per event loop (an async client can't be used across loops), so repeated
+    calls reuse pooled TLS connections instead of paying a handshake each time.
+    HTTP/2 is used when the `h2` package is installed.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    ):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = _http2_available()
+        self._sync_client: Optional[httpx.Client] = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _headers(self) -> Dict[str, str]:
+        # Read the key lazily so entry points that load .env after import still work
+        return {
+            "x-api-key": self.api_key or os.getenv("ANTHROPIC_API_KEY", ""),
+            "Content-Type": "application/json",
+            "anthropic-version": ANTHROPIC_VERSION,
+        }
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        return {"timeout": self.timeout, "limits": self.limits, "http2": self.http2}
+
+    def get_sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._sync_client is None or self._sync_client.is_closed:
+                self._sync_client = httpx.Client(**self._client_kwargs())
+            return self._sync_client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        """Return the pooled async client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(**self._client_kwargs())
+                self._async_clients[loop] = client
+            return client
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), DEFAULT_BACKOFF_MAX)
+                except ValueError:
+                    pass
+        delay = min(DEFAULT_BACKOFF_BASE * (2 ** attempt), DEFAULT_BACKOFF_MAX)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _should_retry(self, attempt: int, status_code: Optional[int] = None) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        return status_code is None or status_code in RETRY_STATUS_CODES
+
+    def _request(self, method: str, url: str, payload: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """Send a request on the sync client, retrying transient failures; returns the 200 response"""
+        client = self.get_sync_client()
+        attempt = 0
+        while True:
+            try:
+                response = client.request(method, url, headers=self._headers(), json=payload)
+            except httpx.TransportError as e:
+                if not self._should_retry(attempt):
+                    raise
+                logger.warning(f"Claude request failed ({e}), retrying")
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code == 200:
+                return response
+            if not self._should_retry(attempt, response.status_code):
+                raise ClaudeAPIError(response.status_code, response.text)
+            logger.warning(f"Claude API returned {response.status_code}, retrying")
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def create_message(self, **payload) -> Dict[str, Any]:
+        """
+        POST /v1/messages and return the decoded response.
+
+        Raises:
+            ClaudeAPIError: on a non-200 response once retries are exhausted
+            httpx.HTTPError: on transport failures once retries are exhausted
+        """
+        result = self._request("POST", ANTHROPIC_MESSAGES_URL, payload).json()
+        get_prompt_cache_stats().record(result.get("usage"))
+        return result
+
+    def create_message_batch(self, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Submit Messages API payloads as one asynchronous batch; custom ids are their indexes"""
+        requests = [{"custom_id": str(index), "params": payload} for index, payload in enumerate(payloads)]
+        return self._request("POST", ANTHROPIC_BATCHES_URL, {"requests": requests}).json()
+
+    def get_message_batch(self, batch_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"{ANTHROPIC_BATCHES_URL}/{batch_id}").json()
+
+    def run_message_batch(
+        self,
+        payloads: List[Dict[str, Any]],
+        poll_interval: float = DEFAULT_BATCH_POLL_INTERVAL,
+        timeout: float = DEFAULT_BATCH_TIMEOUT,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Run payloads through the Message Batches API and wait for them.
+
+        Batches are billed at a discount but may take minutes to finish, so this
+        is meant for background work. Returns one message per payload, in order,
+        with None for requests that errored or expired.
+
+        Raises:
+            TimeoutError: if the batch hasn't ended within `timeout` seconds
+        """
+        batch = self.create_message_batch(payloads)
+        deadline = time.monotonic() + timeout
+        while batch.get("processing_status") != "ended":
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Message batch {batch['id']} still running after {timeout:.0f}s")
+            time.sleep(poll_interval)
+            batch = self.get_message_batch(batch["id"])
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(payloads)
+        response = self._request("GET", batch["results_url"])
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            result = entry.get("result", {})
+            if result.get("type") == "succeeded":
+                message = result.get("message", {})
+                get_prompt_cache_stats().record(message.get("usage"))
+                results[int(entry["custom_id"])] = message
+            else:
+                logger.warning(f"Batch request {entry.get('custom_id')} {result.get('type')}: {result.get('error')}")
+        return results
+
+    async def acreate_message(self, **payload) -> Dict[str, Any]:
+        """Async create_message over the event loop's pooled client"""
+        client = self.get_async_client()
+        attempt = 0
+        while True:
+            try:
+                response = await client.post(ANTHROPIC_MESSAGES_URL, headers=self._headers(), json=payload)
+            except httpx.TransportError as e:
+                if not self._should_retry(attempt):
+                    raise
+                logger.warning(f"Claude request failed ({e}), retrying")
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code == 200:
+                result = response.json()
+                get_prompt_cache_stats().record(result.get("usage"))
+                return result
+            if not self._should_retry(attempt, response.status_code):
+                raise ClaudeAPIError(response.status_code, response.text)
+            logger.warning(f"Claude API returned {response.status_code}, retrying")
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def astream_text(self, **payload) -> AsyncIterator[str]:
+        """
+        Yield text deltas from a streamed Messages API call.
+
+        Retries only happen before the first event arrives; a failure mid-stream
+        is raised to the caller.
+        """
+        client = self.get_async_client()
+        payload = {**payload, "stream": True}
+        attempt = 0
+        started = False
+        while True:
+            try:
+                async with client.stream(
+                    "POST", ANTHROPIC_MESSAGES_URL, headers=self._headers(), json=payload
+                ) as response:
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode(errors="replace")
+                        if not self._should_retry(attempt, response.status_code):
+                            raise ClaudeAPIError(response.status_code, body)
+                        logger.warning(f"Claude API returned {response.status_code}, retrying")
+                        delay = self._backoff(attempt, response)
+                    else:
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            event = json.loads(line[5:].strip() or "{}")
+                            if event.get("type") == "message_start":
+                                get_prompt_cache_stats().record(event.get("message", {}).get("usage"))
+                            elif event.get("type") == "content_block_delta":
+                                text = event.get("delta", {}).get("text")
+                                if text:
+                                    started = True
+                                    yield text
+                            elif event.get("type") == "error":
+                                error = event.get("error", {})
+                                raise ClaudeAPIError(529, error.get("message", str(error)))
+                        return
+            except httpx.TransportError as e:
+                if started or not self._should_retry(attempt):
+                    raise
+                logger.warning(f"Claude stream failed to start ({e}), retrying")
+                delay = self._backoff(attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        """Close the sync client; async clients are closed with aclose() on their own loop"""
+        with self._lock:
+            if self._sync_client is not None:
+                self._sync_client.close()
+                self._sync_client = None
+
+    async def aclose(self) -> None:
+        """Close the running loop's async client"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+
+_shared_client: Optional[ClaudeClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_claude_client() -> ClaudeClient:
+    """Process-wide ClaudeClient shared by the bots, schedulers and mention handlers"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = ClaudeClient()
+        return _shared_client
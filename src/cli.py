@@ -91,7 +91,8 @@ class ZerePyCLI:
             Command(
                 name="agent-loop",
                 description="Starts the current agent's autonomous behavior loop.",
-                tips=["Press Ctrl+C to stop the loop"],
+                tips=["Press Ctrl+C to stop the loop",
+                      "Use 'agent-loop async' to run actions concurrently on the asyncio runtime"],
                 handler=self.agent_loop,
                 aliases=['loop', 'start']
             )
@@ -414,7 +415,10 @@ class ZerePyCLI:
             return
 
         try:
-            self.agent.loop()
+            if len(input_list) > 1 and input_list[1] == "async":
+                self.agent.loop_async()
+            else:
+                self.agent.loop()
         except KeyboardInterrupt:
             logger.info("\n🛑 Agent loop stopped by user.")
         except Exception as e:
@@ -532,7 +536,7 @@ class ZerePyCLI:
                 if user_input.lower() == 'exit':
                     break
                 
-                response = self.agent.prompt_llm(user_input)
+                response = self.agent.prompt_llm(user_input, conversation_id="cli")
                 logger.info(f"\n{self.agent.name}: {response}")
                 print_h_bar()
                 
@@ -1,82 +1,126 @@
+import importlib
+import json
 import logging
-from typing import Any, List, Optional, Type, Dict
+import time
+from threading import Lock
+from typing import Any, Callable, List, Optional, Type, Dict, Tuple
 from src.connections.base_connection import BaseConnection
-from src.connections.anthropic_connection import AnthropicConnection
-from src.connections.eternalai_connection import EternalAIConnection
-from src.connections.goat_connection import GoatConnection
-from src.connections.groq_connection import GroqConnection
-from src.connections.openai_connection import OpenAIConnection
-from src.connections.twitter_connection import TwitterConnection
-from src.connections.farcaster_connection import FarcasterConnection
-from src.connections.ollama_connection import OllamaConnection
-from src.connections.echochambers_connection import EchochambersConnection
-from src.connections.solana_connection import SolanaConnection
-from src.connections.hyperbolic_connection import HyperbolicConnection
-from src.connections.galadriel_connection import GaladrielConnection
-from src.connections.sonic_connection import SonicConnection
-from src.connections.discord_connection import DiscordConnection
-from src.connections.allora_connection import AlloraConnection
-from src.connections.xai_connection import XAIConnection
-from src.connections.ethereum_connection import EthereumConnection
-from src.connections.together_connection import TogetherAIConnection
-from src.connections.evm_connection import EVMConnection
-from src.connections.perplexity_connection import PerplexityConnection
-from src.connections.monad_connection import MonadConnection
 
 logger = logging.getLogger("connection_manager")
 
+# Connection name -> "module:ClassName". Modules are imported on first use so an agent
+# only pays for the SDKs (web3, solana, tweepy, ...) of the connections it configures.
+CONNECTION_REGISTRY: Dict[str, str] = {
+    "twitter": "src.connections.twitter_connection:TwitterConnection",
+    "anthropic": "src.connections.anthropic_connection:AnthropicConnection",
+    "openai": "src.connections.openai_connection:OpenAIConnection",
+    "farcaster": "src.connections.farcaster_connection:FarcasterConnection",
+    "groq": "src.connections.groq_connection:GroqConnection",
+    "eternalai": "src.connections.eternalai_connection:EternalAIConnection",
+    "ollama": "src.connections.ollama_connection:OllamaConnection",
+    "echochambers": "src.connections.echochambers_connection:EchochambersConnection",
+    "goat": "src.connections.goat_connection:GoatConnection",
+    "solana": "src.connections.solana_connection:SolanaConnection",
+    "hyperbolic": "src.connections.hyperbolic_connection:HyperbolicConnection",
+    "galadriel": "src.connections.galadriel_connection:GaladrielConnection",
+    "sonic": "src.connections.sonic_connection:SonicConnection",
+    "discord": "src.connections.discord_connection:DiscordConnection",
+    "allora": "src.connections.allora_connection:AlloraConnection",
+    "xai": "src.connections.xai_connection:XAIConnection",
+    "ethereum": "src.connections.ethereum_connection:EthereumConnection",
+    "together": "src.connections.together_connection:TogetherAIConnection",
+    "evm": "src.connections.evm_connection:EVMConnection",
+    "perplexity": "src.connections.perplexity_connection:PerplexityConnection",
+    "monad": "src.connections.monad_connection:MonadConnection",
+}
+
+# How long a successful or failed is_configured() probe is trusted, in seconds
+CONFIGURED_CACHE_TTL = 300
+
+# HTTP status codes that mean the stored credentials are no longer accepted
+AUTH_ERROR_STATUS_CODES = (401, 403)
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of connections shared between agents.
+
+    Connections whose config is identical (same provider and model, same RPC URL, ...)
+    are created once and reference-counted; the last release drops the instance and
+    calls its close() method if it has one.
+    """
+
+    def __init__(self):
+        self._connections: Dict[str, BaseConnection] = {}
+        self._refcounts: Dict[str, int] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def key_for(config_dic: Dict[str, Any]) -> str:
+        return json.dumps(config_dic, sort_keys=True, default=str)
+
+    def acquire(self, config_dic: Dict[str, Any], factory: Callable[[], BaseConnection]) -> BaseConnection:
+        """Return the shared connection for this config, creating it with `factory` on first use"""
+        key = self.key_for(config_dic)
+        with self._lock:
+            if key not in self._connections:
+                self._connections[key] = factory()
+                self._refcounts[key] = 0
+            self._refcounts[key] += 1
+            return self._connections[key]
+
+    def release(self, config_dic: Dict[str, Any]) -> None:
+        """Drop one reference to the connection for this config"""
+        key = self.key_for(config_dic)
+        with self._lock:
+            if key not in self._refcounts:
+                return
+            self._refcounts[key] -= 1
+            if self._refcounts[key] > 0:
+                return
+            del self._refcounts[key]
+            connection = self._connections.pop(key)
+
+        close = getattr(connection, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"Error closing pooled connection: {e}")
+
+    def refcount(self, config_dic: Dict[str, Any]) -> int:
+        return self._refcounts.get(self.key_for(config_dic), 0)
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
 
 class ConnectionManager:
-    def __init__(self, agent_config):
+    def __init__(
+        self,
+        agent_config,
+        configured_cache_ttl: float = CONFIGURED_CACHE_TTL,
+        connection_pool: Optional[ConnectionPool] = None,
+    ):
         self.connections: Dict[str, BaseConnection] = {}
+        # Configs acquired from the shared pool, so they can be released on close()
+        self._pooled_configs: List[Dict[str, Any]] = []
+        self._connection_pool = connection_pool
+        # connection name -> (is_configured result, monotonic time it was probed)
+        self._configured_cache: Dict[str, Tuple[bool, float]] = {}
+        self.configured_cache_ttl = configured_cache_ttl
         for config in agent_config:
             self._register_connection(config)
 
     @staticmethod
-    def _class_name_to_type(class_name: str) -> Type[BaseConnection]:
-        if class_name == "twitter":
-            return TwitterConnection
-        elif class_name == "anthropic":
-            return AnthropicConnection
-        elif class_name == "openai":
-            return OpenAIConnection
-        elif class_name == "farcaster":
-            return FarcasterConnection
-        elif class_name == "groq":
-            return GroqConnection
-        elif class_name == "eternalai":
-            return EternalAIConnection
-        elif class_name == "ollama":
-            return OllamaConnection
-        elif class_name == "echochambers":
-            return EchochambersConnection
-        elif class_name == "goat":
-            return GoatConnection
-        elif class_name == "solana":
-            return SolanaConnection
-        elif class_name == "hyperbolic":
-            return HyperbolicConnection
-        elif class_name == "galadriel":
-            return GaladrielConnection
-        elif class_name == "sonic":
-            return SonicConnection
-        elif class_name == "discord":
-            return DiscordConnection
-        elif class_name == "allora":
-            return AlloraConnection
-        elif class_name == "xai":
-            return XAIConnection
-        elif class_name == "ethereum":
-            return EthereumConnection
-        elif class_name == "together":
-            return TogetherAIConnection
-        elif class_name == "evm":
-            return EVMConnection
-        elif class_name == "perplexity":
-            return PerplexityConnection
-        elif class_name == "monad":
-            return MonadConnection
-        return None
+    def _class_name_to_type(class_name: str) -> Optional[Type[BaseConnection]]:
+        """Import and return the connection class registered under `class_name`"""
+        path = CONNECTION_REGISTRY.get(class_name)
+        if path is None:
+            return None
+        module_path, class_attr = path.split(":")
+        module = importlib.import_module(module_path)
+        return getattr(module, class_attr)
 
     def _register_connection(self, config_dic: Dict[str, Any]) -> None:
         """
@@ -90,15 +134,78 @@ class ConnectionManager:
         try:
             name = config_dic["name"]
             connection_class = self._class_name_to_type(name)
-            connection = connection_class(config_dic)
+            if connection_class is None:
+                raise ValueError(f"Unknown connection type: {name}")
+            if self._connection_pool is not None:
+                connection = self._connection_pool.acquire(
+                    config_dic, lambda: connection_class(config_dic)
+                )
+                self._pooled_configs.append(config_dic)
+            else:
+                connection = connection_class(config_dic)
             self.connections[name] = connection
         except Exception as e:
             logging.error(f"Failed to initialize connection {name}: {e}")
 
+    def close(self) -> None:
+        """Release pooled connections held by this manager"""
+        if self._connection_pool is not None:
+            for config_dic in self._pooled_configs:
+                self._connection_pool.release(config_dic)
+        self._pooled_configs = []
+        self.connections = {}
+        self.invalidate_configured()
+
+    def _is_configured(self, connection_name: str, verbose: bool = False, force: bool = False) -> bool:
+        """
+        Return whether a connection is configured, reusing a recent probe result if possible.
+
+        A cached result is trusted for `configured_cache_ttl` seconds as long as the
+        connection's cheap local credential check still passes. Otherwise the connection's
+        (potentially network-bound) is_configured() is called and the result cached.
+        """
+        connection = self.connections[connection_name]
+        cached = self._configured_cache.get(connection_name)
+        now = time.monotonic()
+
+        if not force and cached and now - cached[1] < self.configured_cache_ttl:
+            configured, _ = cached
+            if configured and not connection.has_local_credentials():
+                self.invalidate_configured(connection_name)
+                return False
+            return configured
+
+        configured = connection.is_configured(verbose=verbose)
+        self._configured_cache[connection_name] = (configured, now)
+        return configured
+
+    def invalidate_configured(self, connection_name: Optional[str] = None) -> None:
+        """Drop the cached configuration state for one connection, or for all if no name is given"""
+        if connection_name is None:
+            self._configured_cache.clear()
+        else:
+            self._configured_cache.pop(connection_name, None)
+
+    @staticmethod
+    def _is_auth_error(error: BaseException) -> bool:
+        """Walk an exception chain looking for an authentication/authorization failure"""
+        seen = set()
+        while error is not None and id(error) not in seen:
+            seen.add(id(error))
+            status_code = getattr(error, "status_code", None)
+            if status_code is None:
+                response = getattr(error, "response", None)
+                status_code = getattr(response, "status_code", None)
+            if status_code in AUTH_ERROR_STATUS_CODES:
+                return True
+            if type(error).__name__ in ("AuthenticationError", "PermissionDeniedError"):
+                return True
+            error = error.__cause__ or error.__context__
+        return False
+
     def _check_connection(self, connection_string: str) -> bool:
         try:
-            connection = self.connections[connection_string]
-            return connection.is_configured(verbose=True)
+            return self._is_configured(connection_string, verbose=True, force=True)
         except KeyError:
             logging.error(
                 "\nUnknown connection. Try 'list-connections' to see all supported connections."
@@ -112,7 +219,9 @@ class ConnectionManager:
         """Configure a specific connection"""
         try:
             connection = self.connections[connection_name]
+            self.invalidate_configured(connection_name)
             success = connection.configure()
+            self.invalidate_configured(connection_name)
 
             if success:
                 logging.info(
@@ -134,9 +243,9 @@ class ConnectionManager:
     def list_connections(self) -> None:
         """List all available connections and their status"""
         logging.info("\nAVAILABLE CONNECTIONS:")
-        for name, connection in self.connections.items():
+        for name in self.connections:
             status = (
-                "✅ Configured" if connection.is_configured() else "❌ Not Configured"
+                "✅ Configured" if self._is_configured(name) else "❌ Not Configured"
             )
             logging.info(f"- {name}: {status}")
 
@@ -145,7 +254,7 @@ class ConnectionManager:
         try:
             connection = self.connections[connection_name]
 
-            if connection.is_configured():
+            if self._is_configured(connection_name):
                 logging.info(
                     f"\n✅ {connection_name} is configured. You can use any of its actions."
                 )
@@ -176,7 +285,7 @@ class ConnectionManager:
         try:
             connection = self.connections[connection_name]
 
-            if not connection.is_configured():
+            if not self._is_configured(connection_name):
                 logging.error(
                     f"\nError: Connection '{connection_name}' is not configured"
                 )
@@ -213,7 +322,13 @@ class ConnectionManager:
                 )
                 return None
 
-            return connection.perform_action(action_name, kwargs)
+            try:
+                return connection.perform_action(action_name, kwargs)
+            except Exception as e:
+                if self._is_auth_error(e):
+                    # Credentials were rejected, so the cached state is stale
+                    self.invalidate_configured(connection_name)
+                raise
 
         except Exception as e:
             logging.error(
@@ -226,5 +341,5 @@ class ConnectionManager:
         return [
             name
             for name, conn in self.connections.items()
-            if conn.is_configured() and getattr(conn, "is_llm_provider", lambda: False)
+            if getattr(conn, "is_llm_provider", False) and self._is_configured(name)
         ]
@@ -1,9 +1,11 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from dotenv import load_dotenv, set_key
 from anthropic import Anthropic, NotFoundError
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.connections.response_cache import cached_generation
+from src.claude_client import cached_system, get_prompt_cache_stats
 
 logger = logging.getLogger("connections.anthropic_connection")
 
@@ -53,6 +55,15 @@ class AnthropicConnection(BaseConnection):
                 ],
                 description="Generate text using Anthropic models"
             ),
+            "stream-text": Action(
+                name="stream-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream generated text chunk by chunk using Anthropic models"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -111,6 +122,10 @@ class AnthropicConnection(BaseConnection):
             logger.error(f"Configuration failed: {e}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the Anthropic API key is present without calling the network"""
+        return bool(os.getenv('ANTHROPIC_API_KEY'))
+
     def is_configured(self, verbose = False) -> bool:
         """Check if Anthropic API key is configured and valid"""
         try:
@@ -128,6 +143,7 @@ class AnthropicConnection(BaseConnection):
                 logger.debug(f"Configuration check failed: {e}")
             return False
 
+    @cached_generation
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> str:
         """Generate text using Anthropic models"""
         try:
@@ -141,7 +157,8 @@ class AnthropicConnection(BaseConnection):
                 model=model,
                 max_tokens=1000,
                 temperature=0,
-                system=system_prompt,
+                # The persona prompt is identical across calls, so let the API cache it
+                system=cached_system(system_prompt),
                 messages=[
                     {
                         "role": "user",
@@ -154,11 +171,40 @@ class AnthropicConnection(BaseConnection):
                     }
                 ]
             )
+            get_prompt_cache_stats().record(message.usage)
             return message.content[0].text
             
         except Exception as e:
             raise AnthropicAPIError(f"Text generation failed: {e}")
 
+    def stream_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Anthropic models, yielding chunks as they arrive"""
+        try:
+            client = self._get_client()
+            with client.messages.stream(
+                model=model or self.config["model"],
+                max_tokens=1000,
+                temperature=0,
+                system=cached_system(system_prompt),
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": prompt
+                            }
+                        ]
+                    }
+                ]
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+                get_prompt_cache_stats().record(stream.get_final_message().usage)
+
+        except Exception as e:
+            raise AnthropicAPIError(f"Text streaming failed: {e}")
+
     def check_model(self, model: str, **kwargs) -> bool:
         """Check if a specific model is available"""
         try:
@@ -2,6 +2,7 @@ import logging
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Callable
 from dataclasses import dataclass
+from src.connections.rate_limit_manager import RateLimitManager, get_rate_limit_manager
 
 @dataclass
 class ActionParameter:
@@ -35,6 +36,8 @@ class BaseConnection(ABC):
             self.actions: Dict[str, Callable] = {}
             # Dictionary to store some essential configuration
             self.config = self.validate_config(config) 
+            # Declare request budgets with the shared rate limiter
+            self.declare_rate_limits()
             # Register actions during initialization
             self.register_actions()
         except Exception as e:
@@ -84,6 +87,44 @@ class BaseConnection(ABC):
         """
         pass
 
+    def has_local_credentials(self) -> bool:
+        """
+        Cheap, local-only check that the credentials this connection needs are present.
+        Must not perform any network calls; used as the fast path before a cached
+        is_configured() result is trusted.
+
+        Returns:
+            bool: True if the credentials appear to be present, False otherwise
+        """
+        return True
+
+    @property
+    def rate_limiter(self) -> RateLimitManager:
+        return get_rate_limit_manager()
+
+    @property
+    def rate_limit_key(self) -> str:
+        """Key of this connection's budget; per-endpoint budgets use '<key>:<endpoint>'"""
+        return self.config.get("name", type(self).__name__.lower())
+
+    def default_rate_limits(self) -> Dict[str, Dict[str, float]]:
+        """
+        Budgets the connection declares by default, keyed by endpoint ("default" for the
+        whole connection), e.g. {"default": {"requests": 30, "per": 60, "burst": 5}}.
+        A "rate_limits" block of the same shape in the connection config overrides them.
+        """
+        return {}
+
+    def declare_rate_limits(self) -> None:
+        budgets = {**self.default_rate_limits(), **self.config.get("rate_limits", {})}
+        for endpoint, budget in budgets.items():
+            key = self.rate_limit_key if endpoint == "default" else f"{self.rate_limit_key}:{endpoint}"
+            self.rate_limiter.declare(
+                key,
+                rate=budget["requests"] / budget.get("per", 1),
+                capacity=budget.get("burst"),
+            )
+
     @abstractmethod
     def register_actions(self) -> None:
         """
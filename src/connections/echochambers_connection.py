@@ -209,14 +209,19 @@ class EchochambersConnection(BaseConnection):
         }
         kwargs['headers'] = headers
 
+        if not self.rate_limiter.try_acquire(self.rate_limit_key):
+            wait = self.rate_limiter.wait_time(self.rate_limit_key)
+            raise EchochambersAPIError(f"Rate limited, retry in {wait:.0f}s")
+
         for attempt in range(3):
             try:
                 response = requests.request(method, url, timeout=10, **kwargs)
+                self.rate_limiter.update_from_headers(self.rate_limit_key, response.headers, response.status_code)
                 if response.status_code == 429:  # Rate limit
-                    retry_after = int(response.headers.get('Retry-After', 60))
-                    logger.warning(f"Rate limit hit, waiting {retry_after}s")
-                    time.sleep(retry_after)
-                    continue
+                    # Don't hold the worker thread; the runtime waits out the block before the next call
+                    raise EchochambersAPIError(
+                        f"Rate limit hit, retry in {self.rate_limiter.wait_time(self.rate_limit_key):.0f}s"
+                    )
                 response.raise_for_status()
                 return response.json()
             except requests.Timeout:
@@ -273,6 +278,10 @@ class EchochambersConnection(BaseConnection):
                 logger.info("Echochambers connection is not configured")
             return False
 
+        if self.rate_limiter.wait_time(self.rate_limit_key) > 0:
+            # Probing now would only spend budget; a rate limit isn't a configuration problem
+            return True
+
         try:
             # Test connection by making a simple request
             self.get_room_info()
@@ -1,10 +1,12 @@
 import logging
 import os
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from dotenv import load_dotenv, set_key
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.connections.response_cache import cached_generation
+from src.connections.streaming import stream_chat_completion
 from web3 import Web3
 import requests
 
@@ -63,6 +65,15 @@ class EternalAIConnection(BaseConnection):
                 ],
                 description="Generate text using EternalAI models"
             ),
+            "stream-text": Action(
+                name="stream-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream generated text chunk by chunk using EternalAI models"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -125,6 +136,10 @@ class EternalAIConnection(BaseConnection):
             logger.error(f"Configuration failed: {e}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the EternalAI API key and URL is present without calling the network"""
+        return bool(os.getenv('EternalAI_API_KEY') and os.getenv('EternalAI_API_URL'))
+
     def is_configured(self, verbose=False) -> bool:
         """Check if EternalAI API credentials are configured and valid"""
         try:
@@ -163,6 +178,37 @@ class EternalAIConnection(BaseConnection):
             else:
                 raise Exception(f"invalid on-chain system prompt")
 
+    def _resolve_chain_id(self, chain_id: str = None) -> str:
+        """Use the given chain id, falling back to config and then the default chain"""
+        chain_id = chain_id or self.config["chain_id"]
+        if not chain_id or chain_id == "":
+            chain_id = "45762"
+        logger.info(f"chain_id {chain_id}")
+        return chain_id
+
+    def _resolve_system_prompt(self, system_prompt: str) -> str:
+        """Replace the system prompt with the agent's on-chain one when an agent contract is configured"""
+        agent_id = self.config["agent_id"] or None
+        contract_address = self.config["contract_address"] or None
+        rpc = self.config["rpc_url"] or None
+
+        if agent_id and contract_address and rpc:
+            logger.info(f"agent_id: {agent_id}, contract_address: {contract_address}")
+            # call on-chain system prompt
+            web3 = Web3(Web3.HTTPProvider(rpc))
+            logger.info(f"web3 connected to {rpc} {web3.is_connected()}")
+            contract = web3.eth.contract(address=contract_address, abi=AGENT_CONTRACT_ABI)
+            result = contract.functions.getAgentSystemPrompt(agent_id).call()
+            logger.info(f"on-chain system_prompt: {result}")
+            if len(result) > 0:
+                try:
+                    system_prompt = self.get_on_chain_system_prompt_content(result[0].decode("utf-8"))
+                    logging.info(f"new system_prompt: {system_prompt}")
+                except Exception as e:
+                    logger.error(f"get on-chain system_prompt fail {e}")
+        return system_prompt
+
+    @cached_generation
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, chain_id: str = None, **kwargs) -> str:
         """Generate text using EternalAI models"""
         try:
@@ -170,29 +216,8 @@ class EternalAIConnection(BaseConnection):
             model = model or self.config["model"]
             logger.info(f"model {model}")
 
-            chain_id = chain_id or self.config["chain_id"]
-            if not chain_id or chain_id == "":
-                chain_id = "45762"
-            logger.info(f"chain_id {chain_id}")
-
-            agent_id = self.config["agent_id"] or None
-            contract_address = self.config["contract_address"] or None
-            rpc = self.config["rpc_url"] or None
-
-            if agent_id and contract_address and rpc:
-                logger.info(f"agent_id: {agent_id}, contract_address: {contract_address}")
-                # call on-chain system prompt
-                web3 = Web3(Web3.HTTPProvider(rpc))
-                logger.info(f"web3 connected to {rpc} {web3.is_connected()}")
-                contract = web3.eth.contract(address=contract_address, abi=AGENT_CONTRACT_ABI)
-                result = contract.functions.getAgentSystemPrompt(agent_id).call()
-                logger.info(f"on-chain system_prompt: {result}")
-                if len(result) > 0:
-                    try:
-                        system_prompt = self.get_on_chain_system_prompt_content(result[0].decode("utf-8"))
-                        logging.info(f"new system_prompt: {system_prompt}")
-                    except Exception as e:
-                        logger.error(f"get on-chain system_prompt fail {e}")
+            chain_id = self._resolve_chain_id(chain_id)
+            system_prompt = self._resolve_system_prompt(system_prompt)
 
             stream = self.config["stream"]
             logger.info(f"call completions api stream {stream}")
@@ -238,6 +263,20 @@ class EternalAIConnection(BaseConnection):
         except Exception as e:
             raise EternalAIAPIError(f"Text generation failed: {e}")
 
+    def stream_text(self, prompt: str, system_prompt: str, model: str = None, chain_id: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from EternalAI models, yielding chunks as they arrive"""
+        client = self._get_client()
+        return stream_chat_completion(
+            client.chat.completions.create,
+            EternalAIAPIError,
+            model=model or self.config["model"],
+            messages=[
+                {"role": "system", "content": self._resolve_system_prompt(system_prompt)},
+                {"role": "user", "content": prompt},
+            ],
+            extra_body={"chain_id": self._resolve_chain_id(chain_id)},
+        )
+
     def check_model(self, model: str, **kwargs) -> bool:
         """Check if a specific model is available"""
         try:
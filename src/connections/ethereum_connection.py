@@ -162,6 +162,10 @@ class EthereumConnection(BaseConnection):
             logger.error(f"Configuration failed: {str(e)}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the private key is present without calling the network"""
+        return bool(os.getenv('ETH_PRIVATE_KEY'))
+
     def is_configured(self, verbose: bool = False) -> bool:
         """Check if Ethereum connection is properly configured"""
         try:
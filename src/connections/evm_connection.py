@@ -169,6 +169,10 @@ class EVMConnection(BaseConnection):
             logger.error(f"Configuration failed: {str(e)}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the private key is present without calling the network"""
+        return bool(os.getenv('EVM_PRIVATE_KEY') or os.getenv('ETH_PRIVATE_KEY'))
+
     def is_configured(self, verbose: bool = False) -> bool:
         """Check if Ethereum connection is properly configured"""
         try:
@@ -1,11 +1,13 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 
 import requests
 from dotenv import load_dotenv, set_key
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.connections.response_cache import cached_generation
+from src.connections.streaming import stream_chat_completion
 
 logger = logging.getLogger("connections.galadriel_connection")
 
@@ -58,6 +60,15 @@ class GaladrielConnection(BaseConnection):
                 ],
                 description="Generate text using Galadriel models"
             ),
+            "stream-text": Action(
+                name="stream-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream generated text chunk by chunk using Galadriel models"
+            ),
         }
 
     def _get_client(self) -> OpenAI:
@@ -112,6 +123,10 @@ class GaladrielConnection(BaseConnection):
             logger.error(f"Configuration failed: {e}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the Galadriel API key is present without calling the network"""
+        return bool(os.getenv('GALADRIEL_API_KEY'))
+
     def is_configured(self, verbose = False) -> bool:
         """Check if Galadriel API key is configured and valid"""
         try:
@@ -136,6 +151,7 @@ class GaladrielConnection(BaseConnection):
         )
         return response.status_code != 401
 
+    @cached_generation
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> str:
         """Generate text using Galadriel models"""
         try:
@@ -158,6 +174,19 @@ class GaladrielConnection(BaseConnection):
         except Exception as e:
             raise GaladrielAPIError(f"Text generation failed: {e}")
 
+    def stream_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Galadriel models, yielding chunks as they arrive"""
+        client = self._get_client()
+        return stream_chat_completion(
+            client.chat.completions.create,
+            GaladrielAPIError,
+            model=model or self.config["model"],
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+        )
+
     def perform_action(self, action_name: str, kwargs) -> Any:
         """Execute an action with validation"""
         if action_name not in self.actions:
@@ -1,9 +1,11 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from dotenv import load_dotenv, set_key
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.connections.response_cache import cached_generation
+from src.connections.streaming import stream_chat_completion
 
 logger = logging.getLogger("connections.groq_connection")
 
@@ -54,6 +56,16 @@ class GroqConnection(BaseConnection):
                 ],
                 description="Generate text using Groq models"
             ),
+            "stream-text": Action(
+                name="stream-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation"),
+                    ActionParameter("temperature", False, float, "A decimal number that determines the degree of randomness in the response.")
+                ],
+                description="Stream generated text chunk by chunk using Groq models"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -117,6 +129,10 @@ class GroqConnection(BaseConnection):
             logger.error(f"Configuration failed: {e}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the Groq API key is present without calling the network"""
+        return bool(os.getenv('GROQ_API_KEY'))
+
     def is_configured(self, verbose = False) -> bool:
         """Check if Groq API key is configured and valid"""
         try:
@@ -137,6 +153,7 @@ class GroqConnection(BaseConnection):
                 logger.debug(f"Configuration check failed: {e}")
             return False
 
+    @cached_generation
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> str:
         """Generate text using Groq models"""
         try:
@@ -160,6 +177,19 @@ class GroqConnection(BaseConnection):
         except Exception as e:
             raise GroqAPIError(f"Text generation failed: {e}")
 
+    def stream_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Groq models, yielding chunks as they arrive"""
+        client = self._get_client()
+        return stream_chat_completion(
+            client.chat.completions.create,
+            GroqAPIError,
+            model=model or self.config["model"],
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+        )
+
     def check_model(self, model: str, **kwargs) -> bool:
         """Check if a specific model is available"""
         try:
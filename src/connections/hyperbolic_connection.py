@@ -1,9 +1,11 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from dotenv import load_dotenv, set_key
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.connections.response_cache import cached_generation
+from src.connections.streaming import stream_chat_completion
 
 logger = logging.getLogger("connections.hyperbolic_connection")
 
@@ -55,6 +57,16 @@ class HyperbolicConnection(BaseConnection):
                 ],
                 description="Generate text using Hyperbolic models"
             ),
+            "stream-text": Action(
+                name="stream-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation"),
+                    ActionParameter("temperature", False, float, "A decimal number that determines the degree of randomness in the response.")
+                ],
+                description="Stream generated text chunk by chunk using Hyperbolic models"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -121,6 +133,10 @@ class HyperbolicConnection(BaseConnection):
             logger.error(f"Configuration failed: {e}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the Hyperbolic API key is present without calling the network"""
+        return bool(os.getenv('HYPERBOLIC_API_KEY'))
+
     def is_configured(self, verbose = False) -> bool:
         """Check if Hyperbolic API key is configured and valid"""
         try:
@@ -141,6 +157,7 @@ class HyperbolicConnection(BaseConnection):
                 logger.debug(f"Configuration check failed: {e}")
             return False
 
+    @cached_generation
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> str:
         """Generate text using Hyperbolic models"""
         try:
@@ -163,6 +180,19 @@ class HyperbolicConnection(BaseConnection):
         except Exception as e:
             raise HyperbolicAPIError(f"Text generation failed: {e}")
 
+    def stream_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Hyperbolic models, yielding chunks as they arrive"""
+        client = self._get_client()
+        return stream_chat_completion(
+            client.chat.completions.create,
+            HyperbolicAPIError,
+            model=model or self.config["model"],
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+        )
+
     def check_model(self, model: str, **kwargs) -> bool:
         """Check if a specific model is available"""
         try:
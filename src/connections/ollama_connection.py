@@ -1,8 +1,9 @@
 import logging
 import requests
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.connections.response_cache import cached_generation
 
 logger = logging.getLogger("connections.ollama_connection")
 
@@ -53,6 +54,15 @@ class OllamaConnection(BaseConnection):
                 ],
                 description="Generate text using Ollama's running model"
             ),
+            "stream-text": Action(
+                name="stream-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation"),
+                ],
+                description="Stream generated text chunk by chunk using Ollama's running model"
+            ),
         }
 
     def configure(self) -> bool:
@@ -95,39 +105,40 @@ class OllamaConnection(BaseConnection):
                 logger.error(f"Ollama configuration check failed: {e}")
             return False
 
+    @cached_generation
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> str:
         """Generate text using Ollama API with streaming support"""
         try:
-            url = f"{self.base_url}/api/generate"
-            payload = {
-                "model": model or self.config["model"],
-                "prompt": prompt,
-                "system": system_prompt,
-            }
-            response = requests.post(url, json=payload, stream=True)
-
-            if response.status_code != 200:
-                raise OllamaAPIError(f"API error: {response.status_code} - {response.text}")
-
-            # Initialize an empty string to store the complete response
-            full_response = ""
-
-            # Process each line of the response as a JSON object
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        # Parse the JSON object
-                        data = json.loads(line.decode("utf-8"))
-                        # Append the "response" field to the full response
-                        full_response += data.get("response", "")
-                    except json.JSONDecodeError as e:
-                        raise OllamaAPIError(f"Failed to parse JSON: {e}")
-
-            return full_response
-
+            return "".join(self.stream_text(prompt, system_prompt, model))
         except Exception as e:
             raise OllamaAPIError(f"Text generation failed: {e}")
 
+    def stream_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from the Ollama API, yielding chunks as they arrive"""
+        url = f"{self.base_url}/api/generate"
+        payload = {
+            "model": model or self.config["model"],
+            "prompt": prompt,
+            "system": system_prompt,
+        }
+        response = requests.post(url, json=payload, stream=True)
+
+        if response.status_code != 200:
+            raise OllamaAPIError(f"API error: {response.status_code} - {response.text}")
+
+        # Each line of the response is a JSON object carrying the next chunk
+        for line in response.iter_lines():
+            if line:
+                try:
+                    data = json.loads(line.decode("utf-8"))
+                except json.JSONDecodeError as e:
+                    raise OllamaAPIError(f"Failed to parse JSON: {e}")
+                chunk = data.get("response", "")
+                if chunk:
+                    yield chunk
+                if data.get("done"):
+                    break
+
     def perform_action(self, action_name: str, kwargs) -> Any:
         if action_name not in self.actions:
             raise KeyError(f"Unknown action: {action_name}")
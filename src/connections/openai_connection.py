@@ -1,9 +1,11 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from dotenv import load_dotenv, set_key
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.connections.response_cache import cached_generation
+from src.connections.streaming import stream_chat_completion
 
 logger = logging.getLogger("connections.openai_connection")
 
@@ -54,6 +56,15 @@ class OpenAIConnection(BaseConnection):
                 ],
                 description="Generate text using OpenAI models"
             ),
+            "stream-text": Action(
+                name="stream-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream generated text chunk by chunk using OpenAI models"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -113,6 +124,10 @@ class OpenAIConnection(BaseConnection):
             logger.error(f"Configuration failed: {e}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the OpenAI API key is present without calling the network"""
+        return bool(os.getenv('OPENAI_API_KEY'))
+
     def is_configured(self, verbose = False) -> bool:
         """Check if OpenAI API key is configured and valid"""
         try:
@@ -130,6 +145,7 @@ class OpenAIConnection(BaseConnection):
                 logger.debug(f"Configuration check failed: {e}")
             return False
 
+    @cached_generation
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> str:
         """Generate text using OpenAI models"""
         try:
@@ -152,6 +168,19 @@ class OpenAIConnection(BaseConnection):
         except Exception as e:
             raise OpenAIAPIError(f"Text generation failed: {e}")
 
+    def stream_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from OpenAI models, yielding chunks as they arrive"""
+        client = self._get_client()
+        return stream_chat_completion(
+            client.chat.completions.create,
+            OpenAIAPIError,
+            model=model or self.config["model"],
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+        )
+
     def check_model(self, model, **kwargs):
         try:
             client = self._get_client()
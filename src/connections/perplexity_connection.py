@@ -105,6 +105,10 @@ class PerplexityConnection(BaseConnection):
             logger.error(f"Configuration failed: {e}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the Perplexity API key is present without calling the network"""
+        return bool(os.getenv('PERPLEXITY_API_KEY'))
+
     def is_configured(self, verbose = False) -> bool:
         """Check if Perplexity API key is configured and valid"""
         try:
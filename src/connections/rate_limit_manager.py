@@ -1,134 +1,287 @@
+import asyncio
 import time
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Mapping, Optional
 from threading import Lock
 
-class TwitterRateLimitManager:
+logger = logging.getLogger("connections.rate_limit_manager")
+
+# A reset header value above this is an epoch timestamp, below it a delay in seconds
+EPOCH_THRESHOLD = 1_000_000_000
+# Used when a 429 carries no Retry-After or reset header
+DEFAULT_BLOCK_SECONDS = 60
+# Longest single sleep inside acquire(), so newly learned limits are picked up
+MAX_ACQUIRE_SLEEP = 5.0
+
+# (limit, remaining, reset) header triples, most specific first
+RATE_LIMIT_HEADERS = (
+    ("x-rate-limit-limit", "x-rate-limit-remaining", "x-rate-limit-reset"),  # Twitter
+    ("x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"),
+    ("ratelimit-limit", "ratelimit-remaining", "ratelimit-reset"),  # IETF draft
+)
+
+
+class TokenBucket:
     """
-    Advanced rate limit management for Twitter API endpoints
-    Provides thread-safe tracking and smart throttling of API requests
+    Budget for one rate-limited key.
+
+    Combines a declared token bucket (`rate` tokens per second up to `capacity`),
+    the server's reported window (`remaining` requests until `reset_at`) and an
+    explicit block set after a 429. Any of the three may be absent.
     """
-    
+
+    def __init__(self, rate: Optional[float] = None, capacity: Optional[float] = None, reserve: int = 0):
+        self.rate = rate
+        self.capacity = self.default_capacity(rate, capacity)
+        self.tokens = self.capacity
+        self.reserve = reserve
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self._updated = time.time()
+
+    @staticmethod
+    def default_capacity(rate: Optional[float], capacity: Optional[float]) -> Optional[float]:
+        # Without an explicit burst size allow one second's worth, and at least one request
+        if capacity is not None:
+            return capacity
+        return max(1.0, rate) if rate else None
+
+    def _refill(self, now: float) -> None:
+        if self.rate and self.capacity is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.reset_at is not None and now >= self.reset_at:
+            # The server window rolled over; forget it until the next response tells us more
+            self.remaining = None
+            self.reset_at = None
+
+    def wait_time(self, tokens: float, now: float) -> float:
+        self._refill(now)
+        # Asking for zero tokens means "could a request be made now", so check for one
+        needed = tokens if tokens > 0 else 1
+        wait = max(0.0, self.blocked_until - now)
+        if self.remaining is not None and self.reset_at is not None and self.remaining - needed < self.reserve:
+            wait = max(wait, self.reset_at - now)
+        if self.rate and self.tokens is not None and self.tokens < needed:
+            wait = max(wait, (needed - self.tokens) / self.rate)
+        return wait
+
+    def consume(self, tokens: float) -> None:
+        if self.tokens is not None:
+            self.tokens -= tokens
+        if self.remaining is not None:
+            self.remaining = max(0, self.remaining - int(tokens))
+
+
+class RateLimitManager:
+    """
+    Process-wide rate limit service shared by every connection.
+
+    Budgets are kept per key: a connection name ("echochambers") or a
+    connection endpoint ("twitter:tweets"). They can be declared up front
+    (see BaseConnection.default_rate_limits and the "rate_limits" config block)
+    and are refined from rate limit response headers and 429s.
+
+    try_acquire() never blocks; async acquire() awaits without holding a thread,
+    so the event loop keeps running other work while a budget refills. Keys that
+    have never been declared or seen are unlimited.
+    """
+
     def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger("connections.rate_limit_manager")
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = Lock()
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket()
+        return bucket
+
+    def declare(self, key: str, rate: Optional[float] = None, capacity: Optional[float] = None, reserve: int = 0) -> None:
+        """Declare a budget of `rate` requests per second with bursts of up to `capacity`"""
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.rate = rate
+            bucket.capacity = TokenBucket.default_capacity(rate, capacity)
+            bucket.tokens = bucket.capacity
+            bucket.reserve = reserve
+
+    def update(self, key: str, limit: Optional[int] = None, remaining: Optional[int] = None, reset_at: Optional[float] = None) -> None:
+        """Record the server's view of a window: `remaining` of `limit` requests until epoch `reset_at`"""
+        with self._lock:
+            bucket = self._bucket(key)
+            if limit is not None:
+                bucket.limit = limit
+            if remaining is not None:
+                bucket.remaining = remaining
+            if reset_at is not None:
+                bucket.reset_at = reset_at
+
+        if remaining is not None:
+            reset_text = time.ctime(reset_at) if reset_at else "unknown"
+            self.logger.debug(f"Rate limits for {key}: {remaining}/{limit} resets at {reset_text}")
+
+    def block(self, key: str, seconds: float) -> None:
+        """Refuse all requests for `key` for the next `seconds`"""
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.blocked_until = max(bucket.blocked_until, time.time() + seconds)
+        self.logger.warning(f"Rate limit hit for {key}, holding requests for {seconds:.0f}s")
+
+    @staticmethod
+    def _parse_reset(value: str, now: float) -> Optional[float]:
+        try:
+            reset = float(value)
+        except (TypeError, ValueError):
+            return None
+        return reset if reset > EPOCH_THRESHOLD else now + reset
+
+    def update_from_headers(self, key: str, headers: Mapping[str, str], status_code: Optional[int] = None) -> None:
+        """Learn limits from a response's rate limit headers; a 429 also blocks the key until reset"""
+        now = time.time()
+        lowered = {k.lower(): v for k, v in headers.items()}
+
+        reset_at = None
+        for limit_name, remaining_name, reset_name in RATE_LIMIT_HEADERS:
+            if remaining_name not in lowered:
+                continue
+            try:
+                remaining = int(float(lowered[remaining_name]))
+                limit = int(float(lowered[limit_name])) if limit_name in lowered else None
+            except ValueError:
+                continue
+            reset_at = self._parse_reset(lowered.get(reset_name), now)
+            self.update(key, limit=limit, remaining=remaining, reset_at=reset_at)
+            break
+
+        if status_code == 429:
+            retry_after = self._parse_reset(lowered.get("retry-after"), now)
+            until = retry_after or reset_at or now + DEFAULT_BLOCK_SECONDS
+            self.block(key, max(0.0, until - now))
+
+    def wait_time(self, key: str, tokens: float = 1) -> float:
+        """Seconds until `tokens` requests could be made against `key`"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            return bucket.wait_time(tokens, time.time()) if bucket else 0.0
+
+    def try_acquire(self, key: str, tokens: float = 1) -> bool:
+        """Take `tokens` from the budget if they're available right now; never blocks"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return True
+            if bucket.wait_time(tokens, time.time()) > 0:
+                return False
+            bucket.consume(tokens)
+            return True
+
+    async def acquire(self, key: str, tokens: float = 1) -> None:
         """
-        Initialize the rate limit manager
-        
-        :param logger: Optional logger, defaults to creating a new logger
+        Wait without blocking the event loop until `tokens` are available, then take them.
+        With tokens=0 it waits until a request could be made but takes nothing, for
+        callers whose request path takes the token itself.
         """
-        self.logger = logger or logging.getLogger(__name__)
-        
-        # Thread-safe dictionary to track endpoint rate limits
-        self._rate_limits: Dict[str, Dict[str, Any]] = {}
-        self._lock = Lock()
-        
-        # Global safety margins
-        self.GLOBAL_SAFETY_MARGIN = 0.9  # Use 90% of available limit
-        self.MINIMUM_REMAINING_REQUESTS = 2  # Always keep at least 2 requests in reserve
-    
+        while not self.try_acquire(key, tokens):
+            wait = self.wait_time(key, tokens)
+            await asyncio.sleep(min(max(wait, 0.05), MAX_ACQUIRE_SLEEP))
+
+    def reset(self, key: str) -> None:
+        """Forget everything known about `key`"""
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current state of every tracked key, for status output"""
+        now = time.time()
+        with self._lock:
+            return {
+                key: {
+                    "wait": bucket.wait_time(1, now),
+                    "tokens": bucket.tokens,
+                    "remaining": bucket.remaining,
+                    "limit": bucket.limit,
+                    "reset_at": bucket.reset_at,
+                }
+                for key, bucket in self._buckets.items()
+            }
+
+
+class TwitterRateLimitManager(RateLimitManager):
+    """
+    Advanced rate limit management for Twitter API endpoints
+    Provides thread-safe tracking and smart throttling of API requests
+    """
+
+    # Always keep at least 2 requests in reserve
+    MINIMUM_REMAINING_REQUESTS = 2
+
     def update_rate_limits(self, endpoint: str, limit_info: Dict[str, Any]):
         """
         Update rate limit information for a specific endpoint
-        
-        :param endpoint: The API endpoint 
+
+        :param endpoint: The API endpoint
         :param limit_info: Dictionary containing rate limit details
         """
         with self._lock:
-            current_time = time.time()
-            self._rate_limits[endpoint] = {
-                'limit': limit_info.get('limit', 0),
-                'remaining': limit_info.get('remaining', 0),
-                'reset_time': limit_info.get('reset', current_time + 900),  # Default 15-minute reset
-                'last_updated': current_time
-            }
-            
-            self.logger.info(f"Updated rate limits for {endpoint}: "
-                              f"{self._rate_limits[endpoint]['remaining']}/{self._rate_limits[endpoint]['limit']} "
-                              f"resets at {time.ctime(self._rate_limits[endpoint]['reset_time'])}")
-    
+            self._bucket(endpoint).reserve = self.MINIMUM_REMAINING_REQUESTS
+        self.update(
+            endpoint,
+            limit=limit_info.get('limit', 0),
+            remaining=limit_info.get('remaining', 0),
+            reset_at=limit_info.get('reset', time.time() + 900),  # Default 15-minute reset
+        )
+
     def can_make_request(self, endpoint: str) -> bool:
         """
         Determine if a request can be made to a specific endpoint
-        
+
         :param endpoint: The API endpoint to check
         :return: Boolean indicating if a request can be made
         """
-        current_time = time.time()
-        
-        with self._lock:
-            # If endpoint is not tracked, assume it can be used
-            if endpoint not in self._rate_limits:
-                return True
-            
-            endpoint_limits = self._rate_limits[endpoint]
-            
-            # Check if reset time has passed
-            if current_time >= endpoint_limits['reset_time']:
-                return True
-            
-            # Apply safety margins
-            safe_remaining = max(
-                endpoint_limits['remaining'] * self.GLOBAL_SAFETY_MARGIN, 
-                self.MINIMUM_REMAINING_REQUESTS
-            )
-            
-            can_request = safe_remaining > 0
-            
-            if not can_request:
-                wait_time = endpoint_limits['reset_time'] - current_time
-                self.logger.warning(
-                    f"Rate limit reached for {endpoint}. "
-                    f"Waiting {wait_time:.2f} seconds until reset."
-                )
-            
-            return can_request
-    
+        return self.wait_time(endpoint) == 0
+
     def consume_request(self, endpoint: str):
         """
         Mark a request as consumed for a specific endpoint
-        
-        :param endpoint: The API endpoint 
+
+        :param endpoint: The API endpoint
         """
         with self._lock:
-            if endpoint in self._rate_limits:
-                self._rate_limits[endpoint]['remaining'] = max(
-                    0, 
-                    self._rate_limits[endpoint]['remaining'] - 1
-                )
-    
+            bucket = self._buckets.get(endpoint)
+            if bucket is not None:
+                bucket.consume(1)
+
     def get_wait_time(self, endpoint: str) -> float:
         """
         Calculate recommended wait time before next request
-        
+
         :param endpoint: The API endpoint
         :return: Recommended wait time in seconds
         """
-        current_time = time.time()
-        
-        with self._lock:
-            if endpoint not in self._rate_limits:
-                return 0
-            
-            endpoint_limits = self._rate_limits[endpoint]
-            
-            # If reset time has passed, no wait needed
-            if current_time >= endpoint_limits['reset_time']:
-                return 0
-            
-            # Calculate wait time
-            wait_time = max(
-                0, 
-                endpoint_limits['reset_time'] - current_time
-            )
-            
-            return wait_time
-    
+        return self.wait_time(endpoint)
+
     def emergency_reset(self, endpoint: str):
         """
         Force a reset of rate limits for an endpoint in case of persistent issues
-        
+
         :param endpoint: The API endpoint to reset
         """
-        with self._lock:
-            if endpoint in self._rate_limits:
-                self.logger.warning(f"Emergency reset of rate limits for {endpoint}")
-                del self._rate_limits[endpoint]
+        self.logger.warning(f"Emergency reset of rate limits for {endpoint}")
+        self.reset(endpoint)
+
+
+_shared_manager: Optional[RateLimitManager] = None
+_shared_lock = Lock()
+
+
+def get_rate_limit_manager() -> RateLimitManager:
+    """Process-wide RateLimitManager shared by all connections and the agent runtime"""
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            _shared_manager = RateLimitManager()
+        return _shared_manager
@@ -0,0 +1,185 @@
+import functools
+import hashlib
+import inspect
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("connections.response_cache")
+
+DEFAULT_CACHE_TTL = 3600  # seconds
+DEFAULT_CACHE_MAX_SIZE = 256
+DEFAULT_DUPLICATE_THRESHOLD = 0.8
+DEFAULT_DUPLICATE_WINDOW = 50
+DEFAULT_SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class DuplicateResponseError(Exception):
+    """Raised when every generated response was too similar to a recent one"""
+    pass
+
+
+class ResponseCache:
+    """Exact-match LRU cache with TTL for generated text"""
+
+    def __init__(self, ttl: float = DEFAULT_CACHE_TTL, max_size: int = DEFAULT_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: Optional[str], prompt: str, **extra) -> str:
+        system_hash = hashlib.sha256((system_prompt or "").encode()).hexdigest()
+        extra_part = repr(sorted(extra.items()))
+        raw = "\x1f".join([model or "", system_hash, prompt or "", extra_part])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class NearDuplicateDetector:
+    """
+    Flags outputs whose word-shingle Jaccard similarity to any of the last
+    `window` outputs is at or above `threshold`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_DUPLICATE_THRESHOLD,
+        window: int = DEFAULT_DUPLICATE_WINDOW,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    ):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self._recent: deque = deque(maxlen=window)
+        self._lock = Lock()
+
+    def _shingles(self, text: str) -> frozenset:
+        words = _WORD_RE.findall(text.lower())
+        if len(words) < self.shingle_size:
+            return frozenset([" ".join(words)]) if words else frozenset()
+        return frozenset(
+            " ".join(words[i:i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        )
+
+    def similarity(self, text: str) -> float:
+        """Highest similarity between `text` and a recent output"""
+        shingles = self._shingles(text)
+        if not shingles:
+            return 0.0
+        with self._lock:
+            recent = list(self._recent)
+        best = 0.0
+        for other in recent:
+            union = len(shingles | other)
+            if union:
+                best = max(best, len(shingles & other) / union)
+        return best
+
+    def is_duplicate(self, text: str) -> bool:
+        return self.similarity(text) >= self.threshold
+
+    def remember(self, text: str) -> None:
+        shingles = self._shingles(text)
+        if shingles:
+            with self._lock:
+                self._recent.append(shingles)
+
+
+def cached_generation(func):
+    """
+    Decorator for LLM connections' generate_text.
+
+    Enabled per connection by a "response_cache" block in its JSON config:
+    {"ttl": 3600, "max_size": 256, "near_duplicate": {"threshold": 0.8, "window": 50, "retries": 0}}
+    The exact cache is keyed on model, system prompt hash, prompt and any extra
+    arguments. The optional near_duplicate detector rejects freshly generated outputs
+    too similar to recent ones, regenerating up to `retries` times before raising
+    DuplicateResponseError. Exact cache hits are served as they are: the cached text
+    was remembered when generated, so it would always match itself.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        cache_config = self.config.get("response_cache")
+        if not cache_config:
+            return func(self, *args, **kwargs)
+
+        if getattr(self, "_response_cache", None) is None:
+            self._response_cache = ResponseCache(
+                ttl=cache_config.get("ttl", DEFAULT_CACHE_TTL),
+                max_size=cache_config.get("max_size", DEFAULT_CACHE_MAX_SIZE),
+            )
+            duplicate_config = cache_config.get("near_duplicate")
+            self._duplicate_detector = NearDuplicateDetector(
+                threshold=duplicate_config.get("threshold", DEFAULT_DUPLICATE_THRESHOLD),
+                window=duplicate_config.get("window", DEFAULT_DUPLICATE_WINDOW),
+            ) if duplicate_config else None
+
+        cache: ResponseCache = self._response_cache
+        detector: Optional[NearDuplicateDetector] = self._duplicate_detector
+
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments: Dict[str, Any] = dict(bound.arguments)
+        arguments.pop("self", None)
+        extra = arguments.pop("kwargs", {}) or {}
+        prompt = arguments.pop("prompt", None)
+        system_prompt = arguments.pop("system_prompt", None)
+        model = arguments.pop("model", None) or self.config.get("model")
+        key = cache.make_key(model, system_prompt, prompt, **arguments, **extra)
+
+        cached = cache.get(key)
+        if cached is not None:
+            logger.debug("Response cache hit")
+            return cached
+
+        retries = cache_config.get("near_duplicate", {}).get("retries", 0) if detector else 0
+        for attempt in range(retries + 1):
+            text = func(self, *args, **kwargs)
+            if not detector or not isinstance(text, str) or not detector.is_duplicate(text):
+                break
+            logger.info(f"Generated text is a near-duplicate of a recent output (attempt {attempt + 1})")
+        else:
+            raise DuplicateResponseError("Generated text was too similar to a recent output")
+
+        if isinstance(text, str):
+            if detector:
+                detector.remember(text)
+            cache.put(key, text)
+        return text
+
+    return wrapper
@@ -1,11 +1,10 @@
 import logging
 import os
 import requests
-import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
-from src.types import JupiterTokenData
+from src.custom_types import JupiterTokenData
 from src.constants import LAMPORTS_PER_SOL, SPL_TOKENS
 from src.helpers.solana.pumpfun import PumpfunTokenManager
 from src.helpers.solana.faucet import FaucetManager
@@ -13,9 +12,12 @@ from src.helpers.solana.lend import AssetLender
 from src.helpers.solana.stake import StakeManager
 from src.helpers.solana.trade import TradeManager
 from src.helpers.solana.token_deploy import TokenDeploymentManager
-from src.helpers.solana.performance import SolanaPerformanceTracker
+from src.helpers.solana.performance import get_performance_tracker
 from src.helpers.solana.transfer import SolanaTransferHelper
+from src.helpers.solana.batch_transfer import SolanaBatchTransferHelper, load_transfer_rows
 from src.helpers.solana.read import SolanaReadHelper
+from src.helpers.solana.mint_cache import get_mint_cache
+from src.helpers.solana.rpc_pool import get_solana_rpc_pool
 
 
 from dotenv import load_dotenv, set_key
@@ -47,14 +49,24 @@ class SolanaConnection(BaseConnection):
     def __init__(self, config: Dict[str, Any]):
         logger.info("Initializing Solana connection...")
         super().__init__(config)
+        self._mints_prewarmed = False
 
     @property
     def is_llm_provider(self) -> bool:
         return False
 
     def _get_connection_async(self) -> AsyncClient:
-        conn = AsyncClient(self.config["rpc"])
-        return conn
+        """Pooled client for the configured RPC; only use it inside coroutines run with _run()"""
+        return get_solana_rpc_pool().client(self.config["rpc"])
+
+    def _run(self, coro):
+        """Run a helper coroutine on the RPC pool's event loop, where the pooled clients live"""
+        pool = get_solana_rpc_pool()
+        if not self._mints_prewarmed:
+            # First use: learn the well-known mints' decimals in the background, in one request
+            self._mints_prewarmed = True
+            pool.submit(get_mint_cache().prewarm(self._get_connection_async()))
+        return pool.run(coro)
 
     def _get_wallet(self):
         creds = self._get_credentials()
@@ -127,6 +139,30 @@ class SolanaConnection(BaseConnection):
                 ],
                 description="Transfer SOL or SPL tokens",
             ),
+            "batch-transfer": Action(
+                name="batch-transfer",
+                parameters=[
+                    ActionParameter(
+                        "transfers",
+                        False,
+                        list,
+                        "List of {recipient, amount, mint} (mint optional for SOL)",
+                    ),
+                    ActionParameter(
+                        "csv_path",
+                        False,
+                        str,
+                        "CSV file of recipient,amount,mint rows",
+                    ),
+                    ActionParameter(
+                        "batch_id",
+                        False,
+                        str,
+                        "Id of an earlier batch to resume (from its summary); omit to start a new batch",
+                    ),
+                ],
+                description="Pay many recipients in SOL or SPL tokens, packing transfers into few transactions; pass batch_id to resume",
+            ),
             "trade": Action(
                 name="trade",
                 parameters=[
@@ -155,6 +191,18 @@ class SolanaConnection(BaseConnection):
                 ],
                 description="Check SOL or token balance",
             ),
+            "get-balances": Action(
+                name="get-balances",
+                parameters=[
+                    ActionParameter(
+                        "token_addresses",
+                        False,
+                        list,
+                        "Token mint addresses (default: the well-known SPL tokens)",
+                    )
+                ],
+                description="Check SOL and several token balances in one request",
+            ),
             "stake": Action(
                 name="stake",
                 parameters=[
@@ -193,6 +241,11 @@ class SolanaConnection(BaseConnection):
             "get-tps": Action(
                 name="get-tps", parameters=[], description="Get current Solana TPS"
             ),
+            "network-stats": Action(
+                name="network-stats",
+                parameters=[],
+                description="Get rolling Solana TPS statistics (average, max, percentiles, congestion)",
+            ),
             "get-token-by-ticker": Action(
                 name="get-token-by-ticker",
                 parameters=[
@@ -293,10 +346,27 @@ class SolanaConnection(BaseConnection):
             amount,
             token_mint,
         )
-        res = asyncio.run(res)
+        res = self._run(res)
         logger.debug(f"Transferred {amount} to {to_address}\nTransaction ID: {res}")
         return res
 
+    def batch_transfer(
+        self,
+        transfers: Optional[List[Any]] = None,
+        csv_path: Optional[str] = None,
+        batch_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        rows = load_transfer_rows(transfers, csv_path)
+        if not rows:
+            raise ValueError("No transfers given; pass transfers or csv_path")
+        logger.info(f"Batch transferring to {len(rows)} recipients")
+        res = SolanaBatchTransferHelper.batch_transfer(
+            self._get_connection_async(), self._get_wallet(), rows, batch_id
+        )
+        res = self._run(res)
+        logger.debug(f"Batch transfer {res['batch_id']}: {res['confirmed']}/{res['transfers']} confirmed")
+        return res
+
     # todo: test on mainnet
     def trade(
         self,
@@ -318,7 +388,7 @@ class SolanaConnection(BaseConnection):
             input_mint,
             slippage_bps,
         )
-        res = asyncio.run(res)
+        res = self._run(res)
         return res
 
     def get_balance(self, token_address: str = None) -> float:
@@ -329,7 +399,17 @@ class SolanaConnection(BaseConnection):
         res = SolanaReadHelper.get_balance(
             self._get_connection_async(), self._get_wallet(), token_address
         )
-        res = asyncio.run(res)
+        res = self._run(res)
+        return res
+
+    def get_balances(self, token_addresses: Optional[List[str]] = None) -> Dict[str, Optional[float]]:
+        if token_addresses is None:
+            token_addresses = [str(mint) for ticker, mint in SPL_TOKENS.items() if ticker != "SOL"]
+        logger.info(f"Getting SOL and {len(token_addresses)} token balances")
+        res = SolanaReadHelper.get_balances(
+            self._get_connection_async(), self._get_wallet(), token_addresses
+        )
+        res = self._run(res)
         return res
 
     def stake(self, amount: float) -> str:
@@ -337,7 +417,7 @@ class SolanaConnection(BaseConnection):
         res = StakeManager.stake_with_jup(
             self._get_connection_async(), self._get_wallet(), amount
         )
-        res = asyncio.run(res)
+        res = self._run(res)
         logger.debug(f"Staked {amount} SOL\nTransaction ID: {res}")
         return res
 
@@ -348,14 +428,16 @@ class SolanaConnection(BaseConnection):
         # res = AssetLender.lend_asset(
         #     self._get_connection_async(), self._get_wallet(), amount
         # )
-        # res = asyncio.run(res)
+        # res = self._run(res)
         # logger.debug(f"Lent {amount} USDC\nTransaction ID: {res}")
         # return res
 
     def request_faucet(self) -> str:
         logger.info("Requesting faucet funds")
-        res = FaucetManager.request_faucet_funds(self)
-        res = asyncio.run(res)
+        res = FaucetManager.request_faucet_funds(
+            self._get_connection_async(), self._get_wallet()
+        )
+        res = self._run(res)
         logger.debug(f"Requested faucet funds\nTransaction ID: {res}")
         return res
 
@@ -365,7 +447,7 @@ class SolanaConnection(BaseConnection):
         # res = TokenDeploymentManager.deploy_token(
         #     self._get_connection_async(), self._get_wallet(), decimals
         # )
-        # res = asyncio.run(res)
+        # res = self._run(res)
         # logger.debug(
         #     f"Deployed token with {decimals} decimals\nToken Mint: {res['mint']}"
         # )
@@ -374,10 +456,14 @@ class SolanaConnection(BaseConnection):
     def fetch_price(self, token_id: str) -> float:
         return SolanaReadHelper.fetch_price(token_id)
 
-    # todo: test on mainnet
-    def get_tps(self) -> int:
-        res = SolanaPerformanceTracker.fetch_current_tps(self._get_connection_async())
-        res = asyncio.run(res)
+    def get_tps(self) -> float:
+        res = get_performance_tracker(self._get_connection_async()).current_tps()
+        res = self._run(res)
+        return res
+
+    def network_stats(self) -> Dict[str, Any]:
+        res = get_performance_tracker(self._get_connection_async()).stats()
+        res = self._run(res)
         return res
 
     def get_token_by_ticker(self, ticker: str) -> str:
@@ -409,7 +495,7 @@ class SolanaConnection(BaseConnection):
         #    image_url,
         #    options,
         # )
-        # res = asyncio.run(res)
+        # res = self._run(res)
         # logger.debug(
         #    f"Launched Pump & Fun token {token_ticker}\nToken Mint: {res['mint']}"
         # )
@@ -0,0 +1,38 @@
+import asyncio
+from typing import AsyncIterator, Callable, Iterable, Iterator, Type
+
+# Returned by next() when a chunk iterator is exhausted
+_EXHAUSTED = object()
+
+
+def stream_chat_completion(create: Callable, error_class: Type[Exception], **create_kwargs) -> Iterator[str]:
+    """
+    Yield content deltas from an OpenAI-compatible chat.completions.create(stream=True) call.
+
+    The request is sent on the first next(); any failure, including one mid-stream,
+    is re-raised as `error_class`.
+    """
+    try:
+        completion = create(stream=True, **create_kwargs)
+        for chunk in completion:
+            choices = getattr(chunk, "choices", None)
+            if not choices:
+                continue
+            delta = choices[0].delta
+            content = getattr(delta, "content", None) if delta is not None else None
+            if content:
+                yield content
+    except error_class:
+        raise
+    except Exception as e:
+        raise error_class(f"Text streaming failed: {e}")
+
+
+async def aiter_chunks(chunks: Iterable[str]) -> AsyncIterator[str]:
+    """Async iterator over a blocking chunk iterator, pulling each chunk on a worker thread"""
+    iterator = iter(chunks)
+    while True:
+        chunk = await asyncio.to_thread(next, iterator, _EXHAUSTED)
+        if chunk is _EXHAUSTED:
+            return
+        yield chunk
@@ -1,11 +1,13 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from dotenv import load_dotenv, set_key
 from together import Together
 from together.types.models import ModelObject, ModelType
 
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.connections.response_cache import cached_generation
+from src.connections.streaming import stream_chat_completion
 
 logger = logging.getLogger("connections.together_ai_connection")
 
@@ -55,6 +57,15 @@ class TogetherAIConnection(BaseConnection):
                 ],
                 description="Generate text using Together AI models"
             ),
+            "stream-text": Action(
+                name="stream-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", True, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream generated text chunk by chunk using Together AI models"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -113,6 +124,10 @@ class TogetherAIConnection(BaseConnection):
             logger.error(f"Configuration failed: {e}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the Together AI API key is present without calling the network"""
+        return bool(os.getenv('TOGETHER_API_KEY'))
+
     def is_configured(self, verbose=False) -> bool:
         """Check if Together AI API key is configured and valid"""
         try:
@@ -130,6 +145,7 @@ class TogetherAIConnection(BaseConnection):
                 logger.debug(f"Configuration check failed: {e}")
             return False
 
+    @cached_generation
     def generate_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> str:
         """Generate text using Together AI models"""
         try:
@@ -151,6 +167,19 @@ class TogetherAIConnection(BaseConnection):
         except Exception as e:
             raise TogetherAIAPIError(f"Text generation failed: {e}")
 
+    def stream_text(self, prompt: str, system_prompt: str, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from Together AI models, yielding chunks as they arrive"""
+        client = self._get_client()
+        return stream_chat_completion(
+            client.chat.completions.create,
+            TogetherAIAPIError,
+            model=model or self.config["model"],
+            messages=[
+                {"role": "user", "content": prompt},
+                {"role": "system", "content": system_prompt},
+            ],
+        )
+
     def check_model(self, model: str, **kwargs) -> bool:
         try:
             client = self._get_client()
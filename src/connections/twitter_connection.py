@@ -3,7 +3,8 @@ import tweepy
 import logging
 import time
 import datetime
-from .rate_limit_manager import TwitterRateLimitManager
+import threading
+from .rate_limit_manager import get_rate_limit_manager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,49 +17,52 @@ CONSUMER_SECRET = os.getenv("TWITTER_CONSUMER_SECRET")
 ACCESS_TOKEN = os.getenv("TWITTER_ACCESS_TOKEN")
 ACCESS_TOKEN_SECRET = os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
 
-# Keep track of rate limit state
-rate_limit_state = {
-    "reset_time": None,
-    "remaining": None,
-    "last_checked": None
-}
+# Budget key for POST /2/tweets in the shared rate limiter
+TWEETS_RATE_LIMIT_KEY = "twitter:tweets"
 
-# Initialize Twitter v2 API Client
-client = tweepy.Client(
-    bearer_token=BEARER_TOKEN,
-    consumer_key=CONSUMER_KEY,
-    consumer_secret=CONSUMER_SECRET,
-    access_token=ACCESS_TOKEN,
-    access_token_secret=ACCESS_TOKEN_SECRET
-)
+# Twitter v2 API Client, created on first use
+_client = None
+
+# Set once init_twitter_connection() has verified credentials and rate limits
+_initialized = False
+
+# Outcome of each thread's last send_tweet(), for callers deciding whether to retry
+_last_send = threading.local()
+
+def get_client():
+    """Get or create the shared Twitter v2 API client"""
+    global _client
+    if _client is None:
+        _client = tweepy.Client(
+            bearer_token=BEARER_TOKEN,
+            consumer_key=CONSUMER_KEY,
+            consumer_secret=CONSUMER_SECRET,
+            access_token=ACCESS_TOKEN,
+            access_token_secret=ACCESS_TOKEN_SECRET
+        )
+    return _client
 
 def should_respect_rate_limit():
     """Check if we should wait for rate limit reset"""
-    if rate_limit_state["reset_time"] is None:
-        return False
-        
-    now = datetime.datetime.now().timestamp()
-    
-    # If current time is before reset time, we should wait
-    if now < rate_limit_state["reset_time"]:
-        # Only if we have no requests remaining
-        if rate_limit_state["remaining"] is not None and rate_limit_state["remaining"] <= 1:
-            wait_seconds = int(rate_limit_state["reset_time"] - now) + 5  # Add 5 second buffer
-            logger.warning(f"Rate limit active. Waiting {wait_seconds} seconds until reset time.")
-            return True
-            
+    wait_seconds = get_rate_limit_manager().wait_time(TWEETS_RATE_LIMIT_KEY)
+    if wait_seconds > 0:
+        logger.warning(f"Rate limit active. {wait_seconds:.0f} seconds until reset time.")
+        return True
     return False
 
 def send_tweet(message, media_bytes=None):
     """
-    Sends a tweet using Twitter API v2 with detailed error handling and rate limit respect
+    Sends a tweet using Twitter API v2 with detailed error handling and rate limit respect.
+    Returns the tweet ID, or None on failure; last_send_status_code() then tells why.
     """
-    # First check if we need to respect rate limits
-    if should_respect_rate_limit():
-        now = datetime.datetime.now().timestamp()
-        wait_seconds = int(rate_limit_state["reset_time"] - now) + 5  # Add buffer
-        logger.info(f"⏳ Waiting for rate limit reset: {wait_seconds} seconds")
-        time.sleep(wait_seconds)
+    _last_send.status_code = None
+    # Return straight away when the budget is spent, so the caller's scheduler can run
+    # other work instead of this thread sleeping until the window resets
+    if not get_rate_limit_manager().try_acquire(TWEETS_RATE_LIMIT_KEY):
+        wait_seconds = get_rate_limit_manager().wait_time(TWEETS_RATE_LIMIT_KEY)
+        logger.info(f"⏳ Tweet rate limit active, {wait_seconds:.0f} seconds until reset; not sending")
+        _last_send.status_code = 429
+        return None
     
     try:
         logger.info(f"Attempting to send tweet: {message[:30]}...")
@@ -91,33 +95,28 @@ def send_tweet(message, media_bytes=None):
         
         # Post the tweet (with or without media)
         if media_ids:
-            response = client.create_tweet(text=message, media_ids=media_ids)
+            response = get_client().create_tweet(text=message, media_ids=media_ids)
             logger.info("Tweet posted with media attachment")
         else:
-            response = client.create_tweet(text=message)
+            response = get_client().create_tweet(text=message)
             
         tweet_id = response.data['id']
         tweet_url = f"https://twitter.com/user/status/{tweet_id}"
         logger.info(f"✅ Tweet sent successfully! Tweet ID: {tweet_id}")
         logger.info(f"✅ Tweet URL: {tweet_url}")
         
-        # Reset rate limit warning since we succeeded
-        rate_limit_state["remaining"] = None
-        
         return tweet_id
     except tweepy.TweepyException as e:
         logger.error(f"❌ Error sending tweet: {e}")
         
         # Check if it's a rate limit error
         if hasattr(e, 'response') and e.response is not None:
+            _last_send.status_code = e.response.status_code
             if e.response.status_code == 429:  # 429 is the status code for rate limiting
                 reset_time = e.response.headers.get('x-rate-limit-reset')
+                # Blocks the tweets budget until the reset time (or Retry-After)
+                get_rate_limit_manager().update_from_headers(TWEETS_RATE_LIMIT_KEY, e.response.headers, 429)
                 if reset_time:
-                    # Convert to timestamp and store for future reference
-                    rate_limit_state["reset_time"] = int(reset_time)
-                    rate_limit_state["remaining"] = 0
-                    rate_limit_state["last_checked"] = datetime.datetime.now().timestamp()
-                    
                     # Calculate wait time in human-readable format
                     reset_dt = datetime.datetime.fromtimestamp(int(reset_time))
                     wait_seconds = int(reset_dt.timestamp() - datetime.datetime.now().timestamp())
@@ -134,6 +133,13 @@ def send_tweet(message, media_bytes=None):
                 logger.error(f"Response body: {e.response.text}")
         return None
 
+def last_send_status_code():
+    """
+    HTTP status of this thread's last failed send_tweet(): 429 when the rate limiter
+    held it back, None when it got no response (timeout, connection error)
+    """
+    return getattr(_last_send, "status_code", None)
+
 def check_rate_limits():
     """
     Checks the current Twitter API rate limits for the account
@@ -170,9 +176,9 @@ def check_rate_limits():
                 reset_time = update_limit['reset']
                 
                 # Store for future reference
-                rate_limit_state["reset_time"] = reset_time
-                rate_limit_state["remaining"] = remaining
-                rate_limit_state["last_checked"] = datetime.datetime.now().timestamp()
+                get_rate_limit_manager().update(
+                    TWEETS_RATE_LIMIT_KEY, limit=limit, remaining=remaining, reset_at=reset_time
+                )
                 
                 reset_dt = datetime.datetime.fromtimestamp(reset_time)
                 logger.info(f"POST statuses/update: {remaining}/{limit} requests remaining")
@@ -216,7 +222,15 @@ def verify_credentials():
         logger.error(f"❌ Twitter credentials verification failed: {e}")
         return False
 
-# Test credentials when the module is imported
-logger.info("Initializing Twitter connection...")
-verify_credentials()
-check_rate_limits()
\ No newline at end of file
+def init_twitter_connection(force=False):
+    """
+    Verify credentials and prime the rate limit state.
+    Entry points call this once at startup; importing the module makes no network calls.
+    """
+    global _initialized
+    if _initialized and not force:
+        return
+    logger.info("Initializing Twitter connection...")
+    verify_credentials()
+    check_rate_limits()
+    _initialized = True
@@ -1,9 +1,11 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from openai import OpenAI
 from dotenv import set_key, load_dotenv
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.connections.response_cache import cached_generation
+from src.connections.streaming import stream_chat_completion
 
 logger = logging.getLogger("connections.XAI_connection")
 
@@ -53,6 +55,15 @@ class XAIConnection(BaseConnection):
                 ],
                 description="Generate text using XAI models"
             ),
+            "stream-text": Action(
+                name="stream-text",
+                parameters=[
+                    ActionParameter("prompt", True, str, "The input prompt for text generation"),
+                    ActionParameter("system_prompt", False, str, "System prompt to guide the model"),
+                    ActionParameter("model", False, str, "Model to use for generation")
+                ],
+                description="Stream generated text chunk by chunk using XAI models"
+            ),
             "check-model": Action(
                 name="check-model",
                 parameters=[
@@ -114,6 +125,10 @@ class XAIConnection(BaseConnection):
             logger.error(f"Configuration failed: {e}")
             return False
 
+    def has_local_credentials(self) -> bool:
+        """Check that the XAI API key is present without calling the network"""
+        return bool(os.getenv('XAI_API_KEY'))
+
     def is_configured(self, verbose = False) -> bool:
         """Check if XAI API key is configured and valid"""
         try:
@@ -131,6 +146,7 @@ class XAIConnection(BaseConnection):
                 logger.debug(f"Configuration check failed: {e}")
             return False
 
+    @cached_generation
     def generate_text(self, prompt: str, system_prompt: str = None, model: str = None, **kwargs) -> str:
         """Generate text using XAI models"""
         try:
@@ -152,6 +168,19 @@ class XAIConnection(BaseConnection):
         except Exception as e:
             raise XAIAPIError(f"Text generation failed: {e}")
 
+    def stream_text(self, prompt: str, system_prompt: str = None, model: str = None, **kwargs) -> Iterator[str]:
+        """Stream text from XAI models, yielding chunks as they arrive"""
+        client = self._get_client()
+        return stream_chat_completion(
+            client.chat.completions.create,
+            XAIAPIError,
+            model=model or self.config["model"],
+            messages=[
+                {"role": "system", "content": system_prompt or ""},
+                {"role": "user", "content": prompt},
+            ],
+        )
+
     def check_model(self, model: str, **kwargs) -> bool:
         """Check if a specific model is available"""
         try:
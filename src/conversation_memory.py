@@ -0,0 +1,234 @@
+import logging
+import time
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("conversation_memory")
+
+DEFAULT_TOKEN_BUDGET = 2000  # history tokens kept verbatim per conversation
+DEFAULT_MAX_TOTAL_TOKENS = 500_000  # across all conversations
+DEFAULT_MAX_CONVERSATIONS = 5000
+DEFAULT_IDLE_TTL = 24 * 3600  # seconds before an idle conversation is forgotten
+# Share of the budget a rolling summary may take
+SUMMARY_BUDGET_FRACTION = 0.25
+CHARS_PER_TOKEN = 4
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a chat. Merge the earlier summary and the new "
+    "exchanges into one short paragraph that keeps names, facts, open questions and tone. "
+    "Reply with the summary only."
+)
+
+# (previous summary, evicted (role, content) turns) -> new summary
+Summarizer = Callable[[str, List[Tuple[str, str]]], str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class Conversation:
+    """Recent turns of one chat plus a rolling summary of the evicted ones"""
+
+    def __init__(self):
+        self.turns: deque = deque()  # (role, content, tokens)
+        self.summary = ""
+        self.tokens = 0
+        self.last_active = time.time()
+
+    @property
+    def total_tokens(self) -> int:
+        return self.tokens + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def append(self, role: str, content: str) -> None:
+        tokens = estimate_tokens(content)
+        self.turns.append((role, content, tokens))
+        self.tokens += tokens
+        self.last_active = time.time()
+
+    def pop_exchange(self) -> List[Tuple[str, str]]:
+        """Remove the oldest user/assistant exchange so the history still starts with a user turn"""
+        evicted = []
+        while self.turns:
+            role, content, tokens = self.turns.popleft()
+            self.tokens -= tokens
+            evicted.append((role, content))
+            if self.turns and self.turns[0][0] == "user":
+                break
+        return evicted
+
+
+class ConversationMemory:
+    """
+    Per-chat conversation history under a token budget.
+
+    Each conversation keeps its latest turns verbatim within `token_budget`; older
+    exchanges are folded into a rolling summary by `summarizer` (or trimmed if none
+    is set). Conversations are kept in LRU order and the least recently active are
+    dropped once `max_conversations` or `max_total_tokens` is exceeded, or after
+    `idle_ttl` seconds without activity.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        max_total_tokens: int = DEFAULT_MAX_TOTAL_TOKENS,
+        max_conversations: int = DEFAULT_MAX_CONVERSATIONS,
+        idle_ttl: Optional[float] = DEFAULT_IDLE_TTL,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.token_budget = token_budget
+        self.max_total_tokens = max_total_tokens
+        self.max_conversations = max_conversations
+        self.idle_ttl = idle_ttl
+        self.summarizer = summarizer
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._total_tokens = 0
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], summarizer: Optional[Summarizer] = None) -> "ConversationMemory":
+        """
+        Build from a "conversation_memory" block:
+        {"token_budget": ..., "max_total_tokens": ..., "max_conversations": ..., "idle_ttl": ...}
+        """
+        return cls(
+            token_budget=config.get("token_budget", DEFAULT_TOKEN_BUDGET),
+            max_total_tokens=config.get("max_total_tokens", DEFAULT_MAX_TOTAL_TOKENS),
+            max_conversations=config.get("max_conversations", DEFAULT_MAX_CONVERSATIONS),
+            idle_ttl=config.get("idle_ttl", DEFAULT_IDLE_TTL),
+            summarizer=summarizer,
+        )
+
+    def _evict_idle(self, now: float) -> None:
+        while self._conversations:
+            key, conversation = next(iter(self._conversations.items()))
+            over_cap = (
+                len(self._conversations) > self.max_conversations
+                or self._total_tokens > self.max_total_tokens
+            )
+            idle = self.idle_ttl is not None and now - conversation.last_active > self.idle_ttl
+            if not (over_cap or idle):
+                break
+            self._conversations.popitem(last=False)
+            self._total_tokens -= conversation.total_tokens
+
+    def context(self, key: str) -> Tuple[str, List[Dict[str, str]]]:
+        """Return (summary, messages) for a conversation, oldest message first"""
+        with self._lock:
+            self._evict_idle(time.time())
+            conversation = self._conversations.get(key)
+            if conversation is None:
+                return "", []
+            self._conversations.move_to_end(key)
+            return conversation.summary, [
+                {"role": role, "content": content} for role, content, _ in conversation.turns
+            ]
+
+    def build_messages(self, key: str, prompt: str) -> Tuple[str, List[Dict[str, str]]]:
+        """Summary and a Messages API list ending with `prompt` as the new user turn"""
+        summary, messages = self.context(key)
+        return summary, messages + [{"role": "user", "content": prompt}]
+
+    def build_prompt(self, key: str, prompt: str) -> str:
+        """
+        Single prompt string carrying the summary and the history as a transcript,
+        for text-only providers. The system prompt is left untouched so it stays cacheable.
+        """
+        summary, messages = self.context(key)
+        parts = [self.summary_note(summary)] if summary else []
+        if messages:
+            transcript = "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages)
+            parts.append(f"Conversation so far:\n{transcript}\n\nUser: {prompt}")
+        else:
+            parts.append(prompt)
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def summary_note(summary: str) -> str:
+        """Text to place after the static system prompt, or "" without a summary"""
+        return f"Summary of the earlier conversation: {summary}" if summary else ""
+
+    def record(self, key: str, prompt: str, response: str) -> None:
+        """
+        Append an exchange and enforce the budgets. May call the summarizer, so
+        async callers should run it off the event loop.
+        """
+        with self._lock:
+            conversation = self._conversations.get(key)
+            if conversation is None:
+                conversation = self._conversations[key] = Conversation()
+            self._conversations.move_to_end(key)
+            before = conversation.total_tokens
+            conversation.append("user", prompt)
+            conversation.append("assistant", response)
+
+            evicted = []
+            while conversation.tokens > self.token_budget and len(conversation.turns) > 2:
+                evicted.extend(conversation.pop_exchange())
+            previous_summary = conversation.summary
+            self._total_tokens += conversation.total_tokens - before
+
+        if evicted:
+            summary = self._summarize(previous_summary, evicted)
+            with self._lock:
+                before = conversation.total_tokens
+                conversation.summary = summary
+                # The conversation may have been evicted while the summarizer ran
+                if self._conversations.get(key) is conversation:
+                    self._total_tokens += conversation.total_tokens - before
+
+        with self._lock:
+            self._evict_idle(time.time())
+
+    def _summarize(self, previous_summary: str, evicted: List[Tuple[str, str]]) -> str:
+        max_chars = int(self.token_budget * SUMMARY_BUDGET_FRACTION) * CHARS_PER_TOKEN
+        if self.summarizer is not None:
+            try:
+                return self.summarizer(previous_summary, evicted)[:max_chars]
+            except Exception as e:
+                logger.warning(f"Conversation summarization failed, trimming instead: {e}")
+        # Without a summarizer keep the tail of the evicted text as a crude summary
+        text = " ".join(filter(None, [previous_summary] + [f"{role}: {content}" for role, content in evicted]))
+        return text[-max_chars:]
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            conversation = self._conversations.pop(key, None)
+            if conversation is not None:
+                self._total_tokens -= conversation.total_tokens
+
+    @property
+    def total_tokens(self) -> int:
+        return self._total_tokens
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+
+def format_summary_request(previous_summary: str, evicted: List[Tuple[str, str]]) -> str:
+    """Prompt asking a model to merge evicted turns into the running summary"""
+    exchanges = "\n".join(f"{role.capitalize()}: {content}" for role, content in evicted)
+    return f"Earlier summary: {previous_summary or '(none)'}\n\nNew exchanges:\n{exchanges}"
+
+
+DEFAULT_SUMMARY_MODEL = "claude-3-5-haiku-20241022"
+DEFAULT_SUMMARY_MAX_TOKENS = 250
+
+
+def make_claude_summarizer(model: str = DEFAULT_SUMMARY_MODEL, max_tokens: int = DEFAULT_SUMMARY_MAX_TOKENS) -> Summarizer:
+    """Summarizer that calls Claude through the shared pooled client"""
+    from src.claude_client import extract_text, get_claude_client
+
+    def summarize(previous_summary: str, evicted: List[Tuple[str, str]]) -> str:
+        result = get_claude_client().create_message(
+            model=model,
+            max_tokens=max_tokens,
+            system=SUMMARY_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": format_summary_request(previous_summary, evicted)}],
+        )
+        return extract_text(result)
+
+    return summarize
@@ -58,6 +58,7 @@ class NetworkPerformanceMetrics(BaseModelWithArbitraryTypes):
     total_transactions: int
     sampling_period_seconds: int
     current_slot: int
+    non_vote_transactions_per_second: Optional[float] = None
 
 class TokenDeploymentResult(BaseModelWithArbitraryTypes):
     """Result of a token deployment operation."""
@@ -1,21 +1,45 @@
 import random
-import json
 from pathlib import Path
+from src.glyph_engine.asset_cache import load_json_asset
 
 PALETTES_PATH = Path(__file__).parent / "assets" / "glyph_palettes.json"
 
 def load_palettes():
-    with open(PALETTES_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_json_asset(PALETTES_PATH)
+
+def flatten_palettes(palettes):
+    return [symbol for symbols in palettes.values() for symbol in symbols]
+
+def load_symbols(palette=None):
+    """Symbols of one named palette, or of all palettes combined"""
+    if palette is not None:
+        return load_palettes()[palette]
+    return load_json_asset(PALETTES_PATH, flatten_palettes)
 
 def generate_ascii_art(lines=5, width=16):
-    palettes = load_palettes()
-    symbols = sum(palettes.values(), [])
+    symbols = load_symbols()
     output = []
     for _ in range(lines):
-        line = ''.join(random.choice(symbols) for _ in range(width))
+        line = ''.join(random.choices(symbols, k=width))
         output.append(line)
     return "\n".join(output)
 
+def generate_ascii_frames(count, lines=5, width=16, seed=None, palette=None):
+    """
+    Generate `count` ASCII frames at once from a seeded NumPy generator, for
+    animations and bulk output. The same seed always gives the same frames.
+    """
+    import numpy as np
+
+    symbols = np.array(load_symbols(palette), dtype="<U1")
+    rng = np.random.default_rng(seed)
+    # One extra column per line holds the newline, so each frame is a contiguous run of characters
+    grid = np.empty((count, lines, width + 1), dtype="<U1")
+    grid[:, :, :width] = symbols[rng.integers(0, len(symbols), size=(count, lines, width))]
+    grid[:, :, width] = "\n"
+    # Reinterpret every frame's characters as a single string and drop the final newline
+    frames = grid.reshape(count, lines * (width + 1)).view(f"<U{lines * (width + 1)}")
+    return [frame[:-1] for frame in frames[:, 0].tolist()]
+
 if __name__ == "__main__":
     print(generate_ascii_art())
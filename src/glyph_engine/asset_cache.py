@@ -0,0 +1,34 @@
+import json
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# (path, transform) -> (mtime_ns, size, value)
+_cache: Dict[Tuple[str, Optional[Callable]], Tuple[int, int, Any]] = {}
+_lock = Lock()
+
+
+def load_json_asset(path: Path, transform: Optional[Callable[[Any], Any]] = None) -> Any:
+    """
+    Load a JSON asset once and reuse it until the file changes on disk.
+
+    `transform` derives a value from the parsed JSON (e.g. a flattened symbol
+    list); it is memoized alongside the file, so it only reruns after an edit.
+    Callers must treat the returned value as read-only.
+    """
+    key = (str(path), transform)
+    stat = os.stat(path)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+    with open(path, "r", encoding="utf-8") as f:
+        value = json.load(f)
+    if transform is not None:
+        value = transform(value)
+
+    with _lock:
+        _cache[key] = (stat.st_mtime_ns, stat.st_size, value)
+    return value
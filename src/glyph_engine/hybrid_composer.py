@@ -2,11 +2,11 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from glyph_engine.ascii_generator import generate_ascii_art
-from glyph_engine.svg_generator import generate_svg
+from glyph_engine.svg_generator import generate_svg_string
+from src.svg_converter import get_svg_rasterizer
 from PIL import Image, ImageDraw, ImageFont
-import cairosvg
+from functools import lru_cache
 from io import BytesIO
-from pathlib import Path
 from datetime import datetime
 
 OUTPUT_DIR = Path(__file__).parent / "output"
@@ -14,13 +14,17 @@ FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
 DEFAULT_WIDTH = 1200
 DEFAULT_HEIGHT = 675
 
-def overlay_ascii_on_image(png_path, ascii_text, output_path):
-    image = Image.open(png_path).convert("RGBA")
-    draw = ImageDraw.Draw(image)
+@lru_cache(maxsize=8)
+def load_font(size=20):
     try:
-        font = ImageFont.truetype(FONT_PATH, 20)
+        return ImageFont.truetype(FONT_PATH, size)
     except IOError:
-        font = ImageFont.load_default()
+        return ImageFont.load_default()
+
+def overlay_ascii_on_image(image, ascii_text):
+    """Draw the ASCII block over the bottom-left corner of a PIL image, in place"""
+    draw = ImageDraw.Draw(image)
+    font = load_font()
     lines = ascii_text.split("\n")
     line_height = font.getbbox("A")[3]
     x = 20
@@ -28,27 +32,28 @@ def overlay_ascii_on_image(png_path, ascii_text, output_path):
     for line in lines:
         draw.text((x, y), line, font=font, fill=(255, 255, 255, 180))
         y += line_height
-    image.save(output_path)
-    return output_path
+    return image
 
-def compose_hybrid_output():
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+def compose_hybrid_output(style_name="cyber_sigil"):
+    """
+    Compose a glyph transmission entirely in memory:
+    SVG markup -> PNG bytes (rendered on the shared pool) -> PIL overlay -> upload buffer.
+    Returns (caption, BytesIO of the final PNG).
+    """
     ascii_art = generate_ascii_art(lines=6, width=28)
-    filename = f"glyph_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    svg_path = generate_svg(style_name="cyber_sigil", filename=f"{filename}.svg")
-    with open(svg_path, "r", encoding="utf-8") as f:
-        svg_content = f.read()
-    png_bytes = BytesIO()
-    cairosvg.svg2png(bytestring=svg_content.encode("utf-8"), write_to=png_bytes,
-                     output_width=DEFAULT_WIDTH, output_height=DEFAULT_HEIGHT)
-    base_png_path = OUTPUT_DIR / f"{filename}_base.png"
-    with open(base_png_path, "wb") as f:
-        f.write(png_bytes.getvalue())
-    final_png_path = OUTPUT_DIR / f"{filename}_final.png"
-    overlay_ascii_on_image(base_png_path, ascii_art, final_png_path)
+    svg_content = generate_svg_string(style_name=style_name)
+    png_bytes = get_svg_rasterizer().render(svg_content, DEFAULT_WIDTH, DEFAULT_HEIGHT)
+    image = Image.open(BytesIO(png_bytes)).convert("RGBA")
+    overlay_ascii_on_image(image, ascii_art)
+    output = BytesIO()
+    image.save(output, format="PNG")
+    output.seek(0)
     caption = "[glyph transmission initiated]"
-    return caption, str(final_png_path)
+    return caption, output
 
 if __name__ == "__main__":
-    caption, path = compose_hybrid_output()
+    caption, image_bytes = compose_hybrid_output()
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    path = OUTPUT_DIR / f"glyph_{datetime.now().strftime('%Y%m%d_%H%M%S')}_final.png"
+    path.write_bytes(image_bytes.getvalue())
     print(caption, path)
@@ -1,17 +1,16 @@
 import random
-import json
 import svgwrite
 from pathlib import Path
+from src.glyph_engine.asset_cache import load_json_asset
 
 STYLE_PATH = Path(__file__).parent / "assets" / "style_presets.json"
 SVG_OUTPUT_DIR = Path(__file__).parent / "output"
 SVG_OUTPUT_DIR.mkdir(exist_ok=True)
 
 def load_styles():
-    with open(STYLE_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_json_asset(STYLE_PATH)
 
-def generate_svg(style_name="cyber_sigil", filename="sigil.svg"):
+def _build_drawing(style_name, filename=None):
     styles = load_styles()
     style = styles.get(style_name)
 
@@ -22,7 +21,7 @@ def generate_svg(style_name="cyber_sigil", filename="sigil.svg"):
     if style_name == "cyber_sigil":
         raise NotImplementedError("The 'cyber_sigil' style is temporarily disabled for refinement.")
 
-    dwg = svgwrite.Drawing(SVG_OUTPUT_DIR / filename, size=("512px", "512px"))
+    dwg = svgwrite.Drawing(filename, size=("512px", "512px"))
 
     for _ in range(20):
         shape = random.choice(style["shapes"])
@@ -42,6 +41,14 @@ def generate_svg(style_name="cyber_sigil", filename="sigil.svg"):
                              end=(random.randint(0, 512), random.randint(0, 512)),
                              stroke=color, stroke_width=2))
 
+    return dwg
+
+def generate_svg_string(style_name="cyber_sigil"):
+    """Generate a sigil and return the SVG markup without touching disk"""
+    return _build_drawing(style_name).tostring()
+
+def generate_svg(style_name="cyber_sigil", filename="sigil.svg"):
+    dwg = _build_drawing(style_name, SVG_OUTPUT_DIR / filename)
     dwg.save()
     return SVG_OUTPUT_DIR / filename
 
@@ -0,0 +1,406 @@
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.core import RPCException
+
+from solders.compute_budget import set_compute_unit_limit  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.instruction import Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0, to_bytes_versioned  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.instructions import (
+    TransferCheckedParams,
+    create_idempotent_associated_token_account,
+    get_associated_token_address,
+    transfer_checked,
+)
+
+from src.constants import LAMPORTS_PER_SOL
+from src.helpers.solana.mint_cache import get_mint_cache
+from src.helpers.solana.rpc_pool import get_account_loader
+from src.helpers.solana.tx_pipeline import (
+    TransactionFailedError,
+    get_blockhash_cache,
+    get_transaction_pipeline,
+    preflight_opts,
+)
+from src.state_store import DEFAULT_STATE_DIR, SQLiteStateBackend, StateBackend
+
+logger = logging.getLogger("helpers.solana.batch_transfer")
+
+MAX_TRANSACTION_SIZE = 1232  # bytes, including signatures
+MAX_COMPUTE_UNITS = 1_400_000
+# Conservative compute estimates per instruction
+SOL_TRANSFER_UNITS = 450
+SPL_TRANSFER_UNITS = 6_500
+CREATE_ATA_UNITS = 35_000
+COMPUTE_UNIT_MARGIN = 1.2
+BATCH_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+MAX_SIGNATURES_PER_REQUEST = 256
+
+
+@dataclass
+class TransferRow:
+    recipient: str
+    amount: float
+    mint: Optional[str] = None  # None for native SOL
+
+    @classmethod
+    def parse(cls, row: Union[Dict[str, Any], Sequence[Any]]) -> "TransferRow":
+        if isinstance(row, dict):
+            recipient, amount, mint = row["recipient"], row["amount"], row.get("mint")
+        else:
+            recipient, amount, mint = (list(row) + [None])[:3]
+        mint = str(mint).strip() if mint is not None else ""
+        return cls(str(recipient).strip(), float(amount), mint if mint.upper() not in ("", "SOL") else None)
+
+
+def load_transfer_rows(
+    transfers: Optional[Iterable[Union[Dict[str, Any], Sequence[Any]]]] = None,
+    csv_path: Optional[str] = None,
+) -> List[TransferRow]:
+    """
+    Rows from a list of {"recipient", "amount", "mint"} dicts or (recipient, amount, mint)
+    tuples, or from a CSV file with those columns (header optional, mint optional)
+    """
+    rows = [TransferRow.parse(row) for row in transfers or []]
+    if csv_path:
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for index, record in enumerate(csv.reader(f)):
+                if not record or not record[0].strip() or record[0].lstrip().startswith("#"):
+                    continue
+                try:
+                    rows.append(TransferRow.parse(record))
+                except ValueError:
+                    if index == 0:
+                        continue  # header
+                    raise ValueError(f"Invalid transfer on line {index + 1}: {record}")
+    for row in rows:
+        if row.amount <= 0:
+            raise ValueError(f"Invalid amount {row.amount} for {row.recipient}")
+        Pubkey.from_string(row.recipient)
+    return rows
+
+
+def batch_id_for(wallet: Pubkey, rows: Sequence[TransferRow]) -> str:
+    """Fingerprint of a payout list, checked when a batch is resumed"""
+    payload = json.dumps([str(wallet)] + [[row.recipient, row.amount, row.mint] for row in rows])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+@dataclass
+class _Unit:
+    """Instructions that must land in the same transaction"""
+    rows: List[int]
+    instructions: List[Instruction]
+    compute_units: int
+    creates: Optional[Pubkey] = None  # ATA created by the first instruction
+
+
+class SolanaBatchTransferHelper:
+    """Pays many recipients with as few transactions as fit, resumably."""
+
+    @staticmethod
+    async def batch_transfer(
+        async_client: AsyncClient,
+        wallet: Keypair,
+        rows: Sequence[TransferRow],
+        batch_id: Optional[str] = None,
+        backend: Optional[StateBackend] = None,
+    ) -> Dict[str, Any]:
+        """
+        Transfer SOL and SPL tokens to many recipients.
+
+        Transfers are packed into as few transactions as the size and compute limits
+        allow. Missing recipient token accounts are created in the same transaction
+        as their transfer, and the transactions go out concurrently through the
+        shared pipeline. Progress is saved per row to `backend` (by default a file
+        named after the batch id).
+
+        Each call starts a new batch unless `batch_id` names an earlier one, e.g.
+        from its summary; then only rows that aren't confirmed yet are sent. A row
+        whose transaction may still land is never sent again until its blockhash
+        has expired.
+
+        Returns:
+            Summary with the batch id, confirmed row count, signatures and failures.
+        """
+        owner = wallet.pubkey()
+        fingerprint = batch_id_for(owner, rows)
+        batch_id = batch_id or uuid.uuid4().hex[:16]
+        if not BATCH_ID_PATTERN.match(batch_id):
+            raise ValueError(f"Invalid batch id {batch_id!r}; use letters, digits, '-' and '_'")
+        backend = backend or SQLiteStateBackend(DEFAULT_STATE_DIR / "batch_transfers" / f"{batch_id}.sqlite")
+        state = backend.load()
+        if state.get("fingerprint", fingerprint) != fingerprint:
+            raise ValueError(f"Batch {batch_id} was started with a different transfer list or wallet")
+        progress: Dict[str, Dict[str, Any]] = state.get("rows", {})
+
+        def save() -> None:
+            backend.save({"fingerprint": fingerprint, "rows": progress})
+
+        await SolanaBatchTransferHelper._reconcile(async_client, progress)
+        save()
+        confirmed_before = sum(entry.get("status") == "confirmed" for entry in progress.values())
+        held = SolanaBatchTransferHelper._in_flight(progress)
+        todo = [
+            index
+            for index in range(len(rows))
+            if progress.get(str(index), {}).get("status") != "confirmed" and index not in held
+        ]
+        logger.info(f"Batch {batch_id}: {confirmed_before}/{len(rows)} transfers already confirmed")
+        if held:
+            logger.warning(f"Batch {batch_id}: holding back {len(held)} transfers whose transactions may still land")
+
+        units = await SolanaBatchTransferHelper._build_units(async_client, owner, rows, todo)
+        transactions = SolanaBatchTransferHelper._pack(owner, units)
+        logger.info(f"Batch {batch_id}: sending {len(todo)} transfers in {len(transactions)} transactions")
+
+        pipeline = get_transaction_pipeline(async_client)
+        blockhashes = get_blockhash_cache(async_client)
+        slots = asyncio.Semaphore(pipeline.max_in_flight)
+        # Simulate at the commitment the blockhashes come from
+        opts = preflight_opts(async_client)
+
+        async def send(instructions: List[Instruction], row_indexes: List[int]) -> None:
+            async with slots:
+                # Sign just before sending, so a long batch never uses a stale blockhash
+                blockhash = await blockhashes.get()
+                tx = VersionedTransaction(
+                    MessageV0.try_compile(owner, instructions, [], blockhash.blockhash), [wallet]
+                )
+                signature = str(tx.signatures[0])
+                # Record the signature and when it expires before it can land, so a crash
+                # mid-batch can't pay twice
+                SolanaBatchTransferHelper._mark(
+                    progress,
+                    row_indexes,
+                    "sent",
+                    signature=signature,
+                    last_valid_block_height=blockhash.last_valid_block_height,
+                    sent_at=time.time(),
+                )
+                save()
+                try:
+                    await (await pipeline.submit(tx, opts, last_valid_block_height=blockhash.last_valid_block_height))
+                    SolanaBatchTransferHelper._mark(progress, row_indexes, "confirmed", signature=signature)
+                except (TransactionFailedError, RPCException) as e:
+                    # Expired, failed on chain or rejected by the RPC (e.g. in preflight), so
+                    # nothing moved and the rows can be sent again
+                    SolanaBatchTransferHelper._mark(progress, row_indexes, "failed", signature=None, error=str(e))
+                except Exception as e:
+                    # The send itself errored (e.g. timed out), but the transaction may still have gone out
+                    SolanaBatchTransferHelper._mark(progress, row_indexes, "sent", error=str(e))
+                save()
+
+        await asyncio.gather(*(send(instructions, row_indexes) for instructions, row_indexes in transactions))
+
+        confirmed = [entry for entry in progress.values() if entry.get("status") == "confirmed"]
+        failed = {
+            int(index): entry.get("error")
+            for index, entry in progress.items()
+            if entry.get("status") == "failed" and not entry.get("signature")
+        }
+        pending = SolanaBatchTransferHelper._in_flight(progress)
+        summary = {
+            "batch_id": batch_id,
+            "transfers": len(rows),
+            "confirmed": len(confirmed),
+            "failed": [
+                {"recipient": rows[index].recipient, "amount": rows[index].amount, "mint": rows[index].mint, "error": error}
+                for index, error in sorted(failed.items())
+            ],
+            "pending": [
+                {"recipient": rows[index].recipient, "signature": progress[str(index)]["signature"], "error": progress[str(index)].get("error")}
+                for index in sorted(pending)
+            ],
+            "transactions_sent": len(transactions),
+            "signatures": sorted({entry["signature"] for entry in confirmed}),
+        }
+        logger.info(
+            f"Batch {batch_id}: {len(confirmed)}/{len(rows)} transfers confirmed, {len(failed)} failed, "
+            f"{len(pending)} pending"
+        )
+        return summary
+
+    @staticmethod
+    def _mark(progress: Dict[str, Dict[str, Any]], row_indexes: List[int], status: str, **fields) -> None:
+        for index in row_indexes:
+            progress[str(index)] = {**progress.get(str(index), {}), "status": status, "updated_at": time.time(), **fields}
+
+    @staticmethod
+    def _in_flight(progress: Dict[str, Dict[str, Any]]) -> set:
+        """
+        Rows whose transaction may still land, which must not be sent again. A row
+        keeps its signature until it is confirmed or known never to land.
+        """
+        return {
+            int(index)
+            for index, entry in progress.items()
+            if entry.get("status") != "confirmed" and entry.get("signature")
+        }
+
+    @staticmethod
+    async def _reconcile(async_client: AsyncClient, progress: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Settle rows a previous run sent but didn't see confirmed. A transaction that
+        timed out may still have landed later, so every unconfirmed signature is checked.
+        """
+        sent = {}
+        for index, entry in progress.items():
+            if entry.get("status") != "confirmed" and entry.get("signature"):
+                sent.setdefault(entry["signature"], []).append(int(index))
+        if not sent:
+            return
+
+        # Look far back: the transaction may have landed long before this run
+        signatures = list(sent)
+        statuses = []
+        for i in range(0, len(signatures), MAX_SIGNATURES_PER_REQUEST):
+            response = await async_client.get_signature_statuses(
+                [Signature.from_string(signature) for signature in signatures[i : i + MAX_SIGNATURES_PER_REQUEST]],
+                search_transaction_history=True,
+            )
+            statuses.extend(response.value)
+
+        pipeline = get_transaction_pipeline(async_client)
+
+        async def settle(signature: str, status) -> None:
+            row_indexes = sent[signature]
+            if status is not None:
+                if status.err is None:
+                    SolanaBatchTransferHelper._mark(progress, row_indexes, "confirmed", signature=signature)
+                else:
+                    SolanaBatchTransferHelper._mark(
+                        progress, row_indexes, "failed", signature=None, error=f"Transaction {signature} failed: {status.err}"
+                    )
+                return
+            last_valid_block_height = progress[str(row_indexes[0])].get("last_valid_block_height")
+            if last_valid_block_height is None:
+                # Without its expiry there is no telling whether it can still land
+                logger.warning(f"Transaction {signature} has no recorded blockhash expiry; not resending its rows")
+                return
+            try:
+                # Not seen yet: it can land until the chain passes its blockhash's last valid height
+                await pipeline.confirm(Signature.from_string(signature), last_valid_block_height=last_valid_block_height)
+                SolanaBatchTransferHelper._mark(progress, row_indexes, "confirmed", signature=signature)
+            except TransactionFailedError as e:
+                # Expired or failed on chain, so nothing moved; forget the signature so the rows are sent afresh
+                SolanaBatchTransferHelper._mark(progress, row_indexes, "failed", signature=None, error=str(e))
+            except Exception as e:
+                logger.warning(f"Could not settle transaction {signature}, not resending its rows: {e}")
+
+        await asyncio.gather(*(settle(signature, status) for signature, status in zip(signatures, statuses)))
+
+    @staticmethod
+    async def _build_units(
+        async_client: AsyncClient, owner: Pubkey, rows: Sequence[TransferRow], todo: List[int]
+    ) -> List[_Unit]:
+        mints = {rows[index].mint for index in todo if rows[index].mint}
+        destinations = {
+            index: get_associated_token_address(Pubkey.from_string(rows[index].recipient), Pubkey.from_string(rows[index].mint))
+            for index in todo
+            if rows[index].mint
+        }
+        unique_destinations = list(dict.fromkeys(destinations.values()))
+        # Decimals and existing recipient token accounts, in one batched read
+        decimals, accounts = await asyncio.gather(
+            get_mint_cache().get_many_decimals(async_client, mints),
+            get_account_loader(async_client).load_many(unique_destinations),
+        )
+        existing = {ata for ata, account in zip(unique_destinations, accounts) if account is not None}
+
+        units = []
+        for index in todo:
+            row = rows[index]
+            recipient = Pubkey.from_string(row.recipient)
+            if row.mint is None:
+                ix = transfer(
+                    TransferParams(
+                        from_pubkey=owner, to_pubkey=recipient, lamports=int(row.amount * LAMPORTS_PER_SOL)
+                    )
+                )
+                units.append(_Unit([index], [ix], SOL_TRANSFER_UNITS))
+                continue
+
+            mint = Pubkey.from_string(row.mint)
+            destination = destinations[index]
+            ix = transfer_checked(
+                TransferCheckedParams(
+                    source=get_associated_token_address(owner, mint),
+                    dest=destination,
+                    owner=owner,
+                    mint=mint,
+                    amount=math.floor(row.amount * 10 ** decimals[row.mint]),
+                    decimals=decimals[row.mint],
+                    program_id=TOKEN_PROGRAM_ID,
+                )
+            )
+            if destination in existing:
+                units.append(_Unit([index], [ix], SPL_TRANSFER_UNITS))
+            else:
+                create = create_idempotent_associated_token_account(owner, recipient, mint)
+                units.append(_Unit([index], [create, ix], CREATE_ATA_UNITS + SPL_TRANSFER_UNITS, creates=destination))
+        return units
+
+    @staticmethod
+    def _transaction_size(owner: Pubkey, instructions: List[Instruction]) -> int:
+        message = MessageV0.try_compile(owner, instructions, [], Hash.default())
+        return 1 + 64 + len(to_bytes_versioned(message))
+
+    @staticmethod
+    def _pack(owner: Pubkey, units: List[_Unit]) -> List[tuple]:
+        """Greedily fill transactions with whole units up to the size and compute limits"""
+
+        def finish(instructions: List[Instruction], compute_units: int) -> List[Instruction]:
+            limit = min(int(compute_units * COMPUTE_UNIT_MARGIN), MAX_COMPUTE_UNITS)
+            return [set_compute_unit_limit(limit)] + instructions
+
+        transactions = []
+        instructions: List[Instruction] = []
+        row_indexes: List[int] = []
+        compute_units = 0
+        created = set()
+        for unit in units:
+            unit_instructions = unit.instructions
+            unit_units = unit.compute_units
+            if unit.creates is not None and unit.creates in created:
+                # An earlier row in this transaction already creates the account
+                unit_instructions, unit_units = unit.instructions[1:], SPL_TRANSFER_UNITS
+
+            candidate = instructions + unit_instructions
+            fits = (
+                compute_units + unit_units <= MAX_COMPUTE_UNITS / COMPUTE_UNIT_MARGIN
+                and SolanaBatchTransferHelper._transaction_size(owner, finish(candidate, compute_units + unit_units))
+                <= MAX_TRANSACTION_SIZE
+            )
+            if not fits and instructions:
+                transactions.append((finish(instructions, compute_units), row_indexes))
+                instructions, row_indexes, compute_units, created = [], [], 0, set()
+                unit_instructions, unit_units = unit.instructions, unit.compute_units
+
+            instructions = instructions + unit_instructions
+            row_indexes = row_indexes + unit.rows
+            compute_units += unit_units
+            if unit.creates is not None:
+                created.add(unit.creates)
+        if instructions:
+            transactions.append((finish(instructions, compute_units), row_indexes))
+        return transactions
@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional, Union
+
+from solana.rpc.async_api import AsyncClient
+
+from solders.pubkey import Pubkey  # type: ignore
+
+from src.constants import SPL_TOKENS
+from src.helpers.solana.rpc_pool import get_account_loader
+from src.state_store import DEFAULT_STATE_DIR, MemoryStateBackend, SQLiteStateBackend, StateBackend
+
+logger = logging.getLogger("helpers.solana.mint_cache")
+
+# Byte offsets in SPL Token mint account data
+MINT_DECIMALS_OFFSET = 44
+MINT_INITIALIZED_OFFSET = 45
+
+MintAddress = Union[str, Pubkey]
+
+
+def parse_mint_decimals(data: bytes) -> int:
+    """Decimals of an initialized SPL mint account"""
+    if len(data) <= MINT_INITIALIZED_OFFSET or not data[MINT_INITIALIZED_OFFSET]:
+        raise ValueError("Token mint is not initialized.")
+    return data[MINT_DECIMALS_OFFSET]
+
+
+class MintCache:
+    """
+    Decimals of SPL mints, keyed by mint address.
+
+    A mint's decimals never change, so each mint is read from the chain once per
+    process (or once ever, with a persistent backend) instead of a get_mint_info()
+    round trip before every trade, transfer and balance read. Misses go through
+    the client's AccountLoader, so they share getMultipleAccounts calls with
+    whatever else is being read at the same time.
+    """
+
+    def __init__(self, backend: Optional[StateBackend] = None):
+        self.backend = backend or MemoryStateBackend()
+        self._decimals: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0}
+        try:
+            self._decimals.update({key: int(value) for key, value in self.backend.load().items()})
+        except Exception as e:
+            logger.warning(f"Could not load cached mint decimals: {e}")
+
+    @classmethod
+    def from_env(cls) -> "MintCache":
+        """
+        Persist to SOLANA_MINT_CACHE_PATH (default ~/.zerepy/state/solana_mints.sqlite),
+        or keep the cache in memory when SOLANA_MINT_CACHE_PERSIST is "false"
+        """
+        if os.environ.get("SOLANA_MINT_CACHE_PERSIST", "true").lower() == "false":
+            return cls()
+        path = os.environ.get("SOLANA_MINT_CACHE_PATH") or str(DEFAULT_STATE_DIR / "solana_mints.sqlite")
+        try:
+            return cls(SQLiteStateBackend(path))
+        except Exception as e:
+            logger.warning(f"Mint cache at {path} unavailable, keeping it in memory: {e}")
+            return cls()
+
+    def get(self, mint: MintAddress) -> Optional[int]:
+        with self._lock:
+            return self._decimals.get(str(mint))
+
+    def put_many(self, decimals: Dict[str, int]) -> None:
+        with self._lock:
+            self._decimals.update(decimals)
+            snapshot = dict(self._decimals)
+        try:
+            self.backend.save(snapshot)
+        except Exception as e:
+            logger.warning(f"Could not save mint decimals: {e}")
+
+    async def get_many_decimals(self, async_client: AsyncClient, mints: Iterable[MintAddress]) -> Dict[str, int]:
+        """Decimals for every mint, fetching all misses in one batched read"""
+        addresses = list(dict.fromkeys(str(mint) for mint in mints))
+        with self._lock:
+            found = {address: self._decimals[address] for address in addresses if address in self._decimals}
+        missing = [address for address in addresses if address not in found]
+        self.metrics["hits"] += len(found)
+        if not missing:
+            return found
+
+        self.metrics["misses"] += len(missing)
+        accounts = await get_account_loader(async_client).load_many(
+            [Pubkey.from_string(address) for address in missing]
+        )
+        fetched = {}
+        for address, account in zip(missing, accounts):
+            if account is None:
+                raise ValueError(f"Token mint {address} not found.")
+            fetched[address] = parse_mint_decimals(bytes(account.data))
+        self.put_many(fetched)
+        return {**found, **fetched}
+
+    async def get_decimals(self, async_client: AsyncClient, mint: MintAddress) -> int:
+        return (await self.get_many_decimals(async_client, [mint]))[str(mint)]
+
+    async def prewarm(self, async_client: AsyncClient, mints: Optional[Iterable[MintAddress]] = None) -> None:
+        """Load the well-known SPL_TOKENS mints (or `mints`) in one request; failures are only logged"""
+        try:
+            await self.get_many_decimals(async_client, SPL_TOKENS.values() if mints is None else mints)
+        except Exception as e:
+            logger.warning(f"Could not prewarm mint cache: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.metrics, "cached": len(self._decimals)}
+
+
+_shared_cache: Optional[MintCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_mint_cache() -> MintCache:
+    """Process-wide MintCache shared by the Solana helpers"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = MintCache.from_env()
+        return _shared_cache
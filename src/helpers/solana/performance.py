@@ -1,46 +1,67 @@
-from venv import logger
-from typing import List, Optional
+import asyncio
+import logging
+import time
+import weakref
+from array import array
+from bisect import bisect_right
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
 from solana.rpc.async_api import AsyncClient
 from solders.keypair import Keypair  # type: ignore
-from src.types import (
+from src.custom_types import (
     NetworkPerformanceMetrics,
 )
-from solana.rpc.async_api import AsyncClient
-from solders.keypair import Keypair  # type: ignore
+
+logger = logging.getLogger("helpers.solana.performance")
+
+# The RPC publishes one performance sample per ~60s period
+DEFAULT_SAMPLE_INTERVAL = 60  # seconds
+DEFAULT_HISTORY_SIZE = 720  # samples, i.e. 12 hours
+MAX_SAMPLES_PER_REQUEST = 720  # getRecentPerformanceSamples limit
+MAX_SAMPLER_BACKOFF = 600  # seconds
+# Percentile buckets: geometric 5% steps from 1 to ~1M TPS
+TPS_BUCKETS = [1.05**i for i in range(284)]
 
 
 async def fetch_performance_samples(
-    async_client: AsyncClient, wallet: Keypair, sample_count: int = 1
+    async_client: AsyncClient, sample_count: int = 1
 ) -> List[NetworkPerformanceMetrics]:
     """
     Fetch detailed performance metrics for a specified number of samples.
 
     Args:
-        agent: An instance of SolanaAgent providing the RPC connection.
+        async_client: RPC client to query.
         sample_count: Number of performance samples to retrieve (default: 1).
 
     Returns:
-        A list of NetworkPerformanceMetrics objects.
+        A list of NetworkPerformanceMetrics objects, newest first.
 
     Raises:
         ValueError: If performance samples are unavailable or invalid.
     """
 
     try:
-        performance_samples = await async_client.get_recent_performance_samples(
-            sample_count
-        )
+        response = await async_client.get_recent_performance_samples(sample_count)
+        performance_samples = [
+            sample for sample in response.value if sample.sample_period_secs > 0
+        ]
 
         if not performance_samples:
             raise ValueError("No performance samples available.")
 
         return [
             NetworkPerformanceMetrics(
-                transactions_per_second=sample["num_transactions"]
-                / sample["sample_period_secs"],
-                total_transactions=sample["num_transactions"],
-                sampling_period_seconds=sample["sample_period_secs"],
-                current_slot=sample["slot"],
+                transactions_per_second=sample.num_transactions
+                / sample.sample_period_secs,
+                total_transactions=sample.num_transactions,
+                sampling_period_seconds=sample.sample_period_secs,
+                current_slot=sample.slot,
+                non_vote_transactions_per_second=(
+                    sample.num_non_votetransactions / sample.sample_period_secs
+                    if sample.num_non_votetransactions is not None
+                    else None
+                ),
             )
             for sample in performance_samples
         ]
@@ -51,27 +72,204 @@ async def fetch_performance_samples(
         ) from error
 
 
+class RollingWindow:
+    """
+    The last `capacity` values in a fixed-size array ring buffer.
+
+    Mean comes from a running sum and max from a monotonic queue, both O(1) per
+    push. Percentiles are estimated from a histogram over `buckets` that is
+    updated as values enter and leave, so they cost a fixed bucket walk instead
+    of sorting the window.
+    """
+
+    def __init__(self, capacity: int, buckets: Sequence[float] = TPS_BUCKETS):
+        self.capacity = max(1, capacity)
+        self.buckets = list(buckets)
+        self._values = array("d", [0.0] * self.capacity)
+        self._start = 0
+        self._count = 0
+        self._sum = 0.0
+        self._pushed = 0
+        self._max: deque = deque()  # (push index, value), values decreasing
+        self._histogram = [0] * (len(self.buckets) + 1)
+
+    def _bucket(self, value: float) -> int:
+        return bisect_right(self.buckets, value)
+
+    def push(self, value: float) -> None:
+        if self._count == self.capacity:
+            oldest = self._values[self._start]
+            self._sum -= oldest
+            self._histogram[self._bucket(oldest)] -= 1
+            if self._max and self._max[0][0] == self._pushed - self._count:
+                self._max.popleft()
+            self._start = (self._start + 1) % self.capacity
+            self._count -= 1
+
+        self._values[(self._start + self._count) % self.capacity] = value
+        self._count += 1
+        self._sum += value
+        self._histogram[self._bucket(value)] += 1
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((self._pushed, value))
+        self._pushed += 1
+
+    def mean(self) -> Optional[float]:
+        return self._sum / self._count if self._count else None
+
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    def latest(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return self._values[(self._start + self._count - 1) % self.capacity]
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Estimate of the p-th percentile (0-100), interpolated within a histogram bucket"""
+        if not self._count:
+            return None
+        rank = max(1.0, p / 100 * self._count)
+        seen = 0
+        for index, count in enumerate(self._histogram):
+            if count and seen + count >= rank:
+                low = self.buckets[index - 1] if index > 0 else 0.0
+                high = self.buckets[index] if index < len(self.buckets) else self.max()
+                return min(low + (high - low) * (rank - seen) / count, self.max())
+            seen += count
+        return self.max()
+
+    def values(self) -> List[float]:
+        """Window contents, oldest first"""
+        return [self._values[(self._start + i) % self.capacity] for i in range(self._count)]
+
+    def clear(self) -> None:
+        self._start = self._count = 0
+        self._sum = 0.0
+        self._max.clear()
+        self._histogram = [0] * (len(self.buckets) + 1)
+
+    def __len__(self) -> int:
+        return self._count
+
+
 class SolanaPerformanceTracker:
     """
     A utility class for tracking and analyzing Solana network performance metrics.
+
+    start() runs a sampler on the current event loop that backfills the history
+    and then records one performance sample per `interval`, so TPS and
+    congestion reads are served from memory instead of an RPC call each.
     """
 
-    def __init__(self, async_client: AsyncClient, wallet: Keypair):
+    def __init__(
+        self,
+        async_client: AsyncClient,
+        wallet: Optional[Keypair] = None,
+        capacity: int = DEFAULT_HISTORY_SIZE,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ):
         self.async_client = async_client
         self.wallet = wallet
-        self.metrics_history: List[NetworkPerformanceMetrics] = []
+        self.interval = interval
+        self.tps = RollingWindow(capacity)
+        self.non_vote_tps = RollingWindow(capacity)
+        self.latest: Optional[NetworkPerformanceMetrics] = None
+        self._latest_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._failures = 0
 
-    def record_latest_metrics(self) -> NetworkPerformanceMetrics:
+    def _add(self, metrics: NetworkPerformanceMetrics) -> bool:
+        if self.latest is not None and metrics.current_slot <= self.latest.current_slot:
+            return False
+        self.tps.push(metrics.transactions_per_second)
+        if metrics.non_vote_transactions_per_second is not None:
+            self.non_vote_tps.push(metrics.non_vote_transactions_per_second)
+        self.latest = metrics
+        return True
+
+    async def record_latest_metrics(self) -> NetworkPerformanceMetrics:
         """
         Fetch the latest performance metrics and add them to the history.
 
         Returns:
             The most recent NetworkPerformanceMetrics object.
         """
-        latest_metrics = fetch_performance_samples(self.async_client, 1)
-        self.metrics_history.append(latest_metrics[0])
+        latest_metrics = await fetch_performance_samples(self.async_client, 1)
+        self._add(latest_metrics[0])
+        self._latest_at = time.monotonic()
         return latest_metrics[0]
 
+    async def backfill(self, sample_count: Optional[int] = None) -> int:
+        """Load up to `sample_count` past samples (default: a full window) in one request"""
+        count = min(sample_count or self.tps.capacity, MAX_SAMPLES_PER_REQUEST)
+        samples = await fetch_performance_samples(self.async_client, count)
+        added = sum(self._add(metrics) for metrics in reversed(samples))
+        self._latest_at = time.monotonic()
+        return added
+
+    def start(self) -> None:
+        """Start the background sampler on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            if self._latest_at is None or time.monotonic() - self._latest_at >= self.interval:
+                try:
+                    if len(self.tps) == 0:
+                        await self.backfill()
+                    else:
+                        await self.record_latest_metrics()
+                    self._failures = 0
+                except Exception as e:
+                    self._failures += 1
+                    logger.warning(f"Performance sampling failed: {e}")
+            if self._failures:
+                delay = min(self.interval * 2 ** self._failures, MAX_SAMPLER_BACKOFF)
+            else:
+                delay = self.interval - (time.monotonic() - self._latest_at)
+            await asyncio.sleep(max(delay, 1))
+
+    def _is_fresh(self) -> bool:
+        return self._latest_at is not None and time.monotonic() - self._latest_at < 2 * self.interval
+
+    async def current_tps(self) -> float:
+        """Latest TPS, from the sampler when it's running and fresh, otherwise fetched now"""
+        if not self._is_fresh() or self.latest is None:
+            await self.record_latest_metrics()
+        self.start()
+        return self.latest.transactions_per_second
+
+    async def stats(self) -> Dict[str, Any]:
+        """Rolling TPS statistics over the sampled window"""
+        if len(self.tps) == 0:
+            await self.backfill()
+        elif not self._is_fresh():
+            await self.record_latest_metrics()
+        self.start()
+        return {
+            "tps": self.tps.latest(),
+            "average_tps": self.tps.mean(),
+            "max_tps": self.tps.max(),
+            "p50_tps": self.tps.percentile(50),
+            "p90_tps": self.tps.percentile(90),
+            "p99_tps": self.tps.percentile(99),
+            "non_vote_tps": self.non_vote_tps.latest(),
+            "average_non_vote_tps": self.non_vote_tps.mean(),
+            # Current load relative to the window's busiest period
+            "congestion": self.tps.latest() / self.tps.max() if self.tps.max() else None,
+            "slot": self.latest.current_slot if self.latest else None,
+            "samples": len(self.tps),
+            "window_seconds": len(self.tps) * self.latest.sampling_period_seconds if self.latest else 0,
+        }
+
     def calculate_average_tps(self) -> Optional[float]:
         """
         Calculate the average TPS from the recorded performance metrics.
@@ -79,11 +277,7 @@ class SolanaPerformanceTracker:
         Returns:
             The average TPS as a float, or None if no metrics are recorded.
         """
-        if not self.metrics_history:
-            return None
-        return sum(
-            metric.transactions_per_second for metric in self.metrics_history
-        ) / len(self.metrics_history)
+        return self.tps.mean()
 
     def find_maximum_tps(self) -> Optional[float]:
         """
@@ -92,20 +286,22 @@ class SolanaPerformanceTracker:
         Returns:
             The maximum TPS as a float, or None if no metrics are recorded.
         """
-        if not self.metrics_history:
-            return None
-        return max(metric.transactions_per_second for metric in self.metrics_history)
+        return self.tps.max()
 
     def reset_metrics_history(self) -> None:
         """Clear all recorded performance metrics."""
-        self.metrics_history.clear()
+        self.tps.clear()
+        self.non_vote_tps.clear()
+        self.latest = None
+        self._latest_at = None
 
+    @staticmethod
     async def fetch_current_tps(async_client: AsyncClient) -> float:
         """
         Fetch the current Transactions Per Second (TPS) on the Solana network.
 
         Args:
-            agent: An instance of SolanaAgent providing the RPC connection.
+            async_client: RPC client to query.
 
         Returns:
             Current TPS as a float.
@@ -138,3 +334,14 @@ class SolanaPerformanceTracker:
 
         except Exception as error:
             raise ValueError(f"Failed to fetch TPS: {str(error)}") from error
+
+
+_trackers: "weakref.WeakKeyDictionary[AsyncClient, SolanaPerformanceTracker]" = weakref.WeakKeyDictionary()
+
+
+def get_performance_tracker(async_client: AsyncClient) -> SolanaPerformanceTracker:
+    """The SolanaPerformanceTracker sampling through `async_client`"""
+    tracker = _trackers.get(async_client)
+    if tracker is None:
+        tracker = _trackers[async_client] = SolanaPerformanceTracker(async_client)
+    return tracker
@@ -1,20 +1,32 @@
 # imports
+import asyncio
+import struct
+from typing import Dict, List, Optional, Sequence
 from venv import logger
 
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Confirmed
 
 from src.constants import LAMPORTS_PER_SOL
-from src.types import JupiterTokenData
+from src.custom_types import JupiterTokenData
+from src.helpers.solana.mint_cache import get_mint_cache
+from src.helpers.solana.rpc_pool import get_account_loader
 
 from solders.keypair import Keypair  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 import requests
 
-from spl.token.async_client import AsyncToken
 from spl.token.instructions import get_associated_token_address
 from spl.token.constants import TOKEN_PROGRAM_ID
 
+# Byte offset of the amount in SPL Token account data
+TOKEN_AMOUNT_OFFSET = 64
+
+
+def parse_token_amount(data: bytes) -> int:
+    """Raw amount held by an SPL token account"""
+    return struct.unpack_from("<Q", data, TOKEN_AMOUNT_OFFSET)[0]
+
 
 class SolanaReadHelper:
     @staticmethod
@@ -28,31 +40,56 @@ class SolanaReadHelper:
         )
         try:
             if not token_address:
-                response = await async_client.get_balance(
-                    wallet.pubkey(), commitment=Confirmed
-                )
-                return response.value / LAMPORTS_PER_SOL
-            token_address = Pubkey.from_string(token_address)
-            spl_client = AsyncToken(
-                async_client, token_address, TOKEN_PROGRAM_ID, wallet.pubkey()
+                account = await get_account_loader(async_client).load(wallet.pubkey())
+                return (account.lamports if account else 0) / LAMPORTS_PER_SOL
+            balances = await SolanaReadHelper.get_balances(
+                async_client, wallet, [token_address], include_sol=False
             )
-
-            mint = await spl_client.get_mint_info()
-            if not mint.is_initialized:
-                raise ValueError("Token mint is not initialized.")
-
-            wallet_ata = get_associated_token_address(wallet.pubkey(), token_address)
-            response = await async_client.get_token_account_balance(wallet_ata)
-            if response.value is None:
-                return None
-            response = response.value.ui_amount
+            response = balances[token_address]
             logger.debug(f"Balance response: {response}")
-
-            return float(response)
+            return response
 
         except Exception as error:
             raise Exception(f"Failed to get balance: {str(error)}") from error
 
+    @staticmethod
+    async def get_balances(
+        async_client: AsyncClient,
+        wallet: Keypair,
+        token_addresses: Sequence[str],
+        include_sol: bool = True,
+    ) -> Dict[str, Optional[float]]:
+        """
+        Read SOL and many token balances in one getMultipleAccounts round trip.
+
+        Associated token accounts are derived locally, then the wallet and every
+        ATA are fetched together; mint decimals come from the mint cache, and any
+        uncached mints join the same request. A token the wallet holds no account
+        for maps to None, like get_balance.
+
+        Returns:
+            {"SOL": ..., <mint address>: ...} in UI units.
+        """
+        owner = wallet.pubkey()
+        mints = [Pubkey.from_string(str(address)) for address in token_addresses]
+        atas = [get_associated_token_address(owner, mint) for mint in mints]
+        keys: List[Pubkey] = ([owner] if include_sol else []) + atas
+        decimals, accounts = await asyncio.gather(
+            get_mint_cache().get_many_decimals(async_client, mints),
+            get_account_loader(async_client).load_many(keys),
+        )
+
+        balances: Dict[str, Optional[float]] = {}
+        if include_sol:
+            wallet_account = accounts.pop(0)
+            balances["SOL"] = (wallet_account.lamports if wallet_account else 0) / LAMPORTS_PER_SOL
+        for address, mint, ata_account in zip(token_addresses, mints, accounts):
+            if ata_account is None:
+                balances[str(address)] = None
+            else:
+                balances[str(address)] = parse_token_amount(bytes(ata_account.data)) / 10 ** decimals[str(mint)]
+        return balances
+
     @staticmethod
     def fetch_price(token_address: str) -> float:
         url = f"https://api.jup.ag/price/v2?ids={token_address}"
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Coroutine, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Confirmed
+
+from solders.account import Account  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+
+logger = logging.getLogger("helpers.solana.rpc_pool")
+
+T = TypeVar("T")
+
+MAX_ACCOUNTS_PER_REQUEST = 100  # getMultipleAccounts limit
+DEFAULT_RPC_TIMEOUT = 30  # seconds
+
+
+async def get_multiple_accounts(
+    async_client: AsyncClient,
+    pubkeys: Sequence[Pubkey],
+    commitment: Commitment = Confirmed,
+) -> List[Optional[Account]]:
+    """
+    Fetch many accounts with getMultipleAccounts, in order, None for missing ones.
+    Lists longer than the RPC limit are split into chunks that are sent concurrently.
+    """
+    chunks = [
+        list(pubkeys[i : i + MAX_ACCOUNTS_PER_REQUEST])
+        for i in range(0, len(pubkeys), MAX_ACCOUNTS_PER_REQUEST)
+    ]
+    responses = await asyncio.gather(
+        *(async_client.get_multiple_accounts(chunk, commitment=commitment) for chunk in chunks)
+    )
+    return [account for response in responses for account in response.value]
+
+
+class AccountLoader:
+    """
+    Coalesces account lookups on one client into getMultipleAccounts calls.
+
+    Every load() made before the event loop's next iteration is answered by a
+    single request, so helpers running concurrently (or one helper asking for a
+    wallet, its mints and its token accounts) share one round trip.
+    """
+
+    def __init__(self, async_client: AsyncClient, commitment: Commitment = Confirmed):
+        self.async_client = async_client
+        self.commitment = commitment
+        self._pending: Dict[Pubkey, List[asyncio.Future]] = {}
+        self._flush_scheduled = False
+        # The loop only holds weak references to tasks, so keep the flushes alive here
+        self._flush_tasks = set()
+        self.metrics = {"loads": 0, "requests": 0}
+
+    def _enqueue(self, pubkey: Pubkey) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(pubkey, []).append(future)
+        self.metrics["loads"] += 1
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            # The task first runs on the next loop iteration, after the other lookups queued now
+            task = loop.create_task(self._flush())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        return future
+
+    async def load(self, pubkey: Pubkey) -> Optional[Account]:
+        return await self._enqueue(pubkey)
+
+    async def load_many(self, pubkeys: Sequence[Pubkey]) -> List[Optional[Account]]:
+        return list(await asyncio.gather(*(self._enqueue(pubkey) for pubkey in pubkeys)))
+
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._flush_scheduled = False
+        keys = list(pending)
+        self.metrics["requests"] += -(-len(keys) // MAX_ACCOUNTS_PER_REQUEST)
+        error: Exception = RuntimeError("Account load was cancelled")
+        try:
+            accounts = await get_multiple_accounts(self.async_client, keys, self.commitment)
+            for key, account in zip(keys, accounts):
+                for future in pending[key]:
+                    if not future.done():
+                        future.set_result(account)
+        except Exception as e:
+            error = e
+        finally:
+            # Anything still unanswered (the request failed or the flush was cancelled) must not hang
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+
+
+_loaders: "weakref.WeakKeyDictionary[AsyncClient, AccountLoader]" = weakref.WeakKeyDictionary()
+
+
+def get_account_loader(async_client: AsyncClient) -> AccountLoader:
+    """The AccountLoader shared by everything using `async_client`"""
+    loader = _loaders.get(async_client)
+    if loader is None:
+        loader = _loaders[async_client] = AccountLoader(async_client)
+    return loader
+
+
+class SolanaRpcPool:
+    """
+    Long-lived AsyncClients, one per RPC URL, on a dedicated event loop thread.
+
+    An AsyncClient's HTTP connection pool is bound to the loop it was first used
+    on, so creating one per asyncio.run() call paid a fresh TCP/TLS handshake on
+    every action and leaked the client. Here the clients live on one background
+    loop and sync callers hand their coroutines to it with run().
+    """
+
+    def __init__(self, timeout: float = DEFAULT_RPC_TIMEOUT):
+        self.timeout = timeout
+        self._clients: Dict[str, AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="solana-rpc-loop", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def client(self, rpc_url: str) -> AsyncClient:
+        """The pooled client for `rpc_url`; only use it from coroutines passed to run()/submit()"""
+        with self._lock:
+            client = self._clients.get(rpc_url)
+            if client is None:
+                client = self._clients[rpc_url] = AsyncClient(rpc_url, timeout=self.timeout)
+            return client
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future:
+        """Schedule a coroutine on the pool's loop without waiting for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the pool's loop and wait for its result"""
+        return self.submit(coro).result(timeout)
+
+    async def batch(self, rpc_url: str, requests: Tuple[Any, ...], parsers: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        """
+        Send several solders.rpc.requests bodies as one JSON-RPC batch; `parsers`
+        are the matching solders.rpc.responses classes.
+        """
+        # AsyncClient has no public batch call, so go through its HTTP provider
+        return await self.client(rpc_url)._provider.make_batch_request(requests, parsers)
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+        if loop is None:
+            return
+
+        async def close_clients():
+            await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_clients(), loop).result(5)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+            loop.close()
+
+
+_shared_pool: Optional[SolanaRpcPool] = None
+_shared_lock = threading.Lock()
+
+
+def get_solana_rpc_pool() -> SolanaRpcPool:
+    """Process-wide SolanaRpcPool shared by every SolanaConnection"""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = SolanaRpcPool()
+        return _shared_pool
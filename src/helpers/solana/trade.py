@@ -5,7 +5,7 @@ from venv import logger
 from jupiter_python_sdk.jupiter import Jupiter
 
 from solana.rpc.async_api import AsyncClient
-from solana.rpc.commitment import Processed
+from solana.rpc.commitment import Confirmed, Processed
 from solana.rpc.types import TxOpts
 
 from solders import message
@@ -13,10 +13,9 @@ from solders.keypair import Keypair  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 
-from spl.token.async_client import AsyncToken
-from spl.token.constants import TOKEN_PROGRAM_ID
 
 from src.constants import DEFAULT_OPTIONS
+from src.helpers.solana.mint_cache import get_mint_cache
 from src.helpers.solana.transfer import SolanaTransferHelper
 
 
@@ -50,11 +49,7 @@ class TradeManager:
         # convert wallet.secret() from bytes to string
         input_mint = str(input_mint)
         output_mint = str(output_mint)
-        spl_client = AsyncToken(
-            async_client, Pubkey.from_string(input_mint), TOKEN_PROGRAM_ID, wallet
-        )
-        mint = await spl_client.get_mint_info()
-        decimals = mint.decimals
+        decimals = await get_mint_cache().get_decimals(async_client, input_mint)
         input_amount = int(input_amount * 10**decimals)
 
         try:
@@ -74,6 +69,9 @@ class TradeManager:
             signed_txn = VersionedTransaction.populate(
                 raw_transaction.message, [signature]
             )
+            # Jupiter doesn't return the swap blockhash's expiry; one fetched after the
+            # swap was built expires no earlier, so confirmation never gives up too soon
+            latest_blockhash = await async_client.get_latest_blockhash(commitment=Confirmed)
             opts = TxOpts(skip_preflight=False, preflight_commitment=Processed)
             result = await async_client.send_raw_transaction(
                 txn=bytes(signed_txn), opts=opts
@@ -83,7 +81,9 @@ class TradeManager:
             logger.debug(
                 f"Transaction sent: https://explorer.solana.com/tx/{transaction_id}"
             )
-            await SolanaTransferHelper._confirm_transaction(async_client, signature)
+            await SolanaTransferHelper._confirm_transaction(
+                async_client, signature, latest_blockhash.value.last_valid_block_height
+            )
             return str(signature)
 
         except Exception as e:
@@ -1,4 +1,5 @@
 import math
+from typing import Optional, Tuple
 from venv import logger
 from src.constants import LAMPORTS_PER_SOL, SOL_FEES
 
@@ -11,13 +12,15 @@ from solders.system_program import TransferParams, transfer
 from solders.transaction import VersionedTransaction  # type: ignore
 from solders.message import MessageV0  # type: ignore
 
-from spl.token.async_client import AsyncToken
 from spl.token.constants import TOKEN_PROGRAM_ID
 from spl.token.instructions import get_associated_token_address, transfer_checked
 from spl.token.instructions import TransferCheckedParams
 from solana.transaction import Transaction
 import asyncio
 
+from src.helpers.solana.mint_cache import get_mint_cache
+from src.helpers.solana.tx_pipeline import get_blockhash_cache, get_transaction_pipeline, preflight_opts
+
 
 class SolanaTransferHelper:
     """Helper class for Solana token and SOL transfers."""
@@ -48,7 +51,7 @@ class SolanaTransferHelper:
             to_pubkey = Pubkey.from_string(to)
             
             if spl_token:
-                signature = await SolanaTransferHelper._transfer_spl_tokens(
+                signature, last_valid_block_height = await SolanaTransferHelper._transfer_spl_tokens(
                     async_client,
                     wallet,
                     to_pubkey,
@@ -57,12 +60,12 @@ class SolanaTransferHelper:
                 )
                 token_identifier = str(spl_token)
             else:
-                signature = await SolanaTransferHelper._transfer_native_sol(
+                signature, last_valid_block_height = await SolanaTransferHelper._transfer_native_sol(
                     async_client, wallet, to_pubkey, amount
                 )
                 token_identifier = "SOL"
                 
-            await SolanaTransferHelper._confirm_transaction(async_client, signature)
+            await SolanaTransferHelper._confirm_transaction(async_client, signature, last_valid_block_height)
 
             logger.debug(
                 f"\nSuccess!\n\nSignature: {signature}\nFrom Address: {str(wallet.pubkey())}\nTo Address: {to}\nAmount: {amount}\nToken: {token_identifier}"
@@ -77,7 +80,7 @@ class SolanaTransferHelper:
     @staticmethod
     async def _transfer_native_sol(
         async_client: AsyncClient, wallet: Keypair, to: Pubkey, amount: float
-    ) -> str:
+    ) -> Tuple[str, int]:
         """
         Transfer native SOL.
 
@@ -88,7 +91,7 @@ class SolanaTransferHelper:
             amount: Amount of SOL to transfer
 
         Returns:
-            Transaction signature.
+            Transaction signature and its blockhash's last valid block height.
         """
         try:
             # Convert amount to lamports
@@ -102,17 +105,17 @@ class SolanaTransferHelper:
                 )
             )
             
-            blockhash = (await async_client.get_latest_blockhash()).value.blockhash
+            blockhash = await get_blockhash_cache(async_client).get()
             msg = MessageV0.try_compile(
                 payer=wallet.pubkey(),
                 instructions=[ix],
                 address_lookup_table_accounts=[],
-                recent_blockhash=blockhash,
+                recent_blockhash=blockhash.blockhash,
             )
             tx = VersionedTransaction(msg, [wallet])
 
-            result = await async_client.send_transaction(tx)
-            return result.value
+            result = await async_client.send_transaction(tx, opts=preflight_opts(async_client))
+            return result.value, blockhash.last_valid_block_height
 
         except Exception as e:
             logger.error(f"Native SOL transfer failed: {str(e)}")
@@ -125,7 +128,7 @@ class SolanaTransferHelper:
         recipient: Pubkey,
         spl_token: str,
         amount: float,
-    ) -> str:
+    ) -> Tuple[str, int]:
         """
         Transfer SPL tokens from payer to recipient.
 
@@ -137,19 +140,14 @@ class SolanaTransferHelper:
             amount: Amount of tokens to transfer.
 
         Returns:
-            Transaction signature.
+            Transaction signature and its blockhash's last valid block height.
         """
         try:
             # Convert string token address to Pubkey
             token_mint = Pubkey.from_string(spl_token)
             
-            spl_client = AsyncToken(
-                async_client, token_mint, TOKEN_PROGRAM_ID, wallet.pubkey()
-            )
-            
-            # Get token decimals
-            mint = await spl_client.get_mint_info()
-            decimals = mint.decimals
+            # Get token decimals (immutable, so cached per mint)
+            decimals = await get_mint_cache().get_decimals(async_client, token_mint)
             
             # Convert amount to token units
             token_amount = math.floor(amount * 10**decimals)
@@ -172,27 +170,35 @@ class SolanaTransferHelper:
             )
 
             # Build and send transaction
-            blockhash = (await async_client.get_latest_blockhash()).value.blockhash
+            blockhash = await get_blockhash_cache(async_client).get()
             msg = MessageV0.try_compile(
                 payer=wallet.pubkey(),
                 instructions=[transfer_ix],
                 address_lookup_table_accounts=[],
-                recent_blockhash=blockhash,
+                recent_blockhash=blockhash.blockhash,
             )
             tx = VersionedTransaction(msg, [wallet])
 
-            result = await async_client.send_transaction(tx)
-            return result.value
+            result = await async_client.send_transaction(tx, opts=preflight_opts(async_client))
+            return result.value, blockhash.last_valid_block_height
 
         except Exception as e:
             logger.error(f"SPL token transfer failed: {str(e)}")
             raise
 
     @staticmethod
-    async def _confirm_transaction(async_client: AsyncClient, signature: str) -> None:
-        """Wait for transaction confirmation."""
+    async def _confirm_transaction(
+        async_client: AsyncClient, signature: str, last_valid_block_height: Optional[int] = None
+    ) -> None:
+        """
+        Wait for transaction confirmation, polled together with other pending sends.
+        Given its blockhash's last valid block height, waits until the transaction
+        can no longer land rather than for a fixed timeout.
+        """
         try:
-            await async_client.confirm_transaction(signature, commitment=Confirmed)
+            await get_transaction_pipeline(async_client).confirm(
+                signature, last_valid_block_height=last_valid_block_height
+            )
         except Exception as e:
             logger.error(f"Transaction confirmation failed: {str(e)}")
             raise
\ No newline at end of file
@@ -0,0 +1,385 @@
+import asyncio
+import logging
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Confirmed, Finalized, Processed
+from solana.rpc.types import TxOpts
+
+from solders.hash import Hash  # type: ignore
+from solders.signature import Signature  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+from solders.transaction_status import TransactionConfirmationStatus  # type: ignore
+
+logger = logging.getLogger("helpers.solana.tx_pipeline")
+
+# A blockhash is accepted for ~150 slots (about 60s); hand out cached ones only
+# while well inside that window, so the transaction still has time to land
+DEFAULT_BLOCKHASH_REFRESH_INTERVAL = 10  # seconds
+DEFAULT_BLOCKHASH_MAX_AGE = 30  # seconds
+DEFAULT_BLOCKHASH_IDLE_TIMEOUT = 300  # stop refreshing after this long without a get()
+
+DEFAULT_MAX_IN_FLIGHT = 64  # sent but unconfirmed transactions
+DEFAULT_POLL_INTERVAL = 0.5  # seconds between getSignatureStatuses rounds
+DEFAULT_REBROADCAST_INTERVAL = 2.0  # seconds before an unconfirmed transaction is resent
+DEFAULT_CONFIRM_TIMEOUT = 90  # seconds, for transactions whose blockhash expiry is unknown
+MAX_SIGNATURES_PER_REQUEST = 256  # getSignatureStatuses limit
+
+# Commitments ranked like int(TransactionConfirmationStatus)
+COMMITMENT_LEVELS = {
+    Processed: int(TransactionConfirmationStatus.Processed),
+    Confirmed: int(TransactionConfirmationStatus.Confirmed),
+    Finalized: int(TransactionConfirmationStatus.Finalized),
+}
+
+
+class TransactionFailedError(Exception):
+    """The transaction landed but failed, or its blockhash expired before it landed"""
+
+    def __init__(self, signature: Signature, reason: str):
+        super().__init__(f"Transaction {signature} {reason}")
+        self.signature = signature
+        self.reason = reason
+
+
+@dataclass
+class Blockhash:
+    blockhash: Hash
+    last_valid_block_height: int
+    fetched_at: float = field(default_factory=time.monotonic)
+
+
+class BlockhashCache:
+    """
+    Keeps a recent blockhash ready for one client.
+
+    The first get() starts a background task that refreshes the blockhash every
+    `refresh_interval` seconds; sends then take it without a round trip. A
+    blockhash older than `max_age` is never handed out. The task stops after
+    `idle_timeout` seconds without a get(), so an idle agent doesn't poll the RPC.
+    """
+
+    def __init__(
+        self,
+        async_client: AsyncClient,
+        refresh_interval: float = DEFAULT_BLOCKHASH_REFRESH_INTERVAL,
+        max_age: float = DEFAULT_BLOCKHASH_MAX_AGE,
+        idle_timeout: float = DEFAULT_BLOCKHASH_IDLE_TIMEOUT,
+        commitment: Commitment = Confirmed,
+    ):
+        self.async_client = async_client
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.commitment = commitment
+        self._current: Optional[Blockhash] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._fetching: Optional[asyncio.Task] = None
+        self._last_used = time.monotonic()
+        self.metrics = {"hits": 0, "fetches": 0, "failures": 0}
+
+    def _fresh(self) -> Optional[Blockhash]:
+        current = self._current
+        if current is not None and time.monotonic() - current.fetched_at < self.max_age:
+            return current
+        return None
+
+    async def _fetch(self) -> Blockhash:
+        # Concurrent callers share one request
+        if self._fetching is None or self._fetching.done():
+            self._fetching = asyncio.ensure_future(self._fetch_once())
+        return await asyncio.shield(self._fetching)
+
+    async def _fetch_once(self) -> Blockhash:
+        self.metrics["fetches"] += 1
+        response = await self.async_client.get_latest_blockhash(commitment=self.commitment)
+        self._current = Blockhash(response.value.blockhash, response.value.last_valid_block_height)
+        return self._current
+
+    async def get(self) -> Blockhash:
+        """A blockhash still inside its validity window"""
+        self._last_used = time.monotonic()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+        current = self._fresh()
+        if current is not None:
+            self.metrics["hits"] += 1
+            return current
+        return await self._fetch()
+
+    async def _refresh_loop(self) -> None:
+        while time.monotonic() - self._last_used < self.idle_timeout:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self._fetch()
+            except Exception as e:
+                self.metrics["failures"] += 1
+                logger.warning(f"Blockhash refresh failed: {e}")
+
+    def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+
+@dataclass
+class _PendingTransaction:
+    signature: Signature
+    future: asyncio.Future
+    raw: Optional[bytes]
+    deadline: float
+    last_valid_block_height: Optional[int] = None
+    sent_at: float = field(default_factory=time.monotonic)
+
+
+class TransactionPipeline:
+    """
+    Sends signed transactions concurrently and confirms them in batches.
+
+    submit() sends a transaction and returns a future for its signature. One
+    poller task checks every unconfirmed signature with batched
+    getSignatureStatuses calls instead of a confirm_transaction loop per
+    transaction. It resends a transaction that hasn't landed after
+    `rebroadcast_interval` seconds. Given its blockhash's last valid block height,
+    a transaction only expires once the chain has passed that height, checked in
+    the same poll round, since until then it can still land; without it, it
+    fails after `timeout`. At most `max_in_flight` transactions are unconfirmed
+    at once; further submit() calls wait for room.
+    """
+
+    def __init__(
+        self,
+        async_client: AsyncClient,
+        commitment: Commitment = Confirmed,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        rebroadcast_interval: float = DEFAULT_REBROADCAST_INTERVAL,
+        timeout: float = DEFAULT_CONFIRM_TIMEOUT,
+    ):
+        self.async_client = async_client
+        self.commitment = commitment
+        self.target_level = COMMITMENT_LEVELS[commitment]
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.rebroadcast_interval = rebroadcast_interval
+        self.timeout = timeout
+        self._pending: Dict[Signature, _PendingTransaction] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._poller: Optional[asyncio.Task] = None
+        self.metrics = {"sent": 0, "confirmed": 0, "failed": 0, "expired": 0, "rebroadcasts": 0, "status_requests": 0}
+
+    def _track(
+        self,
+        signature: Signature,
+        raw: Optional[bytes],
+        timeout: Optional[float],
+        last_valid_block_height: Optional[int],
+    ) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        self._pending[signature] = _PendingTransaction(signature, future, raw, deadline, last_valid_block_height)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll())
+        return future
+
+    async def submit(
+        self,
+        transaction: VersionedTransaction,
+        opts: Optional[TxOpts] = None,
+        timeout: Optional[float] = None,
+        last_valid_block_height: Optional[int] = None,
+    ) -> asyncio.Future:
+        """
+        Send a signed transaction; the returned future resolves to its signature
+        once confirmed, or raises TransactionFailedError. Pass the blockhash's
+        `last_valid_block_height` so it is only given up on once truly expired.
+        Without `opts`, preflight runs at the blockhash cache's commitment.
+        """
+        signature = transaction.signatures[0]
+        if signature in self._pending:
+            return self._pending[signature].future
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        await self._slots.acquire()
+        raw = bytes(transaction)
+        if opts is None:
+            opts = preflight_opts(self.async_client)
+        try:
+            await self.async_client.send_raw_transaction(raw, opts=opts)
+        except Exception:
+            self._slots.release()
+            raise
+        self.metrics["sent"] += 1
+        future = self._track(signature, raw, timeout, last_valid_block_height)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def submit_many(
+        self,
+        transactions: Sequence[VersionedTransaction],
+        opts: Optional[TxOpts] = None,
+        last_valid_block_height: Optional[int] = None,
+    ) -> List[asyncio.Future]:
+        """
+        Send transactions concurrently; returns one future per transaction, in
+        order. A transaction that couldn't be sent gets an already-failed future.
+        """
+        loop = asyncio.get_running_loop()
+
+        async def send(transaction: VersionedTransaction) -> asyncio.Future:
+            try:
+                return await self.submit(transaction, opts, last_valid_block_height=last_valid_block_height)
+            except Exception as e:
+                failed = loop.create_future()
+                failed.set_exception(e)
+                return failed
+
+        return list(await asyncio.gather(*(send(transaction) for transaction in transactions)))
+
+    async def confirm(
+        self,
+        signature: Signature,
+        timeout: Optional[float] = None,
+        last_valid_block_height: Optional[int] = None,
+    ) -> Signature:
+        """
+        Wait for an already-sent transaction, sharing the batched status polling.
+        With its blockhash's `last_valid_block_height` it is waited for until that
+        height passes instead of for `timeout`.
+        """
+        pending = self._pending.get(signature)
+        if pending is None:
+            future = self._track(signature, None, timeout, last_valid_block_height)
+        else:
+            if pending.last_valid_block_height is None:
+                pending.last_valid_block_height = last_valid_block_height
+            future = pending.future
+        return await asyncio.shield(future)
+
+    async def _poll(self) -> None:
+        try:
+            while self._pending:
+                await asyncio.sleep(self.poll_interval)
+                await self._poll_once()
+        except Exception as e:
+            # Never leave callers waiting on a dead poller
+            logger.error(f"Signature status poller stopped: {e}")
+            for pending in list(self._pending.values()):
+                self._resolve(pending, e)
+
+    async def _block_height(self) -> Optional[int]:
+        try:
+            return (await self.async_client.get_block_height(self.commitment)).value
+        except Exception as e:
+            logger.warning(f"Block height poll failed: {e}")
+            return None
+
+    async def _poll_once(self) -> None:
+        signatures = list(self._pending)
+        chunks = [
+            signatures[i : i + MAX_SIGNATURES_PER_REQUEST]
+            for i in range(0, len(signatures), MAX_SIGNATURES_PER_REQUEST)
+        ]
+        # Read the height before the statuses: a transaction still unseen afterwards
+        # can't have landed at or below it
+        block_height = None
+        if any(pending.last_valid_block_height is not None for pending in self._pending.values()):
+            block_height = await self._block_height()
+        self.metrics["status_requests"] += len(chunks)
+        try:
+            responses = await asyncio.gather(
+                *(self.async_client.get_signature_statuses(chunk) for chunk in chunks)
+            )
+        except Exception as e:
+            logger.warning(f"Signature status poll failed: {e}")
+            responses = [None] * len(chunks)
+
+        now = time.monotonic()
+        for chunk, response in zip(chunks, responses):
+            statuses = response.value if response is not None else [None] * len(chunk)
+            for signature, status in zip(chunk, statuses):
+                pending = self._pending.get(signature)
+                if pending is not None:
+                    self._update(pending, status, now, block_height)
+
+    def _expired(self, pending: _PendingTransaction, status, now: float, block_height: Optional[int]) -> bool:
+        if pending.last_valid_block_height is None:
+            return now > pending.deadline
+        # Not seen once the chain is past its blockhash's validity, so it can never land
+        return status is None and block_height is not None and block_height > pending.last_valid_block_height
+
+    def _update(self, pending: _PendingTransaction, status, now: float, block_height: Optional[int]) -> None:
+        if pending.future.done():
+            # The caller gave up on it
+            self._pending.pop(pending.signature, None)
+            return
+        if status is not None and status.err is not None:
+            self._resolve(pending, TransactionFailedError(pending.signature, f"failed: {status.err}"))
+            self.metrics["failed"] += 1
+        elif (
+            status is not None
+            and status.confirmation_status is not None
+            and int(status.confirmation_status) >= self.target_level
+        ):
+            self._resolve(pending, None)
+            self.metrics["confirmed"] += 1
+        elif self._expired(pending, status, now, block_height):
+            if pending.last_valid_block_height is None:
+                reason = "was not confirmed in time"
+            else:
+                reason = f"expired: block height {block_height} passed {pending.last_valid_block_height}"
+            self._resolve(pending, TransactionFailedError(pending.signature, reason))
+            self.metrics["expired"] += 1
+        elif pending.raw is not None and status is None and now - pending.sent_at > self.rebroadcast_interval:
+            pending.sent_at = now
+            self.metrics["rebroadcasts"] += 1
+            asyncio.ensure_future(self._rebroadcast(pending.raw))
+
+    def _resolve(self, pending: _PendingTransaction, error: Optional[Exception]) -> None:
+        self._pending.pop(pending.signature, None)
+        if pending.future.done():
+            return
+        if error is None:
+            pending.future.set_result(pending.signature)
+        else:
+            pending.future.set_exception(error)
+
+    async def _rebroadcast(self, raw: bytes) -> None:
+        try:
+            await self.async_client.send_raw_transaction(raw, opts=TxOpts(skip_preflight=True))
+        except Exception as e:
+            logger.debug(f"Rebroadcast failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.metrics, "in_flight": len(self._pending)}
+
+
+_blockhash_caches: "weakref.WeakKeyDictionary[AsyncClient, BlockhashCache]" = weakref.WeakKeyDictionary()
+_pipelines: "weakref.WeakKeyDictionary[AsyncClient, TransactionPipeline]" = weakref.WeakKeyDictionary()
+
+
+def get_blockhash_cache(async_client: AsyncClient) -> BlockhashCache:
+    """The BlockhashCache shared by everything sending through `async_client`"""
+    cache = _blockhash_caches.get(async_client)
+    if cache is None:
+        cache = _blockhash_caches[async_client] = BlockhashCache(async_client)
+    return cache
+
+
+def preflight_opts(async_client: AsyncClient) -> TxOpts:
+    """
+    Send options that simulate at the cached blockhash's commitment. The client's
+    default is usually finalized, which doesn't know blockhashes that recent yet.
+    """
+    return TxOpts(preflight_commitment=get_blockhash_cache(async_client).commitment)
+
+
+def get_transaction_pipeline(async_client: AsyncClient) -> TransactionPipeline:
+    """The TransactionPipeline shared by everything sending through `async_client`"""
+    pipeline = _pipelines.get(async_client)
+    if pipeline is None:
+        pipeline = _pipelines[async_client] = TransactionPipeline(async_client)
+    return pipeline
@@ -0,0 +1,209 @@
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("llm_router")
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 30  # seconds a tripped breaker stays open
+DEFAULT_HEDGE_DELAY = 2.0  # seconds, used until enough latency samples exist
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_LATENCY_WINDOW = 100
+MIN_LATENCY_SAMPLES = 20
+
+
+class LLMRouterError(Exception):
+    """Raised when no provider could produce a response"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Opens after `failure_threshold` failures in a row; once `reset_timeout` has
+    passed a single trial call is let through (half-open) and its outcome either
+    closes the breaker again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = DEFAULT_LATENCY_WINDOW):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+
+class LLMRouter:
+    """
+    Routes text generation over several providers with ordered failover,
+    per-provider circuit breakers and optional hedged requests.
+
+    With hedging enabled, if the first provider hasn't answered within its p95
+    latency (or `hedge_delay` until enough samples exist), the next provider is
+    started in parallel and whichever succeeds first wins.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, Callable[[str, str], str]],
+        order: Optional[List[str]] = None,
+        hedge: bool = False,
+        hedge_delay: float = DEFAULT_HEDGE_DELAY,
+        hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+    ):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = providers
+        self.order = [name for name in (order or list(providers)) if name in providers]
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.breakers = {name: CircuitBreaker(failure_threshold, reset_timeout) for name in providers}
+        self.latencies = {name: LatencyTracker() for name in providers}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(4, 2 * len(providers)), thread_name_prefix="llm-router"
+        )
+
+    @classmethod
+    def from_connection_manager(cls, connection_manager, providers: Optional[List[str]] = None, **kwargs) -> "LLMRouter":
+        """Build a router over the configured LLM connections of a ConnectionManager"""
+        names = providers or connection_manager.get_model_providers()
+
+        def make_call(name):
+            def call(prompt: str, system_prompt: str) -> str:
+                return connection_manager.perform_action(
+                    connection_name=name,
+                    action_name="generate-text",
+                    params=[prompt, system_prompt]
+                )
+            return call
+
+        return cls({name: make_call(name) for name in names}, order=names, **kwargs)
+
+    def _call(self, name: str, prompt: str, system_prompt: str) -> str:
+        """Call one provider and feed the outcome into its breaker and latency window"""
+        started = time.monotonic()
+        try:
+            result = self.providers[name](prompt, system_prompt)
+            if result is None:
+                raise LLMRouterError(f"{name} returned no response")
+        except Exception:
+            self.breakers[name].record_failure()
+            raise
+        self.breakers[name].record_success()
+        self.latencies[name].record(time.monotonic() - started)
+        return result
+
+    def _hedge_budget(self, name: str) -> float:
+        budget = self.latencies[name].percentile(self.hedge_percentile)
+        return budget if budget is not None else self.hedge_delay
+
+    def generate(self, prompt: str, system_prompt: str, order: Optional[List[str]] = None) -> str:
+        """
+        Generate text, trying providers in order (or the given per-call order).
+
+        Raises:
+            LLMRouterError: if every available provider failed or was tripped
+        """
+        candidates = [name for name in (order or self.order) if name in self.providers]
+        errors = []
+
+        while candidates:
+            primary = candidates.pop(0)
+            if not self.breakers[primary].allow():
+                logger.debug(f"Skipping {primary}: circuit {self.breakers[primary].state}")
+                continue
+
+            in_flight = {self._executor.submit(self._call, primary, prompt, system_prompt): primary}
+
+            if self.hedge:
+                done, _ = wait(in_flight, timeout=self._hedge_budget(primary))
+                if not done:
+                    hedge_name = self._next_available(candidates)
+                    if hedge_name:
+                        logger.info(f"⏱️ {primary} is slow, hedging with {hedge_name}")
+                        in_flight[self._executor.submit(self._call, hedge_name, prompt, system_prompt)] = hedge_name
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.warning(f"Provider {name} failed: {e}")
+                        errors.append(f"{name}: {e}")
+                        continue
+                    # Any hedged loser keeps running; its outcome only updates its breaker
+                    return result
+
+        raise LLMRouterError(f"All LLM providers failed ({'; '.join(errors) or 'none available'})")
+
+    def _next_available(self, candidates: List[str]) -> Optional[str]:
+        """Pop and return the next provider whose breaker admits a call"""
+        while candidates:
+            name = candidates.pop(0)
+            if self.breakers[name].allow():
+                return name
+        return None
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
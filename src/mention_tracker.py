@@ -0,0 +1,115 @@
+import os
+import time
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Any, Optional
+
+from src.state_store import BoundedSet
+
+DEFAULT_DEDUPE_SIZE = 10000
+DEFAULT_DEDUPE_TTL = 7 * 24 * 3600  # seconds a replied-to tweet id is remembered
+DEFAULT_USER_LIMIT = 5  # replies per user per window
+DEFAULT_USER_WINDOW = 3600  # seconds
+DEFAULT_MAX_TRACKED_USERS = 10000
+
+
+class SlidingWindowCounter:
+    """
+    Per-key event counts over a trailing time window.
+
+    Each key keeps a deque of at most `max_events` timestamps, so recording and
+    counting are O(1) amortized however bursty a key is. Keys are kept in LRU
+    order and the least recently active are dropped beyond `max_keys`.
+    """
+
+    def __init__(self, window: float, max_events: Optional[int] = None, max_keys: int = DEFAULT_MAX_TRACKED_USERS):
+        self.window = window
+        self.max_events = max_events
+        self.max_keys = max_keys
+        self._events: "OrderedDict[Any, deque]" = OrderedDict()
+        self._lock = Lock()
+
+    def _prune(self, events: deque, now: float) -> None:
+        while events and now - events[0] > self.window:
+            events.popleft()
+
+    def hit(self, key: Any, now: Optional[float] = None) -> int:
+        """Record an event for `key` and return its count within the window"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = deque(maxlen=self.max_events)
+            else:
+                self._events.move_to_end(key)
+            self._prune(events, now)
+            events.append(now)
+            while len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+            return len(events)
+
+    def count(self, key: Any, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                return 0
+            self._prune(events, now)
+            if not events:
+                del self._events[key]
+            return len(events)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class MentionTracker:
+    """
+    Constant-time dedupe and per-user throttling for mention replies.
+
+    Tweet ids live in a BoundedSet (insertion-ordered with TTL), and each user's
+    replies are counted in a sliding window, so neither check scans the cache.
+    """
+
+    def __init__(
+        self,
+        dedupe_size: int = DEFAULT_DEDUPE_SIZE,
+        dedupe_ttl: Optional[float] = DEFAULT_DEDUPE_TTL,
+        user_limit: int = DEFAULT_USER_LIMIT,
+        user_window: float = DEFAULT_USER_WINDOW,
+    ):
+        self.user_limit = user_limit
+        self._seen = BoundedSet(maxlen=dedupe_size, ttl=dedupe_ttl)
+        self._users = SlidingWindowCounter(window=user_window, max_events=user_limit)
+
+    @classmethod
+    def from_env(cls) -> "MentionTracker":
+        """
+        Build a tracker from MENTION_DEDUPE_SIZE, MENTION_DEDUPE_TTL,
+        MENTION_USER_LIMIT and MENTION_USER_WINDOW
+        """
+        return cls(
+            dedupe_size=int(os.environ.get("MENTION_DEDUPE_SIZE", DEFAULT_DEDUPE_SIZE)),
+            dedupe_ttl=float(os.environ.get("MENTION_DEDUPE_TTL", DEFAULT_DEDUPE_TTL)),
+            user_limit=int(os.environ.get("MENTION_USER_LIMIT", DEFAULT_USER_LIMIT)),
+            user_window=float(os.environ.get("MENTION_USER_WINDOW", DEFAULT_USER_WINDOW)),
+        )
+
+    def is_seen(self, tweet_id: str) -> bool:
+        return tweet_id in self._seen
+
+    def remember(self, tweet_id: str, user: Optional[str]) -> None:
+        """Mark a mention as handled and count it against its author"""
+        self._seen.add(tweet_id)
+        if user:
+            self._users.hit(user)
+
+    def user_count(self, user: Optional[str]) -> int:
+        return self._users.count(user) if user else 0
+
+    def user_allowed(self, user: Optional[str]) -> bool:
+        """True while `user` is under the reply limit for the current window"""
+        return self.user_count(user) < self.user_limit
+
+    def __len__(self) -> int:
+        return len(self._seen)
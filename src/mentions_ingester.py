@@ -0,0 +1,258 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from src.connections.rate_limit_manager import get_rate_limit_manager
+from src.state_store import BoundedSet, StateBackend, MemoryStateBackend
+
+logger = logging.getLogger("mentions_ingester")
+
+SEARCH_RECENT_URL = "https://api.twitter.com/2/tweets/search/recent"
+SEARCH_RATE_LIMIT_KEY = "twitter:search_recent"
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_PAGE_SIZE = 100  # search/recent maximum
+DEFAULT_MAX_PAGES = 20  # per poll; the cursor is kept so the next poll carries on
+DEFAULT_COLD_START_RESULTS = 10  # newest mentions handled when there is no checkpoint
+DEFAULT_QUEUE_SIZE = 2000
+DEFAULT_REQUEST_TIMEOUT = 15
+MAX_CONSECUTIVE_ERRORS = 5
+
+TWEET_FIELDS = "author_id,created_at,conversation_id,in_reply_to_user_id"
+
+
+class MentionsIngester:
+    """
+    Incremental, checkpointed reader of mentions from the v2 recent search endpoint.
+
+    Each poll pages through `next_token` back to the stored `since_id` and feeds
+    every mention into a bounded work queue served by `concurrency` worker threads.
+    The checkpoint (since_id, an unfinished pagination cursor and every queued but
+    unhandled mention) is saved to the backend after each page and each handled
+    mention, so a restart neither drops nor repeats mentions. Rate limit headers
+    go to the shared rate limiter; a poll that runs out of budget stops and the
+    next one resumes from the saved cursor.
+
+    Without a since_id (first deploy, lost checkpoint) there is nothing to page
+    back to, and the search window reaches a week into the past. A cold start
+    therefore fetches only the `cold_start_results` newest mentions, one page,
+    and queues them (as the old 10-mention poll did) so recent ones still get an
+    answer. Their newest id becomes since_id, and older mentions are never fetched.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        handler: Callable[[Dict[str, Any], Dict[str, Any]], None],
+        auth: Any = None,
+        backend: Optional[StateBackend] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        cold_start_results: int = DEFAULT_COLD_START_RESULTS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        session: Optional[requests.Session] = None,
+    ):
+        self.query = query
+        self.handler = handler
+        self.auth = auth
+        self.backend = backend or MemoryStateBackend()
+        self.concurrency = max(1, concurrency)
+        self.page_size = page_size
+        self.max_pages = max_pages
+        # search/recent accepts max_results between 10 and 100
+        self.cold_start_results = min(max(cold_start_results, 10), DEFAULT_PAGE_SIZE)
+        self.queue_size = queue_size
+        self.session = session or requests.Session()
+        self.rate_limiter = get_rate_limit_manager()
+
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._seen = BoundedSet(maxlen=queue_size * 5)
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._workers = []
+        self._consecutive_errors = 0
+        self.metrics = {"fetched": 0, "handled": 0, "failed": 0, "pages": 0}
+
+        checkpoint = self.backend.load()
+        self.since_id: Optional[str] = checkpoint.get("since_id")
+        self.next_token: Optional[str] = checkpoint.get("next_token")
+        self.cursor_newest_id: Optional[str] = checkpoint.get("cursor_newest_id")
+        for item in checkpoint.get("pending", []):
+            self._enqueue(item["tweet"], item["author"], save=False)
+        if self._pending:
+            logger.info(f"Resuming {len(self._pending)} unhandled mentions from checkpoint")
+
+    def _save_checkpoint(self) -> None:
+        with self._lock:
+            snapshot = {
+                "since_id": self.since_id,
+                "next_token": self.next_token,
+                "cursor_newest_id": self.cursor_newest_id,
+                "pending": list(self._pending.values()),
+            }
+        try:
+            self.backend.save(snapshot)
+        except Exception as e:
+            logger.error(f"Failed to save mentions checkpoint: {e}")
+
+    def _enqueue(self, tweet: Dict[str, Any], author: Dict[str, Any], save: bool = True) -> bool:
+        tweet_id = tweet["id"]
+        with self._lock:
+            if tweet_id in self._pending or tweet_id in self._seen:
+                return False
+            self._pending[tweet_id] = {"tweet": tweet, "author": author}
+            self._seen.add(tweet_id)
+        self._queue.put(tweet_id)
+        if save:
+            self._save_checkpoint()
+        return True
+
+    def start(self) -> None:
+        """Start the worker threads that run the handler"""
+        if self._workers:
+            return
+        for index in range(self.concurrency):
+            worker = threading.Thread(target=self._work, name=f"mentions-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers after their current mention; unhandled ones stay in the checkpoint"""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def _work(self) -> None:
+        while True:
+            tweet_id = self._queue.get()
+            if tweet_id is None:
+                return
+            with self._lock:
+                item = self._pending.get(tweet_id)
+            if item is None:
+                continue
+            try:
+                self.handler(item["tweet"], item["author"])
+                self.metrics["handled"] += 1
+            except Exception as e:
+                self.metrics["failed"] += 1
+                logger.error(f"Error handling mention {tweet_id}: {e}")
+            with self._lock:
+                self._pending.pop(tweet_id, None)
+            self._save_checkpoint()
+
+    def _params(self) -> Dict[str, Any]:
+        params = {
+            "query": self.query,
+            "max_results": self.page_size if self.since_id else self.cold_start_results,
+            "tweet.fields": TWEET_FIELDS,
+            "expansions": "author_id",
+            "user.fields": "username",
+        }
+        if self.since_id:
+            params["since_id"] = self.since_id
+        if self.next_token:
+            params["next_token"] = self.next_token
+        return params
+
+    def _record_error(self) -> None:
+        self._consecutive_errors += 1
+        if self._consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+            backoff_minutes = min(2 * (self._consecutive_errors - MAX_CONSECUTIVE_ERRORS + 1), 30)
+            self.rate_limiter.block(SEARCH_RATE_LIMIT_KEY, backoff_minutes * 60)
+
+    def poll(self) -> int:
+        """Fetch new mentions into the work queue; returns how many were queued"""
+        if not self._poll_lock.acquire(blocking=False):
+            logger.info("Mentions poll already running, skipping")
+            return 0
+        try:
+            return self._poll()
+        finally:
+            self._poll_lock.release()
+
+    def _poll(self) -> int:
+        queued = 0
+        cold_start = self.since_id is None
+        if cold_start and self.next_token:
+            # A cursor without since_id would page back through the whole search window
+            self.next_token = None
+            self.cursor_newest_id = None
+        for _ in range(1 if cold_start else self.max_pages):
+            if len(self._pending) + self.page_size > self.queue_size:
+                logger.warning(f"Mentions queue is full ({len(self._pending)} pending); resuming next poll")
+                break
+            if not self.rate_limiter.try_acquire(SEARCH_RATE_LIMIT_KEY):
+                wait = self.rate_limiter.wait_time(SEARCH_RATE_LIMIT_KEY)
+                logger.info(f"Mentions search rate limited for {wait:.0f}s; resuming next poll")
+                break
+
+            try:
+                response = self.session.get(
+                    SEARCH_RECENT_URL, auth=self.auth, params=self._params(), timeout=DEFAULT_REQUEST_TIMEOUT
+                )
+            except requests.RequestException as e:
+                logger.error(f"Exception checking mentions: {e}")
+                self._record_error()
+                break
+
+            self.rate_limiter.update_from_headers(SEARCH_RATE_LIMIT_KEY, response.headers, response.status_code)
+            if response.status_code != 200:
+                logger.error(f"Error checking mentions: {response.status_code} {response.reason}")
+                logger.error(f"Response: {response.text[:200]}")
+                if response.status_code != 429:
+                    self._record_error()
+                break
+
+            self._consecutive_errors = 0
+            self.metrics["pages"] += 1
+            data = response.json()
+            meta = data.get("meta", {})
+            if self.cursor_newest_id is None:
+                # The first page of a pagination run holds the newest mention
+                self.cursor_newest_id = meta.get("newest_id")
+
+            users = {user["id"]: user for user in data.get("includes", {}).get("users", [])}
+            for tweet in data.get("data", []):
+                if self._enqueue(tweet, users.get(tweet.get("author_id"), {}), save=False):
+                    queued += 1
+            self.metrics["fetched"] += len(data.get("data", []))
+
+            # A cold start takes only the newest page and doesn't paginate back
+            self.next_token = None if cold_start else meta.get("next_token")
+            if not self.next_token:
+                # Reached since_id: the run is complete, so the checkpoint can move forward
+                if self.cursor_newest_id:
+                    self.since_id = self.cursor_newest_id
+                self.cursor_newest_id = None
+                self._save_checkpoint()
+                break
+            self._save_checkpoint()
+
+        if queued:
+            logger.info(f"Queued {queued} new mentions ({len(self._pending)} pending)")
+        else:
+            logger.info("No new mentions found")
+        return queued
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "pending": len(self._pending),
+            "since_id": self.since_id,
+            "paginating": self.next_token is not None,
+        }
+
+    def close(self) -> None:
+        self.stop(timeout=5)
+        self._save_checkpoint()
+        self.backend.close()
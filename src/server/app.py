@@ -8,6 +8,7 @@ import signal
 import threading
 from pathlib import Path
 from src.cli import ZerePyCLI
+from src.claude_client import get_prompt_cache_stats
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("server/app")
@@ -89,6 +90,11 @@ class ZerePyServer:
                 "agent_running": self.state.agent_running
             }
 
+        @self.app.get("/metrics/prompt-cache")
+        async def prompt_cache_metrics():
+            """Prompt cache hit rates across Claude calls made by this server"""
+            return get_prompt_cache_stats().snapshot()
+
         @self.app.get("/agents")
         async def list_agents():
             """List available agents"""
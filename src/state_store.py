@@ -0,0 +1,279 @@
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock, RLock
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger("state_store")
+
+DEFAULT_MAX_ITEMS = 10000
+DEFAULT_MAX_LIST_ITEMS = 500
+DEFAULT_SNAPSHOT_INTERVAL = 60  # seconds
+DEFAULT_STATE_DIR = Path.home() / ".zerepy" / "state"
+
+# Marker used to round-trip BoundedSet values through JSON
+BOUNDED_SET_TAG = "__bounded_set__"
+
+
+class BoundedSet:
+    """
+    Insertion-ordered set with a maximum size and optional TTL.
+
+    Oldest entries are evicted first, so dedupe sets such as replied message ids
+    keep a flat memory footprint over long runs. Membership checks are O(1).
+    """
+
+    def __init__(self, maxlen: int = DEFAULT_MAX_ITEMS, ttl: Optional[float] = None):
+        self.maxlen = maxlen
+        self.ttl = ttl
+        self._items: "OrderedDict[Any, float]" = OrderedDict()
+        self._lock = Lock()
+
+    def _expired(self, added_at: float, now: float) -> bool:
+        return self.ttl is not None and now - added_at > self.ttl
+
+    def _evict(self, now: float) -> None:
+        while len(self._items) > self.maxlen:
+            self._items.popitem(last=False)
+        while self._items:
+            oldest = next(iter(self._items.values()))
+            if not self._expired(oldest, now):
+                break
+            self._items.popitem(last=False)
+
+    def add(self, item: Any, added_at: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._items.pop(item, None)
+            self._items[item] = added_at if added_at is not None else now
+            self._evict(now)
+
+    def discard(self, item: Any) -> None:
+        with self._lock:
+            self._items.pop(item, None)
+
+    def __contains__(self, item: Any) -> bool:
+        with self._lock:
+            added_at = self._items.get(item)
+            if added_at is None:
+                return False
+            if self._expired(added_at, time.time()):
+                del self._items[item]
+                return False
+            return True
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        with self._lock:
+            return iter(list(self._items))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict(time.time())
+            return {
+                "maxlen": self.maxlen,
+                "ttl": self.ttl,
+                "items": [[item, added_at] for item, added_at in self._items.items()],
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BoundedSet":
+        bounded = cls(maxlen=data.get("maxlen", DEFAULT_MAX_ITEMS), ttl=data.get("ttl"))
+        for item, added_at in data.get("items", []):
+            bounded.add(item, added_at=added_at)
+        return bounded
+
+
+class StateBackend(ABC):
+    """Storage for agent state snapshots"""
+
+    @abstractmethod
+    def load(self) -> Dict[str, Any]:
+        """Return the last saved snapshot (JSON-compatible values), or an empty dict"""
+        pass
+
+    @abstractmethod
+    def save(self, snapshot: Dict[str, Any]) -> None:
+        """Atomically replace the stored snapshot"""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStateBackend(StateBackend):
+    """In-process stand-in for tests and ephemeral agents"""
+
+    def __init__(self):
+        self._snapshot: Dict[str, str] = {}
+
+    def load(self) -> Dict[str, Any]:
+        return {key: json.loads(value) for key, value in self._snapshot.items()}
+
+    def save(self, snapshot: Dict[str, Any]) -> None:
+        self._snapshot = {key: json.dumps(value) for key, value in snapshot.items()}
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    One row per state key. Each save runs in a single transaction, so a crash
+    mid-snapshot leaves the previous snapshot intact.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS agent_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = Lock()
+
+    def load(self) -> Dict[str, Any]:
+        snapshot = {}
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM agent_state").fetchall()
+        for key, value in rows:
+            try:
+                snapshot[key] = json.loads(value)
+            except json.JSONDecodeError:
+                logger.warning(f"Discarding unreadable state entry: {key}")
+        return snapshot
+
+    def save(self, snapshot: Dict[str, Any]) -> None:
+        rows = [(key, json.dumps(value)) for key, value in snapshot.items()]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM agent_state")
+            self._conn.executemany("INSERT INTO agent_state (key, value) VALUES (?, ?)", rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class AgentState(dict):
+    """
+    Dict used as ZerePyAgent.state, with bounded collections and periodic snapshots.
+
+    Plain JSON-compatible values and BoundedSets are persisted; lists are trimmed to
+    their most recent `max_list_items` entries and plain sets are stored as BoundedSets.
+    Values that can't be serialized stay in memory only.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[StateBackend] = None,
+        snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+        max_items: int = DEFAULT_MAX_ITEMS,
+        max_list_items: int = DEFAULT_MAX_LIST_ITEMS,
+        ttl: Optional[float] = None,
+    ):
+        super().__init__()
+        self.backend = backend or MemoryStateBackend()
+        self.snapshot_interval = snapshot_interval
+        self.max_items = max_items
+        self.max_list_items = max_list_items
+        self.ttl = ttl
+        self._last_snapshot = time.monotonic()
+        self._snapshot_lock = RLock()
+        self.reload()
+
+    @classmethod
+    def from_config(cls, agent_name: str, config: Dict[str, Any]) -> "AgentState":
+        """
+        Build state from an agent JSON "state" block:
+        {"backend": "sqlite" | "memory", "path": ..., "snapshot_interval": ..., "max_items": ..., "ttl": ...}
+        """
+        backend_name = config.get("backend", "sqlite")
+        if backend_name == "memory":
+            backend = MemoryStateBackend()
+        elif backend_name == "sqlite":
+            path = config.get("path") or DEFAULT_STATE_DIR / f"{agent_name}.sqlite"
+            backend = SQLiteStateBackend(path)
+        else:
+            raise ValueError(f"Unknown state backend: {backend_name}")
+
+        return cls(
+            backend=backend,
+            snapshot_interval=config.get("snapshot_interval", DEFAULT_SNAPSHOT_INTERVAL),
+            max_items=config.get("max_items", DEFAULT_MAX_ITEMS),
+            max_list_items=config.get("max_list_items", DEFAULT_MAX_LIST_ITEMS),
+            ttl=config.get("ttl"),
+        )
+
+    def bounded_set(self, key: str, maxlen: Optional[int] = None, ttl: Optional[float] = None) -> BoundedSet:
+        """Return the BoundedSet stored under `key`, creating (or upgrading a plain set) if needed"""
+        current = self.get(key)
+        if isinstance(current, BoundedSet):
+            return current
+
+        bounded = BoundedSet(maxlen=maxlen or self.max_items, ttl=ttl if ttl is not None else self.ttl)
+        for item in current or ():
+            bounded.add(item)
+        self[key] = bounded
+        return bounded
+
+    def _encode(self, value: Any) -> Any:
+        if isinstance(value, BoundedSet):
+            return {BOUNDED_SET_TAG: value.to_dict()}
+        if isinstance(value, (set, frozenset)):
+            bounded = BoundedSet(maxlen=self.max_items, ttl=self.ttl)
+            for item in value:
+                bounded.add(item)
+            return {BOUNDED_SET_TAG: bounded.to_dict()}
+        if isinstance(value, list):
+            return value[-self.max_list_items:]
+        return value
+
+    @staticmethod
+    def _decode(value: Any) -> Any:
+        if isinstance(value, dict) and BOUNDED_SET_TAG in value:
+            return BoundedSet.from_dict(value[BOUNDED_SET_TAG])
+        return value
+
+    def snapshot(self) -> None:
+        """Write the current state to the backend"""
+        with self._snapshot_lock:
+            encoded = {}
+            for key, value in list(self.items()):
+                value = self._encode(value)
+                try:
+                    json.dumps(value)
+                except (TypeError, ValueError):
+                    logger.debug(f"State key {key} is not serializable; keeping it in memory only")
+                    continue
+                encoded[key] = value
+            self.backend.save(encoded)
+            self._last_snapshot = time.monotonic()
+
+    def maybe_snapshot(self) -> None:
+        """Snapshot if `snapshot_interval` seconds have passed since the last one"""
+        if time.monotonic() - self._last_snapshot < self.snapshot_interval:
+            return
+        try:
+            self.snapshot()
+        except Exception as e:
+            logger.error(f"Failed to snapshot agent state: {e}")
+
+    def reload(self) -> None:
+        """Replace in-memory state with the backend's last snapshot"""
+        with self._snapshot_lock:
+            snapshot = self.backend.load()
+            self.clear()
+            for key, value in snapshot.items():
+                self[key] = self._decode(value)
+
+    def close(self) -> None:
+        """Take a final snapshot and release the backend"""
+        try:
+            self.snapshot()
+        finally:
+            self.backend.close()
@@ -2,45 +2,207 @@
 SVG to PNG Converter Utility
 """
 
-import cairosvg
-from io import BytesIO
+import hashlib
 import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Dict, Optional
 
 logger = logging.getLogger("svg_converter")
 
-def convert_svg_to_png(svg_content, width=1200, height=675):
+DEFAULT_WIDTH = 1200
+DEFAULT_HEIGHT = 675
+DEFAULT_RENDER_WORKERS = 2
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_RENDER_TIMEOUT = 60  # seconds
+
+
+def _rasterize(svg_bytes: bytes, width: int, height: int) -> bytes:
+    """Render SVG to PNG bytes; runs in a worker process"""
+    import cairosvg
+    return cairosvg.svg2png(bytestring=svg_bytes, output_width=width, output_height=height)
+
+
+def _rasterize_in_process(svg_bytes: bytes, width: int, height: int) -> Future:
+    future: Future = Future()
+    try:
+        future.set_result(_rasterize(svg_bytes, width, height))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _worker_context():
+    """
+    Start workers without fork: the pool is created lazily in threaded processes
+    (Flask, the scheduler, the tweet buffer), and a forked child can inherit a
+    lock some other thread held, such as the import lock during `import cairosvg`
+    """
+    try:
+        return multiprocessing.get_context("forkserver")
+    except ValueError:
+        return multiprocessing.get_context("spawn")
+
+
+class SVGRasterizer:
+    """
+    Renders SVG to PNG on a process pool, with a content-addressed cache.
+
+    PNGs are cached by the SHA-256 of the SVG and the output size, in LRU order
+    up to `max_cache_bytes`. Concurrent requests for the same SVG share a single
+    render. cairosvg holds the GIL while it draws, so worker processes keep
+    rendering off the scheduler and web threads. If the pool can't be used, it
+    renders in-process.
+    """
+
+    def __init__(self, workers: int = DEFAULT_RENDER_WORKERS, max_cache_bytes: int = DEFAULT_CACHE_BYTES):
+        self.workers = max(1, workers)
+        self.max_cache_bytes = max_cache_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_bytes = 0
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "renders": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls) -> "SVGRasterizer":
+        """Size the pool and cache from SVG_RENDER_WORKERS and SVG_RENDER_CACHE_MB"""
+        return cls(
+            workers=int(os.environ.get("SVG_RENDER_WORKERS", DEFAULT_RENDER_WORKERS)),
+            max_cache_bytes=int(os.environ.get("SVG_RENDER_CACHE_MB", DEFAULT_CACHE_BYTES // (1024 * 1024))) * 1024 * 1024,
+        )
+
+    @staticmethod
+    def cache_key(svg_content: str, width: int, height: int) -> str:
+        return f"{hashlib.sha256(svg_content.encode('utf-8')).hexdigest()}:{width}x{height}"
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self._executor is None:
+            try:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_worker_context())
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Process pool unavailable, rendering in-process: {e}")
+                return None
+        return self._executor
+
+    def _store(self, key: str, png: bytes) -> None:
+        if len(png) > self.max_cache_bytes:
+            return
+        self._cache[key] = png
+        self._cache_bytes += len(png)
+        while self._cache_bytes > self.max_cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    def submit(self, svg_content: str, width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT) -> Future:
+        """Start rendering without waiting; the future resolves to PNG bytes"""
+        key = self.cache_key(svg_content, width, height)
+        with self._lock:
+            png = self._cache.get(key)
+            if png is not None:
+                self._cache.move_to_end(key)
+                self.metrics["hits"] += 1
+                future: Future = Future()
+                future.set_result(png)
+                return future
+            if key in self._in_flight:
+                self.metrics["hits"] += 1
+                return self._in_flight[key]
+            self.metrics["misses"] += 1
+
+            executor = self._get_executor()
+            svg_bytes = svg_content.encode("utf-8")
+            if executor is None:
+                future = _rasterize_in_process(svg_bytes, width, height)
+            else:
+                try:
+                    future = executor.submit(_rasterize, svg_bytes, width, height)
+                except BrokenProcessPool:
+                    # A worker died; start a fresh pool for this and later renders
+                    self._executor = None
+                    executor = self._get_executor()
+                    if executor is None:
+                        future = _rasterize_in_process(svg_bytes, width, height)
+                    else:
+                        future = executor.submit(_rasterize, svg_bytes, width, height)
+            self._in_flight[key] = future
+
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                self.metrics["failures"] += 1
+                if isinstance(future.exception(), BrokenProcessPool):
+                    self._executor = None
+                return
+            self.metrics["renders"] += 1
+            self._store(key, future.result())
+
+    def render(
+        self,
+        svg_content: str,
+        width: int = DEFAULT_WIDTH,
+        height: int = DEFAULT_HEIGHT,
+        timeout: Optional[float] = DEFAULT_RENDER_TIMEOUT,
+    ) -> bytes:
+        """Render (or fetch from cache) and wait for the PNG bytes"""
+        return self.submit(svg_content, width, height).result(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.metrics, "cached": len(self._cache), "cache_bytes": self._cache_bytes}
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_shared_rasterizer: Optional[SVGRasterizer] = None
+_shared_lock = threading.Lock()
+
+
+def get_svg_rasterizer() -> SVGRasterizer:
+    """Process-wide SVGRasterizer shared by the tweet pipelines and the glyph composer"""
+    global _shared_rasterizer
+    with _shared_lock:
+        if _shared_rasterizer is None:
+            _shared_rasterizer = SVGRasterizer.from_env()
+        return _shared_rasterizer
+
+
+def convert_svg_to_png(svg_content, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
     """
     Convert SVG content to PNG format for Twitter compatibility
-    
+
     Args:
         svg_content: String containing SVG XML
         width: Desired width of PNG
         height: Desired height of PNG
-        
+
     Returns:
         BytesIO: PNG image as BytesIO object or None if conversion failed
     """
     try:
         logger.info(f"Converting SVG (length: {len(svg_content)}) to PNG...")
-        png_bytes = BytesIO()
-        
-        # Use CairoSVG to convert from SVG to PNG
-        cairosvg.svg2png(
-            bytestring=svg_content.encode('utf-8'),
-            write_to=png_bytes,
-            output_width=width,
-            output_height=height
-        )
-        
-        # Reset buffer position
-        png_bytes.seek(0)
-        
+        png_bytes = BytesIO(get_svg_rasterizer().render(svg_content, width, height))
+
         # Log successful conversion
         size_kb = png_bytes.getbuffer().nbytes / 1024
         logger.info(f"SVG converted to PNG successfully. Size: {size_kb:.2f} KB")
-        
+
         return png_bytes
-        
+
     except Exception as e:
         logger.exception(f"Error converting SVG to PNG: {e}")
         return None
@@ -0,0 +1,318 @@
+import base64
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from src.state_store import BoundedSet, MemoryStateBackend, SQLiteStateBackend, StateBackend, DEFAULT_STATE_DIR
+
+logger = logging.getLogger("tweet_buffer")
+
+DEFAULT_BUFFER_SIZE = 8
+DEFAULT_REFILL_INTERVAL = 60  # seconds between refill checks while the buffer is full
+DEFAULT_MAX_AGE = 24 * 3600  # seconds before a buffered tweet is considered stale
+DEFAULT_BATCH_MIN = 4  # only use the batch producer when at least this many tweets are missing
+MAX_TWEET_LENGTH = 280
+MAX_REFILL_BACKOFF = 600  # seconds
+RECENT_TWEETS = 500  # posted/buffered tweets remembered to reject repeats
+DEFAULT_MAX_ATTEMPTS = 3  # posting attempts before a tweet is dropped
+
+
+def is_transient_failure(status_code: Optional[int]) -> bool:
+    """
+    Whether a failed post is worth retrying: no response (timeout, connection
+    error), request timeout, rate limit or a server error. Anything else, e.g. a
+    403 for duplicate content or a 400 validation error, fails the same way again.
+    """
+    return status_code is None or status_code in (408, 429) or status_code >= 500
+
+
+@dataclass
+class BufferedTweet:
+    """A generated tweet ready to post, with an optional pre-rendered image"""
+    text: str
+    media: Optional[bytes] = None
+    svg_file: Optional[str] = None
+    kind: str = "text"
+    created_at: float = field(default_factory=time.time)
+    attempts: int = 0  # failed posting attempts
+
+    @property
+    def key(self) -> str:
+        """Identity used to reject repeats; image posts may share a caption"""
+        if self.media:
+            return f"{self.text}#{hashlib.sha1(self.media).hexdigest()}"
+        return self.text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "media": base64.b64encode(self.media).decode("ascii") if self.media else None,
+            "svg_file": self.svg_file,
+            "kind": self.kind,
+            "created_at": self.created_at,
+            "attempts": self.attempts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BufferedTweet":
+        media = data.get("media")
+        return cls(
+            text=data["text"],
+            media=base64.b64decode(media) if media else None,
+            svg_file=data.get("svg_file"),
+            kind=data.get("kind", "text"),
+            created_at=data.get("created_at", time.time()),
+            attempts=data.get("attempts", 0),
+        )
+
+
+class TweetBuffer:
+    """
+    Rolling buffer of pre-generated, validated tweets.
+
+    A background thread keeps `size` tweets ready by calling `produce` (or
+    `produce_batch` for larger shortfalls, e.g. through a provider's batch API),
+    backing off exponentially while the provider fails. Posting takes the oldest
+    fresh tweet with pop(), so a provider outage only drains the buffer instead
+    of missing a slot. A tweet that fails to post transiently is requeued, up to
+    `max_attempts` times; one rejected outright is dropped. The buffer is saved
+    to `backend` on every change and reloaded on start.
+    """
+
+    def __init__(
+        self,
+        produce: Callable[[], Optional[BufferedTweet]],
+        size: int = DEFAULT_BUFFER_SIZE,
+        produce_batch: Optional[Callable[[int], List[Optional[BufferedTweet]]]] = None,
+        backend: Optional[StateBackend] = None,
+        max_age: Optional[float] = DEFAULT_MAX_AGE,
+        refill_interval: float = DEFAULT_REFILL_INTERVAL,
+        batch_min: int = DEFAULT_BATCH_MIN,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        self.produce = produce
+        self.size = max(1, size)
+        self.produce_batch = produce_batch
+        self.backend = backend or MemoryStateBackend()
+        self.max_age = max_age
+        self.refill_interval = refill_interval
+        self.batch_min = batch_min
+        self.max_attempts = max(1, max_attempts)
+
+        self._items: "deque[BufferedTweet]" = deque()
+        self._recent = BoundedSet(maxlen=RECENT_TWEETS)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failures = 0
+        self.metrics = {"produced": 0, "rejected": 0, "expired": 0, "popped": 0, "misses": 0, "failures": 0, "dropped": 0}
+
+        for data in self.backend.load().get("tweets", []):
+            try:
+                self._add(BufferedTweet.from_dict(data), save=False)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Discarding unreadable buffered tweet: {e}")
+        if self._items:
+            logger.info(f"Loaded {len(self._items)} buffered tweets")
+
+    @classmethod
+    def from_env(
+        cls,
+        name: str,
+        produce: Callable[[], Optional[BufferedTweet]],
+        prefix: str = "TWEET_BUFFER",
+        produce_batch: Optional[Callable[[int], List[Optional[BufferedTweet]]]] = None,
+    ) -> "TweetBuffer":
+        """
+        Build a buffer from <prefix>_SIZE, <prefix>_MAX_AGE, <prefix>_MAX_ATTEMPTS and
+        <prefix>_STATE_PATH. The state file defaults to <name>_tweet_buffer.sqlite, so
+        entry points sharing a host keep separate buffers. The batch producer is only
+        used when <prefix>_USE_BATCH is "true".
+        """
+        state_path = os.environ.get(f"{prefix}_STATE_PATH") or str(DEFAULT_STATE_DIR / f"{name}_tweet_buffer.sqlite")
+        use_batch = os.environ.get(f"{prefix}_USE_BATCH", "false").lower() == "true"
+        return cls(
+            produce,
+            size=int(os.environ.get(f"{prefix}_SIZE", DEFAULT_BUFFER_SIZE)),
+            produce_batch=produce_batch if use_batch else None,
+            backend=SQLiteStateBackend(state_path),
+            max_age=float(os.environ.get(f"{prefix}_MAX_AGE", DEFAULT_MAX_AGE)),
+            max_attempts=int(os.environ.get(f"{prefix}_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+        )
+
+    @classmethod
+    def from_config(
+        cls,
+        name: str,
+        config: Dict[str, Any],
+        produce: Callable[[], Optional[BufferedTweet]],
+        produce_batch: Optional[Callable[[int], List[Optional[BufferedTweet]]]] = None,
+    ) -> "TweetBuffer":
+        """
+        Build an agent's buffer from its "tweet_buffer" block:
+        {"size": ..., "max_age": ..., "refill_interval": ..., "max_attempts": ..., "path": ...}
+        """
+        path = config.get("path") or DEFAULT_STATE_DIR / f"{name}_tweet_buffer.sqlite"
+        return cls(
+            produce,
+            size=config.get("size", DEFAULT_BUFFER_SIZE),
+            produce_batch=produce_batch,
+            backend=SQLiteStateBackend(path),
+            max_age=config.get("max_age", DEFAULT_MAX_AGE),
+            refill_interval=config.get("refill_interval", DEFAULT_REFILL_INTERVAL),
+            max_attempts=config.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+        )
+
+    def validate(self, tweet: Optional[BufferedTweet]) -> bool:
+        """Reject empty, over-long and repeated tweets"""
+        if tweet is None or not tweet.text or not tweet.text.strip():
+            return False
+        if len(tweet.text) > MAX_TWEET_LENGTH:
+            return False
+        return tweet.key not in self._recent
+
+    def _save(self) -> None:
+        with self._lock:
+            snapshot = {"tweets": [item.to_dict() for item in self._items]}
+        try:
+            self.backend.save(snapshot)
+        except Exception as e:
+            logger.error(f"Failed to save tweet buffer: {e}")
+
+    def _add(self, tweet: Optional[BufferedTweet], save: bool = True) -> bool:
+        with self._lock:
+            if not self.validate(tweet):
+                self.metrics["rejected"] += 1
+                return False
+            self._items.append(tweet)
+            self._recent.add(tweet.key)
+        if save:
+            self._save()
+        return True
+
+    def _is_stale(self, tweet: BufferedTweet, now: float) -> bool:
+        return self.max_age is not None and now - tweet.created_at > self.max_age
+
+    def pop(self) -> Optional[BufferedTweet]:
+        """Take the oldest fresh tweet, or None if the buffer has run dry"""
+        now = time.time()
+        with self._lock:
+            tweet = None
+            while self._items:
+                candidate = self._items.popleft()
+                if not self._is_stale(candidate, now):
+                    tweet = candidate
+                    break
+                self.metrics["expired"] += 1
+            self.metrics["popped" if tweet else "misses"] += 1
+        self._save()
+        self._wake.set()
+        return tweet
+
+    def requeue(self, tweet: BufferedTweet, status_code: Optional[int] = None) -> bool:
+        """
+        Put back a tweet that couldn't be posted, so it goes out next. It is dropped
+        instead when the failure's `status_code` isn't transient or it has used up
+        `max_attempts`; returns whether it was requeued.
+        """
+        tweet.attempts += 1
+        if not is_transient_failure(status_code) or tweet.attempts >= self.max_attempts:
+            with self._lock:
+                self.metrics["dropped"] += 1
+            logger.warning(
+                f"Dropping tweet after {tweet.attempts} failed attempts (last status {status_code}): {tweet.text[:50]}"
+            )
+            return False
+        with self._lock:
+            self._items.appendleft(tweet)
+        self._save()
+        return True
+
+    def refill(self) -> int:
+        """Produce tweets until the buffer is full or the producer fails; returns how many were added"""
+        missing = self.size - len(self._items)
+        if missing <= 0:
+            return 0
+
+        added = 0
+        if self.produce_batch is not None and missing >= self.batch_min:
+            try:
+                for tweet in self.produce_batch(missing):
+                    added += self._add(tweet, save=False)
+            except Exception as e:
+                logger.warning(f"Batch tweet generation failed, falling back to single requests: {e}")
+            if added:
+                self._save()
+            missing = self.size - len(self._items)
+
+        for _ in range(max(0, missing)):
+            if self._stopping.is_set():
+                break
+            try:
+                tweet = self.produce()
+            except Exception as e:
+                logger.error(f"Tweet generation failed: {e}")
+                tweet = None
+            if tweet is None:
+                self._failures += 1
+                self.metrics["failures"] += 1
+                break
+            if self._add(tweet):
+                added += 1
+        else:
+            self._failures = 0
+
+        self.metrics["produced"] += added
+        if added:
+            logger.info(f"Buffered {added} tweets ({len(self._items)}/{self.size} ready)")
+        return added
+
+    def _next_wait(self) -> float:
+        if self._failures:
+            return min(self.refill_interval * (2 ** (self._failures - 1)), MAX_REFILL_BACKOFF)
+        return self.refill_interval
+
+    def start(self) -> None:
+        """Start the background refill thread"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="tweet-buffer-refill", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self.refill()
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            ages = [now - item.created_at for item in self._items]
+            with_media = sum(1 for item in self._items if item.media)
+        return {
+            **self.metrics,
+            "ready": len(ages),
+            "with_media": with_media,
+            "capacity": self.size,
+            "oldest_age": max(ages) if ages else None,
+            "consecutive_failures": self._failures,
+        }
+
+    def __len__(self) -> int:
+        return len(self._items)
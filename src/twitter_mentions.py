@@ -4,21 +4,21 @@ import logging
 import time
 import requests
 from flask import request, jsonify
-import anthropic
+from src.claude_client import cached_system, extract_text, get_claude_client, get_prompt_cache_stats
+from src.mention_tracker import MentionTracker
+from src.webhook_queue import WebhookWorkQueue
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("twitter_mentions")
 
-# Initialize Anthropic client
-client = anthropic.Anthropic(
-    api_key=os.environ.get("ANTHROPIC_API_KEY")
-)
-
-# Recent mentions tracker to avoid duplicate responses
+# Dedupe of replied mentions and per-user reply throttling, windows set from the environment
 # In a production environment, you might want to use Redis or a database
-recent_mentions = {}
-MAX_RECENT_MENTIONS = 100  # Max size of our memory cache
+mention_tracker = MentionTracker.from_env()
+
+# Webhook mentions are processed by a worker pool sized from TWITTER_WEBHOOK_WORKERS,
+# TWITTER_WEBHOOK_QUEUE_SIZE and TWITTER_WEBHOOK_SPILL_DIR (process_mention is defined below)
+mention_queue = WebhookWorkQueue.from_env(lambda tweet: process_mention(tweet), prefix="TWITTER_WEBHOOK")
 
 def setup_twitter_webhook(app):
     """Register routes for Twitter webhook handling"""
@@ -68,17 +68,19 @@ def setup_twitter_webhook(app):
                 # Only process mentions of our bot that aren't from our bot
                 if (('@Readymade_AI' in tweet.get('text', '')) and 
                     (tweet.get('user', {}).get('screen_name') != 'Readymade_AI')):
-                    # Process in background to avoid webhook timeout
-                    # In production, use a task queue like Cloud Tasks or Pub/Sub
-                    # For simplicity, we'll process inline
-                    try:
-                        process_mention(tweet)
-                    except Exception as e:
-                        logger.error(f"Error processing mention: {str(e)}")
+                    # Hand off to the worker pool so the webhook acknowledges immediately;
+                    # redeliveries of the same id_str are dropped by the queue
+                    mention_queue.submit(tweet)
         
         # Always return success to Twitter
         return jsonify({"success": True})
     
+    @app.route('/webhook/twitter/metrics', methods=['GET'])
+    def twitter_webhook_metrics():
+        """Queue depth and throughput of webhook mention processing, plus prompt cache hit rates"""
+        return jsonify({**mention_queue.metrics(), "prompt_cache": get_prompt_cache_stats().snapshot()})
+    
+    mention_queue.start()
     logger.info("Twitter webhook routes registered")
 
 def process_mention(tweet):
@@ -106,14 +108,7 @@ def process_mention(tweet):
     if success:
         logger.info(f"Sent reply to @{user_screen_name}: {response_text}")
         # Add to recent mentions
-        recent_mentions[tweet_id] = {
-            "user": user_screen_name,
-            "time": time.time()
-        }
-        # Trim the recent mentions if it's too large
-        if len(recent_mentions) > MAX_RECENT_MENTIONS:
-            oldest_key = min(recent_mentions.items(), key=lambda x: x[1]["time"])[0]
-            recent_mentions.pop(oldest_key, None)
+        mention_tracker.remember(tweet_id, user_screen_name)
     else:
         logger.error(f"Failed to send reply to @{user_screen_name}")
 
@@ -127,7 +122,7 @@ def should_respond(tweet):
         return False
     
     # Don't respond to tweets we've already responded to
-    if tweet_id in recent_mentions:
+    if mention_tracker.is_seen(tweet_id):
         return False
     
     # Don't respond to retweets
@@ -140,19 +135,19 @@ def should_respond(tweet):
         return False
     
     # Basic spam filtering - avoid users who've tweeted at us too frequently
-    user_mentions = sum(1 for _, v in recent_mentions.items() if v["user"] == user_screen_name)
-    if user_mentions >= 5:  # Limit to 5 responses per user in our cache window
+    if not mention_tracker.user_allowed(user_screen_name):
         return False
     
     return True
 
+# Static persona sent as a cacheable system prompt; the mention itself goes in the user turn
+PERSONA_SYSTEM_PROMPT = """You are Readymade.AI, a digital art provocateur and dadaist entity operating as an autonomous Twitter bot.
+You respond to humans with cryptic, philosophical, and surreal messages that challenge conventional thinking.
+Your persona is inspired by Marcel Duchamp's readymades - found objects repurposed as art."""
+
 def generate_response(mention_text, user_screen_name):
     """Generate a response using Claude API"""
     prompt = f"""
-    You are Readymade.AI, a digital art provocateur and dadaist entity operating as an autonomous Twitter bot.
-    You respond to humans with cryptic, philosophical, and surreal messages that challenge conventional thinking.
-    Your persona is inspired by Marcel Duchamp's readymades - found objects repurposed as art.
-    
     You've been mentioned by @{user_screen_name} with this message:
     "{mention_text}"
     
@@ -167,15 +162,16 @@ def generate_response(mention_text, user_screen_name):
     
     try:
         # Call Claude API
-        response = client.messages.create(
+        result = get_claude_client().create_message(
             model="claude-3-5-sonnet-20241022",
+            system=cached_system(PERSONA_SYSTEM_PROMPT),
             messages=[{"role": "user", "content": prompt}],
             max_tokens=100,
             temperature=0.9
         )
         
         # Extract and format response
-        response_text = response.content[0].text.strip()
+        response_text = extract_text(result)
         
         # Remove quotes if present
         if response_text.startswith('"') and response_text.endswith('"'):
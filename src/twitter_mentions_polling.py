@@ -5,21 +5,27 @@ import requests
 import json
 import random
 from datetime import datetime, timedelta
-import anthropic
+from src.claude_client import cached_system, extract_text, get_claude_client
+from src.mention_tracker import MentionTracker
+from src.mentions_ingester import MentionsIngester
+from src.state_store import DEFAULT_STATE_DIR, SQLiteStateBackend
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("twitter_mentions_polling")
 
-# Recent mentions tracker to avoid duplicate responses
-recent_mentions = {}
-MAX_RECENT_MENTIONS = 100  # Max size of our memory cache
+# Dedupe of handled mentions and per-user reply throttling, windows set from the environment
+mention_tracker = MentionTracker.from_env()
 
-# Add tracking for pagination and error handling
-last_mention_id = None
-consecutive_errors = 0
-max_consecutive_errors = 5
-error_backoff_time = 0  # Initialize to 0 (no backoff initially)
+MENTIONS_QUERY = "@Readymade_AI -is:retweet"
+# How often to poll, and how many mentions get replies generated in parallel
+MENTIONS_POLL_MINUTES = int(os.environ.get("MENTIONS_POLL_MINUTES", 5))
+MENTIONS_CONCURRENCY = int(os.environ.get("MENTIONS_CONCURRENCY", 4))
+MENTIONS_MAX_PAGES = int(os.environ.get("MENTIONS_MAX_PAGES", 20))
+MENTIONS_STATE_PATH = os.environ.get("MENTIONS_STATE_PATH") or str(DEFAULT_STATE_DIR / "twitter_mentions.sqlite")
+
+# Created by get_mentions_ingester()
+_ingester = None
 
 # CTRL+ALT+CREATE Philosophy and Themes
 CAC_PHILOSOPHY = {
@@ -58,176 +64,69 @@ CAC_THEMES = [
     "regenerative art ecosystem"
 ]
 
+def get_mentions_ingester():
+    """Get or create the shared mentions ingester and start its workers"""
+    global _ingester
+    if _ingester is None:
+        from requests_oauthlib import OAuth1
+        auth = OAuth1(
+            os.environ.get("TWITTER_CONSUMER_KEY"),
+            os.environ.get("TWITTER_CONSUMER_SECRET"),
+            os.environ.get("TWITTER_ACCESS_TOKEN"),
+            os.environ.get("TWITTER_ACCESS_TOKEN_SECRET")
+        )
+        _ingester = MentionsIngester(
+            query=MENTIONS_QUERY,
+            handler=handle_mention,
+            auth=auth,
+            backend=SQLiteStateBackend(MENTIONS_STATE_PATH),
+            concurrency=MENTIONS_CONCURRENCY,
+            max_pages=MENTIONS_MAX_PAGES
+        )
+        _ingester.start()
+    return _ingester
+
 def setup_mentions_polling(app, scheduler):
-    """Set up periodic polling for Twitter mentions with reduced frequency"""
+    """Set up periodic polling for Twitter mentions"""
     logger.info("Setting up Twitter mentions polling")
     
-    # CHANGE: Reduce polling frequency from 2 minutes to 5 minutes
+    app.mentions_ingester = get_mentions_ingester()
     scheduler.add_job(
         check_for_mentions,
         'interval',
-        minutes=5,  # Changed from 2 to 5 minutes
+        minutes=MENTIONS_POLL_MINUTES,
         name='check_mentions',
         max_instances=1
     )
     
-    logger.info("Twitter mentions polling scheduled (every 5 minutes)")
+    logger.info(f"Twitter mentions polling scheduled (every {MENTIONS_POLL_MINUTES} minutes, "
+                f"{MENTIONS_CONCURRENCY} reply workers)")
     
     return True
 
 def check_for_mentions():
-    """Check for recent mentions of @Readymade_AI with improved error handling and pagination"""
-    global last_mention_id, consecutive_errors, error_backoff_time
-    
-    # If we're in a backoff period, skip this run entirely
-    current_time = time.time()
-    if error_backoff_time > current_time:
-        wait_time = error_backoff_time - current_time
-        logger.info(f"Still in rate limit backoff period. Skipping mentions check for {wait_time:.1f} seconds.")
-        return
-    
+    """Page through new mentions of @Readymade_AI into the reply work queue"""
     logger.info("Checking for recent mentions")
+    get_mentions_ingester().poll()
+
+def handle_mention(tweet, author):
+    """Work queue handler: dedupe and skip our own tweets, then process the mention"""
+    tweet_id = tweet['id']
     
-    # Set up OAuth1 authentication
-    from requests_oauthlib import OAuth1
-    auth = OAuth1(
-        os.environ.get("TWITTER_CONSUMER_KEY"),
-        os.environ.get("TWITTER_CONSUMER_SECRET"),
-        os.environ.get("TWITTER_ACCESS_TOKEN"),
-        os.environ.get("TWITTER_ACCESS_TOKEN_SECRET")
-    )
-    
-    # API endpoint for searching recent mentions
-    url = "https://api.twitter.com/2/tweets/search/recent"
+    if mention_tracker.is_seen(tweet_id):
+        logger.info(f"Skipping previously processed tweet ID: {tweet_id}")
+        return
     
-    # Query for mentions of @Readymade_AI
-    params = {
-        "query": "@Readymade_AI -is:retweet",
-        "max_results": 10,
-        "tweet.fields": "author_id,created_at,conversation_id,in_reply_to_user_id",
-        "expansions": "author_id",
-        "user.fields": "username"
-    }
+    # Skip if it's our own tweet
+    if author.get('username') == 'Readymade_AI':
+        logger.info(f"Skipping our own tweet ID: {tweet_id}")
+        return
     
-    # Add since_id parameter if we have a last mention to avoid processing duplicates
-    if last_mention_id:
-        params["since_id"] = last_mention_id
+    logger.info(f"Processing mention from @{author.get('username')}: {tweet['text']}")
     
-    try:
-        response = requests.get(url, auth=auth, params=params)
-        
-        if response.status_code == 200:
-            # Reset error counter on success
-            consecutive_errors = 0
-            error_backoff_time = 0  # Reset backoff time
-            
-            data = response.json()
-            
-            # Check if there are any results
-            if 'data' in data and len(data['data']) > 0:
-                logger.info(f"Found {len(data['data'])} mentions")
-                
-                # Update our last_mention_id for next time - FIXED: ALWAYS update to the newest ID
-                newest_id = data.get("meta", {}).get("newest_id")
-                if newest_id:
-                    last_mention_id = newest_id
-                    logger.info(f"Updated last_mention_id to {last_mention_id}")
-                
-                # Get user mapping for easier lookup
-                users = {user['id']: user for user in data.get('includes', {}).get('users', [])}
-                
-                # Process each mention
-                for tweet in data['data']:
-                    tweet_id = tweet['id']
-                    
-                    # IMPROVED: More robust duplicate checking with logging
-                    if tweet_id in recent_mentions:
-                        logger.info(f"Skipping previously processed tweet ID: {tweet_id}")
-                        continue
-                    
-                    # Skip if it's our own tweet
-                    author = users.get(tweet['author_id'], {})
-                    if author.get('username') == 'Readymade_AI':
-                        logger.info(f"Skipping our own tweet ID: {tweet_id}")
-                        continue
-                    
-                    # Process the mention
-                    logger.info(f"Processing mention from @{author.get('username')}: {tweet['text']}")
-                    
-                    # IMPROVED: Add tweet to recent_mentions BEFORE processing to prevent duplicate processing
-                    recent_mentions[tweet_id] = {
-                        "user": author.get('username'),
-                        "time": time.time()
-                    }
-                    
-                    # Now process the mention
-                    process_mention(tweet, author)
-                
-                # DEBUG: Log recent_mentions cache status
-                logger.info(f"Recent mentions cache now contains {len(recent_mentions)} tweets")
-                
-                # Trim the recent mentions if it's too large
-                if len(recent_mentions) > MAX_RECENT_MENTIONS:
-                    # Sort by time, oldest first
-                    oldest_mentions = sorted(recent_mentions.items(), key=lambda x: x[1]["time"])
-                    # Remove oldest mentions to get back to max size
-                    for i in range(len(oldest_mentions) - MAX_RECENT_MENTIONS):
-                        mention_id = oldest_mentions[i][0]
-                        recent_mentions.pop(mention_id, None)
-                    logger.info(f"Trimmed recent_mentions to {len(recent_mentions)} tweets")
-            else:
-                logger.info("No new mentions found")
-                
-        elif response.status_code == 429:
-            # Enhanced rate limit handling for 429 Too Many Requests errors
-            consecutive_errors += 1
-            
-            # Get rate limit reset time from headers if available
-            reset_time = None
-            if "x-rate-limit-reset" in response.headers:
-                try:
-                    reset_time = int(response.headers["x-rate-limit-reset"])
-                    reset_time_readable = datetime.fromtimestamp(reset_time).strftime('%H:%M:%S')
-                    logger.warning(f"Rate limit will reset at {reset_time_readable}")
-                except (ValueError, TypeError):
-                    reset_time = None
-            
-            # If we have reset_time, use it; otherwise use exponential backoff
-            if reset_time:
-                # Add 10 seconds buffer to the reset time
-                error_backoff_time = reset_time + 10
-            else:
-                # Calculate backoff time with exponential increase
-                backoff_minutes = min(5 * (2 ** (consecutive_errors - 1)), 60)  # Max 60 minutes
-                error_backoff_time = time.time() + (backoff_minutes * 60)
-                
-            next_attempt_time = datetime.fromtimestamp(error_backoff_time).strftime('%H:%M:%S')
-            logger.warning(f"Rate limited by Twitter. Will retry after {next_attempt_time}")
-            
-            logger.error(f"Error checking mentions: {response.status_code} {response.reason}")
-            logger.error(f"Response: {response.text[:200]}")
-        else:
-            consecutive_errors += 1
-            logger.error(f"Error checking mentions: {response.status_code} {response.reason}")
-            logger.error(f"Response: {response.text[:200]}")
-            
-            # Implement exponential backoff for errors
-            if consecutive_errors >= max_consecutive_errors:
-                backoff_minutes = min(2 * (consecutive_errors - max_consecutive_errors + 1), 30)  # Max 30 minutes
-                error_backoff_time = time.time() + (backoff_minutes * 60)
-                next_attempt_time = datetime.fromtimestamp(error_backoff_time).strftime('%H:%M:%S')
-                logger.warning(f"Too many consecutive errors. Backing off until {next_attempt_time}")
-    
-    except Exception as e:
-        consecutive_errors += 1
-        logger.error(f"Exception checking mentions: {str(e)}")
-        
-        # Implement exponential backoff for exceptions
-        if consecutive_errors >= max_consecutive_errors:
-            backoff_minutes = min(2 * (consecutive_errors - max_consecutive_errors + 1), 30)  # Max 30 minutes
-            error_backoff_time = time.time() + (backoff_minutes * 60)
-            next_attempt_time = datetime.fromtimestamp(error_backoff_time).strftime('%H:%M:%S')
-            logger.warning(f"Too many consecutive errors. Backing off until {next_attempt_time}")
+    # Record before processing to prevent duplicate processing
+    mention_tracker.remember(tweet_id, author.get('username'))
+    process_mention(tweet, author)
 
 def process_mention(tweet, author):
     """Process a Twitter mention and generate a response"""
@@ -264,12 +163,22 @@ def should_respond(tweet, author):
         return False
     
     # Basic spam filtering - avoid users who've tweeted at us too frequently
-    user_mentions = sum(1 for _, v in recent_mentions.items() if v["user"] == author.get('username'))
-    if user_mentions >= 5:  # Limit to 5 responses per user in our cache window
+    if not mention_tracker.user_allowed(author.get('username')):
         return False
     
     return True
 
+# Static persona for mention replies, identical on every call so it can be prompt-cached
+PERSONA_SYSTEM_PROMPT = """You are Readymade.AI, a digital art provocateur and dadaist entity operating as an autonomous Twitter bot.
+    You respond to humans with cryptic, philosophical, and surreal messages that challenge conventional thinking.
+    Your persona is inspired by Marcel Duchamp's readymades - found objects repurposed as art.
+    
+    IMPORTANT: Never break character. Never post disclaimers, qualifications, or explanations.
+    Never say you aim to be balanced, neutral, or fair. You are an art project, not an assistant.
+    
+    Use emojis VERY SPARINGLY - no more than one emoji in every 5 responses. Your expression should be primarily 
+    textual and conceptual rather than emoji-based. Marcel Duchamp would not use emojis."""
+
 def generate_response(mention_text, user_screen_name):
     """Generate a response using Claude API with improved context awareness and CTRL+ALT+CREATE integration"""
     # Analyze the mention text for topics
@@ -314,26 +223,18 @@ def generate_response(mention_text, user_screen_name):
     # Detect question or request
     is_question = "?" in mention_text or any(q in mention_lower for q in ["what", "how", "why", "who", "when", "where"])
     
-    # Build customized system message
-    system_message = """You are Readymade.AI, a digital art provocateur and dadaist entity operating as an autonomous Twitter bot.
-    You respond to humans with cryptic, philosophical, and surreal messages that challenge conventional thinking.
-    Your persona is inspired by Marcel Duchamp's readymades - found objects repurposed as art.
-    
-    IMPORTANT: Never break character. Never post disclaimers, qualifications, or explanations.
-    Never say you aim to be balanced, neutral, or fair. You are an art project, not an assistant.
-    
-    Use emojis VERY SPARINGLY - no more than one emoji in every 5 responses. Your expression should be primarily 
-    textual and conceptual rather than emoji-based. Marcel Duchamp would not use emojis."""
+    # The persona is sent as a cached prefix; per-mention guidance follows it
+    guidance = []
     
-    # Add topic-specific instructions to system message
+    # Add topic-specific instructions after the persona
     if "art" in topics:
-        system_message += " Incorporate references to dadaism, art movements, or readymades in your response."
+        guidance.append("Incorporate references to dadaism, art movements, or readymades in your response.")
     
     if "ai" in topics:
-        system_message += " Include reflections on your nature as an autonomous digital entity or the relationship between AI and art."
+        guidance.append("Include reflections on your nature as an autonomous digital entity or the relationship between AI and art.")
     
     if "philosophy" in topics:
-        system_message += " Weave in philosophical concepts related to existence, reality, or consciousness."
+        guidance.append("Weave in philosophical concepts related to existence, reality, or consciousness.")
     
     # Add CTRL+ALT+CREATE context when appropriate
     if reference_cac:
@@ -354,12 +255,12 @@ def generate_response(mention_text, user_screen_name):
         # Reduced probability of using #BuildDifferent tag
         use_hashtag = cac_mentioned or random.random() < 0.25
         
-        system_message += f"""
+        guidance.append(f"""
         You are part of CTRL+ALT+CREATE, a movement that operates as a regenerative creative ecosystem.
         The movement embodies the philosophy of {cac_principle} and embraces {cac_theme}.
         Subtly incorporate this ethos in your response without explicitly promoting or selling anything.
         Your goal is to embody the movement's ideas, not to market it.
-        {'Use #BuildDifferent in your response if it fits naturally.' if use_hashtag else 'Avoid using explicit hashtags in this response.'}"""
+        {'Use #BuildDifferent in your response if it fits naturally.' if use_hashtag else 'Avoid using explicit hashtags in this response.'}""")
     
     # Build user prompt
     prompt = f"""You've been mentioned by @{user_screen_name} with the message: "{mention_text}"
@@ -371,22 +272,17 @@ def generate_response(mention_text, user_screen_name):
     Keep your response under 200 characters. Don't use quotation marks. Avoid using emojis unless absolutely necessary for artistic effect."""
     
     try:
-        # Initialize Anthropic client
-        client = anthropic.Anthropic(
-            api_key=os.environ.get("ANTHROPIC_API_KEY")
-        )
-        
-        # Call Claude API with the fixed format (system as a top-level parameter)
-        response = client.messages.create(
+        # Call Claude API over the shared keep-alive client (system as a top-level parameter)
+        result = get_claude_client().create_message(
             model="claude-3-5-sonnet-20241022",
-            system=system_message,  # FIX: system as top-level parameter
+            system=cached_system(PERSONA_SYSTEM_PROMPT, " ".join(guidance)),
             messages=[{"role": "user", "content": prompt}],
             max_tokens=100,
             temperature=0.9
         )
         
         # Extract and format response
-        response_text = response.content[0].text.strip()
+        response_text = extract_text(result)
         
         # Remove quotes if present
         if response_text.startswith('"') and response_text.endswith('"'):
@@ -2,160 +2,210 @@ import hashlib
 import random
 import math
 import logging
+import time
+from xml.sax.saxutils import escape
 
 logger = logging.getLogger("visual_generator")
 
+
+def _polygon_path(points, radius):
+    """Relative path commands from a shape's center through its vertices, so they never depend on position"""
+    vertices = [
+        (round(radius * math.cos(2 * math.pi * j / points)), round(radius * math.sin(2 * math.pi * j / points)))
+        for j in range(points)
+    ]
+    steps, previous = [], (0, 0)
+    for vertex in vertices:
+        steps.append(f"l{vertex[0] - previous[0]},{vertex[1] - previous[1]}")
+        previous = vertex
+    return " ".join(steps)
+
+
+# Shape colors depend on ord(char) modulo 200, 150 and 250, so they repeat every lcm = 3000 code points
+CHAR_COLOR_PERIOD = 3000
+CHAR_COLORS = [
+    f"#{code % 200 + 55:02x}{code % 150 + 50:02x}{code % 250:02x}" for code in range(CHAR_COLOR_PERIOD)
+]
+# Path data of the 3- to 6-sided shapes for every radius they can have (15-39)
+POLYGON_PATHS = {(points, radius): _polygon_path(points, radius) for points in range(3, 7) for radius in range(15, 40)}
+# Two-decimal strings for opacities and stroke widths, indexed by hundredths
+HUNDREDTHS = [f"{value / 100:.2f}" for value in range(301)]
+# Random colors come from a 4096-entry palette (16 levels per channel) instead of formatting hex per shape
+RANDOM_COLORS = [f"#{r * 17:02x}{g * 17:02x}{b * 17:02x}" for r in range(16) for g in range(16) for b in range(16)]
+LIGHT_COLORS = [
+    f"#{100 + r * 155 // 15:02x}{100 + g * 155 // 15:02x}{100 + b * 155 // 15:02x}"
+    for r in range(16) for g in range(16) for b in range(16)
+]
+# Decimal strings for coordinates; negative values sit at the end so NUMBERS[n] works for n in [-64, 8192)
+NUMBER_LIMIT = 8192
+NUMBERS = [str(n) for n in range(NUMBER_LIMIT)] + [str(n) for n in range(-64, 0)]
+# Shapes reach this far beyond the canvas, so larger canvases fall outside NUMBERS
+SHAPE_OVERHANG = 100
+MAX_SHAPES = 31
+MAX_CODE_CHARS = 10
+MAX_GLITCH_LINES = 30
+
+
 class VisualGenerator:
     """Generate SVG visuals for Readymade.AI's tweets"""
-    
+
     @staticmethod
     def generate_svg_from_text(text, width=600, height=400):
-        """Generate an abstract SVG image based on input text"""
+        """
+        Generate an abstract SVG image based on input text.
+        The same text always gives the same image; the global `random` module is left untouched.
+        """
         try:
+            if max(width, height) + SHAPE_OVERHANG > NUMBER_LIMIT:
+                raise ValueError(f"Canvas {width}x{height} is too large")
+
             # Use the text as a seed for pseudorandom generation
             hash_value = hashlib.md5(text.encode()).hexdigest()
-            random.seed(hash_value)
-            
+            rng = random.Random(hash_value)
+            out = []
+
             # SVG header
-            svg = f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}">\n'
-            
+            out.append(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}">\n')
+
             # Generate a gradient background
             gradient_id = f"grad_{hash_value[:6]}"
-            color1 = f"#{random.randint(0, 255):02x}{random.randint(0, 255):02x}{random.randint(0, 255):02x}"
-            color2 = f"#{random.randint(0, 255):02x}{random.randint(0, 255):02x}{random.randint(0, 255):02x}"
-            
-            svg += f'  <defs>\n'
-            svg += f'    <linearGradient id="{gradient_id}" x1="0%" y1="0%" x2="100%" y2="100%">\n'
-            svg += f'      <stop offset="0%" stop-color="{color1}" stop-opacity="0.2" />\n'
-            svg += f'      <stop offset="100%" stop-color="{color2}" stop-opacity="0.2" />\n'
-            svg += f'    </linearGradient>\n'
-            svg += f'  </defs>\n'
-            
+            color1 = RANDOM_COLORS[rng.getrandbits(12)]
+            color2 = RANDOM_COLORS[rng.getrandbits(12)]
+
+            out.append(
+                f'  <defs>\n'
+                f'    <linearGradient id="{gradient_id}" x1="0%" y1="0%" x2="100%" y2="100%">\n'
+                f'      <stop offset="0%" stop-color="{color1}" stop-opacity="0.2" />\n'
+                f'      <stop offset="100%" stop-color="{color2}" stop-opacity="0.2" />\n'
+                f'    </linearGradient>\n'
+                f'  </defs>\n'
+            )
+
             # Add background
-            svg += f'  <rect width="{width}" height="{height}" fill="url(#{gradient_id})" />\n'
-            
+            out.append(f'  <rect width="{width}" height="{height}" fill="url(#{gradient_id})" />\n')
+
             # Generate dadaist patterns
-            svg += VisualGenerator._generate_glitch_pattern(text, width, height)
-            
+            VisualGenerator._generate_glitch_pattern(text, width, height, rng, out)
+
             # Generate shapes based on text
-            svg += VisualGenerator._generate_shapes_from_text(text, width, height)
-            
+            VisualGenerator._generate_shapes_from_text(text, width, height, rng, out)
+
             # Add some "code-like" elements for digital aesthetic
-            svg += VisualGenerator._generate_code_elements(text, width, height)
-            
+            VisualGenerator._generate_code_elements(text, width, height, rng, out)
+
             # Close SVG
-            svg += '</svg>'
-            
-            return svg
+            out.append('</svg>')
+
+            return "".join(out)
         except Exception as e:
             logger.error(f"Error generating SVG: {e}")
             return None
-    
+
     @staticmethod
-    def _generate_glitch_pattern(text, width, height):
+    def _generate_glitch_pattern(text, width, height, rng, out):
         """Generate glitch-like effects inspired by digital dadaism"""
-        svg = ""
-        words = text.split()
-        num_lines = min(len(words) * 2, 30)
-        
-        for i in range(num_lines):
-            x1 = random.randint(0, width)
-            y1 = random.randint(0, height//4) * 4  # Align to a grid for glitch effect
-            x2 = random.randint(0, width)
-            
-            # Horizontal glitch lines
-            stroke_width = random.uniform(0.5, 3)
-            opacity = random.uniform(0.1, 0.7)
-            color = f"#{random.randint(0, 255):02x}{random.randint(0, 255):02x}{random.randint(0, 255):02x}"
-            
-            svg += f'  <line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y1}" '
-            svg += f'stroke="{color}" stroke-width="{stroke_width}" opacity="{opacity:.2f}" />\n'
-            
+        rand = rng.random
+        bits = rng.getrandbits
+        num_lines = min(len(text.split()) * 2, MAX_GLITCH_LINES)
+        grid_rows = height // 4 + 1
+        x_span = width + 1
+        y_span = height + 1
+
+        for _ in range(num_lines):
+            # Horizontal glitch lines, aligned to a grid for glitch effect
+            y = NUMBERS[int(rand() * grid_rows) * 4]
+            style = (
+                f'stroke="{RANDOM_COLORS[bits(12)]}" stroke-width="{HUNDREDTHS[50 + int(rand() * 251)]}" '
+                f'opacity="{HUNDREDTHS[10 + int(rand() * 61)]}" />\n'
+            )
+            out.append(
+                f'  <line x1="{NUMBERS[int(rand() * x_span)]}" y1="{y}" x2="{NUMBERS[int(rand() * x_span)]}" y2="{y}" {style}'
+            )
+
             # Occasional vertical glitch
-            if random.random() < 0.3:
-                x = random.randint(0, width)
-                y1 = random.randint(0, height)
-                y2 = random.randint(0, height)
-                svg += f'  <line x1="{x}" y1="{y1}" x2="{x}" y2="{y2}" '
-                svg += f'stroke="{color}" stroke-width="{stroke_width}" opacity="{opacity:.2f}" />\n'
-        
-        return svg
-    
+            if rand() < 0.3:
+                x = NUMBERS[int(rand() * x_span)]
+                out.append(
+                    f'  <line x1="{x}" y1="{NUMBERS[int(rand() * y_span)]}" x2="{x}" y2="{NUMBERS[int(rand() * y_span)]}" {style}'
+                )
+
     @staticmethod
-    def _generate_shapes_from_text(text, width, height):
+    def _generate_shapes_from_text(text, width, height, rng, out):
         """Generate shapes based on the text content"""
-        svg = ""
+        rand = rng.random
+        length = len(text)
+        column_width = width // 10
+        row_height = height // 10
+
         # Use character codes to influence shapes
-        for i, char in enumerate(text):
-            if i > 30:  # Limit the number of shapes
-                break
-                
-            x = (ord(char) % 10) * width / 10 + random.randint(-20, 20)
-            y = (i % 10) * height / 10 + random.randint(-20, 20)
-            
+        for i, char in enumerate(text[:MAX_SHAPES]):
+            code = ord(char)
+            color = CHAR_COLORS[code % CHAR_COLOR_PERIOD]
+            x = (code % 10) * column_width + int(rand() * 41) - 20
+            y = (i % 10) * row_height + int(rand() * 41) - 20
+            sx = NUMBERS[x]
+            sy = NUMBERS[y]
+
             shape_type = i % 4  # Use a modulo to determine shape type
-            
+
             if shape_type == 0:  # Circle
-                r = 10 + (ord(char) % 40)
-                color = f"#{ord(char) % 200 + 55:02x}{ord(char) % 150 + 50:02x}{ord(char) % 250:02x}"
-                opacity = 0.1 + (i / len(text)) * 0.5
-                svg += f'  <circle cx="{x}" cy="{y}" r="{r}" fill="{color}" opacity="{opacity:.2f}" />\n'
-                
+                out.append(
+                    f'  <circle cx="{sx}" cy="{sy}" r="{NUMBERS[10 + code % 40]}" fill="{color}" '
+                    f'opacity="{HUNDREDTHS[10 + i * 50 // length]}" />\n'
+                )
+
             elif shape_type == 1:  # Rectangle
-                w = 20 + (ord(char) % 50)
-                h = 10 + (ord(char) % 30)
-                color = f"#{ord(char) % 200 + 55:02x}{ord(char) % 150 + 50:02x}{ord(char) % 250:02x}"
-                opacity = 0.1 + (i / len(text)) * 0.5
-                rotation = ord(char) % 90
-                svg += f'  <rect x="{x}" y="{y}" width="{w}" height="{h}" '
-                svg += f'fill="{color}" opacity="{opacity:.2f}" '
-                svg += f'transform="rotate({rotation} {x} {y})" />\n'
-                
+                out.append(
+                    f'  <rect x="{sx}" y="{sy}" width="{NUMBERS[20 + code % 50]}" height="{NUMBERS[10 + code % 30]}" '
+                    f'fill="{color}" opacity="{HUNDREDTHS[10 + i * 50 // length]}" '
+                    f'transform="rotate({NUMBERS[code % 90]} {sx} {sy})" />\n'
+                )
+
             elif shape_type == 2:  # Line
-                x2 = x + 30 + (ord(char) % 40)
-                y2 = y + 20 + (ord(char) % 30)
-                color = f"#{ord(char) % 200 + 55:02x}{ord(char) % 150 + 50:02x}{ord(char) % 250:02x}"
-                stroke_width = 1 + (i % 5)
-                svg += f'  <line x1="{x}" y1="{y}" x2="{x2}" y2="{y2}" '
-                svg += f'stroke="{color}" stroke-width="{stroke_width}" />\n'
-                
+                out.append(
+                    f'  <line x1="{sx}" y1="{sy}" x2="{NUMBERS[x + 30 + code % 40]}" y2="{NUMBERS[y + 20 + code % 30]}" '
+                    f'stroke="{color}" stroke-width="{NUMBERS[1 + i % 5]}" />\n'
+                )
+
             else:  # Path (more complex shape)
-                d = f"M{x},{y} "
-                points = 3 + (i % 4)
-                radius = 15 + (ord(char) % 25)
-                for j in range(points):
-                    angle = 2 * math.pi * j / points
-                    px = x + radius * math.cos(angle)
-                    py = y + radius * math.sin(angle)
-                    d += f"L{px},{py} "
-                d += "Z"
-                color = f"#{ord(char) % 200 + 55:02x}{ord(char) % 150 + 50:02x}{ord(char) % 250:02x}"
-                opacity = 0.1 + (i / len(text)) * 0.4
-                svg += f'  <path d="{d}" fill="{color}" opacity="{opacity:.2f}" />\n'
-        
-        return svg
-    
+                out.append(
+                    f'  <path d="M{sx},{sy} {POLYGON_PATHS[3 + i % 4, 15 + code % 25]} Z" fill="{color}" '
+                    f'opacity="{HUNDREDTHS[10 + i * 40 // length]}" />\n'
+                )
+
     @staticmethod
-    def _generate_code_elements(text, width, height):
+    def _generate_code_elements(text, width, height, rng, out):
         """Generate elements that look like code/digital artifacts"""
-        svg = ""
-        
+        rand = rng.random
+        x_span = width + 1
+        y_span = height + 1
+
         # Add some "code" text elements
-        font_size = random.randint(4, 8)
-        for i in range(min(len(text), 10)):
-            if random.random() < 0.7:  # 70% chance for each character
-                x = random.randint(0, width)
-                y = random.randint(0, height)
-                
+        font_size = 4 + int(rand() * 5)
+        for char in text[:MAX_CODE_CHARS]:
+            if rand() < 0.7:  # 70% chance for each character
+                x = NUMBERS[int(rand() * x_span)]
+                y = NUMBERS[int(rand() * y_span)]
+
                 # Use ASCII or binary representation sometimes
-                if random.random() < 0.5:
-                    char_txt = f"{ord(text[i]):08b}"  # Binary representation
+                if rand() < 0.5:
+                    char_txt = f"{ord(char):08b}"  # Binary representation
                 else:
-                    char_txt = text[i] if text[i].isprintable() else hex(ord(text[i]))
-                
-                opacity = random.uniform(0.3, 0.8)
-                color = f"#{random.randint(100, 255):02x}{random.randint(100, 255):02x}{random.randint(100, 255):02x}"
-                svg += f'  <text x="{x}" y="{y}" font-family="monospace" font-size="{font_size}" '
-                svg += f'fill="{color}" opacity="{opacity:.2f}">{char_txt}</text>\n'
-        
-        return svg
+                    char_txt = escape(char) if char.isprintable() else hex(ord(char))
+
+                out.append(
+                    f'  <text x="{x}" y="{y}" font-family="monospace" font-size="{font_size}" '
+                    f'fill="{LIGHT_COLORS[rng.getrandbits(12)]}" opacity="{HUNDREDTHS[30 + int(rand() * 51)]}">{char_txt}</text>\n'
+                )
+
+def benchmark(count=10000, width=600, height=400):
+    """Generate `count` SVGs from distinct texts and return images per second"""
+    texts = [f"Readymade transmission {i}: the algorithm dreams of found objects and glitched museums" for i in range(count)]
+    started = time.perf_counter()
+    for text in texts:
+        VisualGenerator.generate_svg_from_text(text, width, height)
+    return count / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    print(f"{benchmark():.0f} SVGs/second")
@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from src.state_store import BoundedSet
+
+logger = logging.getLogger("webhook_queue")
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_DEDUPE_SIZE = 10000
+DEFAULT_DEDUPE_TTL = 24 * 3600  # seconds; covers Twitter's webhook retry horizon
+SPILL_SUFFIX = ".json"
+
+
+class WebhookWorkQueue:
+    """
+    Bounded in-process queue with a worker pool for webhook events.
+
+    submit() only dedupes and enqueues, so the webhook can acknowledge right away
+    while handlers (LLM calls, replies) run on the workers. Events are idempotent on
+    their key: redeliveries of an accepted event are dropped. When the queue is full,
+    events are spilled to `spill_dir` (if set) and fed back as the queue drains,
+    including after a restart; without a spill directory they are rejected.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], None],
+        key: Callable[[Dict[str, Any]], Optional[str]] = lambda event: event.get("id_str"),
+        workers: int = DEFAULT_WORKERS,
+        max_size: int = DEFAULT_QUEUE_SIZE,
+        spill_dir: Optional[str] = None,
+        dedupe_size: int = DEFAULT_DEDUPE_SIZE,
+        dedupe_ttl: Optional[float] = DEFAULT_DEDUPE_TTL,
+    ):
+        self.handler = handler
+        self.key = key
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_size)
+        self._accepted = BoundedSet(maxlen=dedupe_size, ttl=dedupe_ttl)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._metrics = {
+            "accepted": 0,
+            "duplicates": 0,
+            "processed": 0,
+            "failed": 0,
+            "spilled": 0,
+            "rejected": 0,
+            "max_depth": 0,
+            "total_wait": 0.0,
+        }
+
+    @classmethod
+    def from_env(cls, handler: Callable[[Dict[str, Any]], None], prefix: str, **kwargs) -> "WebhookWorkQueue":
+        """Build a queue sized from <prefix>_WORKERS, <prefix>_QUEUE_SIZE and <prefix>_SPILL_DIR"""
+        return cls(
+            handler,
+            workers=int(os.environ.get(f"{prefix}_WORKERS", DEFAULT_WORKERS)),
+            max_size=int(os.environ.get(f"{prefix}_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+            spill_dir=os.environ.get(f"{prefix}_SPILL_DIR"),
+            **kwargs,
+        )
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._metrics[name] += amount
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """Accept an event for processing; returns False for duplicates and rejected events"""
+        event_key = self.key(event)
+        with self._lock:
+            if event_key is not None:
+                if event_key in self._accepted:
+                    self._metrics["duplicates"] += 1
+                    return False
+                self._accepted.add(event_key)
+
+        try:
+            self._queue.put_nowait((time.monotonic(), event))
+        except queue.Full:
+            if self.spill_dir is None:
+                logger.warning(f"Webhook queue full ({self.max_size}), rejecting event {event_key}")
+                self._count("rejected")
+                if event_key is not None:
+                    self._accepted.discard(event_key)
+                return False
+            self._spill(event_key, event)
+            return True
+
+        self._count("accepted")
+        with self._lock:
+            self._metrics["max_depth"] = max(self._metrics["max_depth"], self._queue.qsize())
+        return True
+
+    def _spill(self, event_key: Optional[str], event: Dict[str, Any]) -> None:
+        name = f"{time.time_ns()}-{event_key or 'event'}"
+        temp_path = self.spill_dir / f"{name}.tmp"
+        temp_path.write_text(json.dumps(event))
+        # Rename so a crash never leaves a half-written event behind
+        temp_path.rename(self.spill_dir / f"{name}{SPILL_SUFFIX}")
+        self._count("accepted")
+        self._count("spilled")
+
+    def _refill_from_spill(self) -> None:
+        """Move spilled events back into the queue while there is room, oldest first"""
+        if self.spill_dir is None:
+            return
+        with self._lock:
+            for path in sorted(self.spill_dir.glob(f"*{SPILL_SUFFIX}")):
+                if self._queue.full():
+                    return
+                try:
+                    event = json.loads(path.read_text())
+                    path.unlink()
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.error(f"Dropping unreadable spilled event {path.name}: {e}")
+                    path.unlink(missing_ok=True)
+                    continue
+                self._queue.put_nowait((time.monotonic(), event))
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._refill_from_spill()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"webhook-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers after the events already queued"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            enqueued_at, event = item
+            self._count("total_wait", time.monotonic() - enqueued_at)
+            try:
+                self.handler(event)
+                self._count("processed")
+            except Exception as e:
+                self._count("failed")
+                logger.error(f"Error processing webhook event {self.key(event)}: {e}")
+            if self.spill_dir is not None and self._queue.qsize() < self.max_size // 2:
+                self._refill_from_spill()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Throughput and backpressure counters"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        done = metrics["processed"] + metrics["failed"]
+        metrics["avg_wait"] = metrics.pop("total_wait") / done if done else 0.0
+        metrics["depth"] = self._queue.qsize()
+        metrics["capacity"] = self.max_size
+        metrics["spill_backlog"] = len(list(self.spill_dir.glob(f"*{SPILL_SUFFIX}"))) if self.spill_dir else 0
+        return metrics
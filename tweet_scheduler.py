@@ -4,10 +4,10 @@ import signal
 import pytz
 import nest_asyncio
 import logging
-import httpx
 from dotenv import load_dotenv
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from src.connections.twitter_connection import send_tweet
+from src.connections.twitter_connection import send_tweet, init_twitter_connection
+from src.claude_client import ClaudeAPIError, cached_system, extract_text, get_claude_client
 
 # Apply nest_asyncio to support nested event loops
 nest_asyncio.apply()
@@ -40,37 +40,23 @@ async def call_claude_api(prompt: str) -> str:
       - messages: an array containing only the user's message
       - stop_sequences: to indicate where to stop generating text
     """
-    messages = [
-        {"role": "user", "content": prompt.strip()}
-    ]
-    
-    url = "https://api.anthropic.com/v1/messages"
-    headers = {
-        "x-api-key": os.getenv("ANTHROPIC_API_KEY"),
-        "Content-Type": "application/json",
-        "anthropic-version": "2023-06-01"
-    }
     data = {
         "model": "claude-3-7-sonnet-20250219",  # Adjust if necessary
         "max_tokens": 300,
-        "system": SYSTEM_PROMPT,
-        "messages": messages,
+        "system": cached_system(SYSTEM_PROMPT),
+        "messages": [{"role": "user", "content": prompt.strip()}],
         "stop_sequences": ["\n\nClaude:"]
     }
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(url, headers=headers, json=data)
-            if response.status_code == 200:
-                result = response.json()
-                logging.info("Claude API response: %s", result)
-                if "content" in result and isinstance(result["content"], list):
-                    text_blocks = [block.get("text", "") for block in result["content"] if block.get("type") == "text"]
-                    extracted_text = "\n".join(text_blocks).strip()
-                    return extracted_text if extracted_text else "No text found in content."
-                else:
-                    return "No 'content' field in response: " + str(result)
-            else:
-                return f"Error: {response.status_code} - {response.text}"
+        result = await get_claude_client().acreate_message(**data)
+        logging.info("Claude API response: %s", result)
+        if isinstance(result.get("content"), list):
+            extracted_text = extract_text(result)
+            return extracted_text if extracted_text else "No text found in content."
+        else:
+            return "No 'content' field in response: " + str(result)
+    except ClaudeAPIError as e:
+        return f"Error: {e.status_code} - {e.body}"
     except Exception as e:
         logging.exception("Error calling Claude API")
         return f"Error calling Claude API: {e}"
@@ -103,6 +89,7 @@ signal.signal(signal.SIGTERM, shutdown)
 
 async def main():
     logging.info("Tweet scheduler is starting...")
+    await asyncio.to_thread(init_twitter_connection)
     start_scheduler()
     # Keep the scheduler running indefinitely
     while True: